@@ -0,0 +1,490 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pygame
+
+from eventBus import EventBus
+from levelMeter import METER_FPS, LevelMeter
+from streamMixer import ArraySource, MemmapSource, MixerChannel, Mp3Source
+from telemetry import telemetry
+
+DEFAULT_VOICES = 32  # Canales del mixer; un cue sonando ocupa uno
+END_CHECK_SECONDS = 0.005  # Cerca del final se comprueba el canal cada 5 ms
+# pygame mezcla por adelantado un búfer entero (4096 frames): el canal puede quedar libre hasta ~93 ms antes
+# de lo que marca el reloj, así que la comprobación empieza ese margen antes
+PYGAME_END_LEAD_SECONDS = 0.1
+
+
+class Voice:
+    """Una reproducción activa de un cue sobre un pygame.mixer.Channel."""
+
+    def __init__(self, voice_id, file_path, sound, channel, volume=1.0, fade_out_ms=0, queued=False):
+        self.id = voice_id
+        self.file_path = file_path
+        self.sound = sound
+        self.channel = channel
+        self.volume = volume
+        self.fade_out_ms = fade_out_ms
+        self.queued = queued  # Pertenece a la cola secuencial (play_queue)
+        self.armed = False  # Hay un cue de la cola esperando en Channel.queue
+        self.completed = False  # Llegó al final sola (no la pararon)
+        self.state = "playing"  # playing | paused | fading | stopped
+        self.started_at = time.perf_counter()
+        self.paused_at = None
+        self.fade_ends_at = None
+        self.length = sound.get_length()
+
+    def position(self):
+        """Seconds played so far, excluding time spent paused."""
+        if isinstance(self.channel, MixerChannel):
+            return self.channel.get_pos()  # Contado en frames por el mezclador
+        now = self.paused_at if self.paused_at is not None else time.perf_counter()
+        return max(0.0, now - self.started_at)
+
+    def is_active(self):
+        return self.state != "stopped"
+
+    def remaining(self):
+        """Seconds until the engine should check whether the voice ended, or None while paused."""
+        lead = 0.0 if isinstance(self.channel, MixerChannel) else PYGAME_END_LEAD_SECONDS
+        if self.state == "fading":
+            return self.fade_ends_at - time.perf_counter() - lead
+        if self.state == "playing":
+            return self.length - self.position() - lead
+        return None
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "file_path": self.file_path,
+            "state": self.state,
+            "volume": self.volume,
+            "position": self.position(),
+            "length": self.length,
+            "queued": self.queued,
+        }
+
+
+class AudioEngine:
+    """Motor polifónico: varios cues simultáneos, cada uno en su propio canal."""
+
+    def __init__(self, cue_cache, num_voices=DEFAULT_VOICES, stream_mixer=None, events=None):
+        self.cue_cache = cue_cache
+        self.stream_mixer = stream_mixer  # Cues largos en WAV: mapeados desde disco en vez de cacheados
+        self.events = events or EventBus()  # play, pause, resume, seek, stop, end, error
+        self.seek_index_for = lambda file_path: None  # Metadatos con "seek_index" para saltar en un MP3
+        self.seek_latencies = deque(maxlen=200)  # ms desde que se pide un salto hasta que queda aplicado
+        self.num_voices = num_voices
+        self.voices = {}  # voice_id -> Voice
+        self.play_queue = deque()  # (file_path, options) pendientes de la cola secuencial
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        pygame.mixer.set_num_channels(num_voices)
+
+        # Las órdenes de la UI se ejecutan en un hilo propio para no bloquear Tk
+        self.command_latencies = deque(maxlen=200)  # (orden, ms desde submit hasta terminar)
+        self.errors = deque(maxlen=20)
+        self._commands = queue.Queue()
+        self._pending = 0
+        self._worker = threading.Thread(target=self._run_worker, daemon=True)
+        self._worker.start()
+
+        # Las voces se recogen cuando les toca terminar, no con un sondeo periódico
+        self._wake = threading.Event()
+        self._closed = False
+        if stream_mixer is not None:
+            stream_mixer.on_voice_end = self._wake.set
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+        # Medidor de salida: el mezclador numpy mide en su callback; SDL mezcla las voces de pygame sin dar
+        # acceso al resultado, así que se miden aquí sobre las muestras que les tocan en cada fotograma
+        frequency, _, channels = pygame.mixer.get_init()
+        self.meter_rate = frequency
+        self.pygame_meter = LevelMeter(channels, frequency)
+        self._meter_mix = np.zeros((frequency // METER_FPS, channels), dtype=np.float32)
+        self._meter_voice = np.zeros_like(self._meter_mix)
+        self._metering = threading.Event()
+        self._meter_thread = threading.Thread(target=self._meter_loop, daemon=True)
+        self._meter_thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Run an engine command on the audio worker thread."""
+        with self._lock:
+            self._pending += 1
+        self._commands.put((time.perf_counter(), func, args, kwargs))
+
+    def _run_worker(self):
+        while True:
+            submitted_at, func, args, kwargs = self._commands.get()
+            if func is None:
+                return
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"Error en el motor de audio: {e}")
+                self.errors.append(str(e))
+                telemetry.event("error", origen="motor", command=func.__name__, message=str(e))
+                self.events.publish("error", command=func.__name__, message=str(e))
+            finally:
+                latency_ms = (time.perf_counter() - submitted_at) * 1000
+                self.command_latencies.append((func.__name__, latency_ms))
+                telemetry.record_span(f"motor.orden.{func.__name__}", latency_ms)
+                with self._lock:
+                    self._pending -= 1
+
+    def shutdown(self):
+        self._commands.put((time.perf_counter(), None, (), {}))
+        self._closed = True
+        self._wake.set()
+        self._metering.set()
+
+    def _watch(self):
+        while not self._closed:
+            try:
+                self._wake.wait(self._next_deadline())
+                self._wake.clear()
+                self.update()
+            except Exception as e:
+                # Si este hilo muere ya no se recogen voces ni llegan los "end": el show sigue sin ellos
+                print(f"Error al vigilar las voces: {e}")
+                self.errors.append(str(e))
+                telemetry.event("error", origen="vigilante", message=str(e))
+
+    def _next_deadline(self):
+        """Seconds until the next voice is due to end; None (sleep until woken) when nothing plays."""
+        with self._lock:
+            remaining = [r for r in (voice.remaining() for voice in self.voices.values()) if r is not None]
+            if self.play_queue and self._queue_voice() is None:
+                return 0
+        if not remaining:
+            return None
+        return max(END_CHECK_SECONDS, min(remaining))
+
+    def _meter_loop(self):
+        """Publish "meter" events at METER_FPS while something sounds, then sleep until the next play."""
+        period = 1 / METER_FPS
+        next_frame = time.perf_counter()
+        while not self._closed:
+            if not self._metering.is_set():
+                self._metering.wait()
+                next_frame = time.perf_counter()
+            self._meter_pygame_voices()
+            self.events.publish("meter", levels=self.output_levels())
+            if not self.is_busy() and self.pygame_meter.is_silent() \
+                    and (self.stream_mixer is None or self.stream_mixer.meter.is_silent()):
+                self._metering.clear()  # El último fotograma ya dejó los medidores a cero
+                if self.is_busy():
+                    self._metering.set()
+            next_frame += period
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+
+    def _meter_pygame_voices(self):
+        mix = self._meter_mix
+        mix.fill(0)
+        with self._lock:
+            voices = [v for v in self.voices.values()
+                      if v.state in ("playing", "fading") and not isinstance(v.channel, MixerChannel)]
+        for voice in voices:
+            samples = pygame.sndarray.samples(voice.sound)  # Vista, sin copiar el Sound
+            end = min(int(voice.position() * self.meter_rate), len(samples))
+            start = max(0, end - len(mix))
+            count = end - start
+            if count <= 0:
+                continue
+            chunk = samples[start:end].reshape(count, -1)
+            used = min(chunk.shape[1], mix.shape[1])
+            target = self._meter_voice[:count, :used]
+            # El mixer trabaja en 16 bits con signo
+            np.multiply(chunk[:, :used], voice.channel.get_volume() / 32768, out=target)
+            mix[len(mix) - count:, :used] += target
+        self.pygame_meter.process(mix)
+
+    def output_levels(self):
+        """Read the output meters (once per UI frame): per channel, the louder of pygame and the numpy mixer."""
+        levels = self.pygame_meter.read()
+        if self.stream_mixer is not None:
+            mixed = self.stream_mixer.meter.read()
+            for key in ("peak", "rms", "hold"):
+                levels[key] = [max(a, b) for a, b in zip(levels[key], mixed[key])]
+            levels["clips"] += mixed["clips"]
+        return levels
+
+    def last_latency(self, name):
+        """Most recent submit-to-done latency (ms) of a command, or None."""
+        for command, latency_ms in reversed(self.command_latencies):
+            if command == name:
+                return latency_ms
+        return None
+
+    def is_released(self, file_path):
+        """True once no voice plays the file and nothing is decoding it."""
+        return not self.voices_for(file_path) and not self.cue_cache.is_loading(file_path)
+
+    def _claim_channel(self):
+        # Con todos los canales ocupados se roba el que lleva más tiempo sonando
+        channel = pygame.mixer.find_channel(True)
+        for voice in self.voices.values():
+            if voice.channel is channel and voice.is_active():
+                voice.state = "stopped"
+        return channel
+
+    def is_streamed(self, file_path):
+        return self.stream_mixer is not None and self.stream_mixer.accepts(file_path)
+
+    def _seek_source(self, file_path, frame):
+        """A mixer source for file_path positioned at frame, choosing the cheapest way to get there."""
+        gain_db = self.cue_cache.gains.get(file_path, 0.0)
+        if self.is_streamed(file_path):
+            return self.stream_mixer.open(file_path, gain_db)  # Salto O(1) sobre el mapeo
+        meta = self.seek_index_for(file_path)
+        if meta is not None and len(meta.get("seek_index", ())) and not self.cue_cache.contains(file_path) \
+                and meta["samplerate"] == self.stream_mixer.sample_rate:
+            # MP3 sin decodificar: se empieza a decodificar en el frame del índice
+            return Mp3Source(file_path, meta, min(frame, meta["frames"]), gain_db)
+        sound = self.cue_cache.get(file_path)
+        return ArraySource(pygame.sndarray.samples(sound), self.stream_mixer.sample_rate, owner=sound)
+
+    def prepare(self, file_path):
+        """Decode (or map) a cue ahead of time; play(..., sound=prepared) then starts it without I/O."""
+        if self.is_streamed(file_path):
+            source = self.stream_mixer.open(file_path, self.cue_cache.gains.get(file_path, 0.0))
+            source.prefetch(self.stream_mixer.blocksize * 4)
+            self.stream_mixer.ensure_stream()
+            return source
+        return self.cue_cache.get(file_path)
+
+    def play(self, file_path, volume=1.0, fade_in_ms=0, fade_out_ms=0, queued=False, start=0.0, sound=None):
+        """Start a new voice for a cue and return it; other voices keep playing.
+
+        With start (seconds) the cue plays on the stream mixer from that point. sound is a
+        result of prepare() for this file; a mapped source can be played only once.
+        """
+        if start and self.stream_mixer is not None:
+            frame = int(start * self.stream_mixer.sample_rate)
+            source = self._seek_source(file_path, frame)
+            with self._lock:
+                channel = self.stream_mixer.channel()
+                channel.set_volume(volume)
+                channel.play(source, fade_ms=fade_in_ms, start=source.start if isinstance(source, Mp3Source) else frame)
+                voice = Voice(next(self._ids), file_path, source, channel, volume, fade_out_ms, queued)
+                self.voices[voice.id] = voice
+            self._changed("play", voice)
+            return voice
+
+        if sound is not None:
+            streamed = isinstance(sound, MemmapSource)
+        elif self.is_streamed(file_path):
+            streamed = True
+            sound = self.stream_mixer.open(file_path, self.cue_cache.gains.get(file_path, 0.0))
+        else:
+            streamed = False
+            sound = self.cue_cache.get(file_path)
+        with self._lock:
+            channel = self.stream_mixer.channel() if streamed else self._claim_channel()
+            channel.set_volume(volume)
+            channel.play(sound, fade_ms=fade_in_ms)
+            voice = Voice(next(self._ids), file_path, sound, channel, volume, fade_out_ms, queued)
+            self.voices[voice.id] = voice
+            if queued:
+                self._arm_next(voice)
+        self._changed("play", voice)
+        return voice
+
+    def _changed(self, kind, voice):
+        self._wake.set()  # El próximo final pudo cambiar
+        self._metering.set()
+        self.events.publish(kind, voice=voice, voice_id=voice.id, file_path=voice.file_path)
+
+    def stop(self, voice_id, fade_out_ms=None):
+        with self._lock:
+            voice = self.voices.get(voice_id)
+            if voice is None or not voice.is_active():
+                return
+            fade_out_ms = voice.fade_out_ms if fade_out_ms is None else fade_out_ms
+            if fade_out_ms and voice.state == "playing":
+                voice.channel.fadeout(fade_out_ms)
+                voice.state = "fading"
+                voice.fade_ends_at = time.perf_counter() + fade_out_ms / 1000
+            else:
+                voice.channel.stop()
+                voice.state = "stopped"
+            if voice.queued:
+                self.play_queue.clear()
+        self._changed("stop", voice)
+
+    def stop_cue(self, file_path, fade_out_ms=None):
+        for voice in self.voices_for(file_path):
+            self.stop(voice.id, fade_out_ms)
+
+    def stop_all(self, fade_out_ms=None):
+        with self._lock:
+            self.play_queue.clear()
+            for voice_id in list(self.voices):
+                self.stop(voice_id, fade_out_ms)
+
+    def pause(self, voice_id):
+        with self._lock:
+            voice = self.voices.get(voice_id)
+            if voice is None or voice.state != "playing":
+                return
+            voice.channel.pause()
+            voice.paused_at = time.perf_counter()
+            voice.state = "paused"
+        self._changed("pause", voice)
+
+    def resume(self, voice_id):
+        with self._lock:
+            voice = self.voices.get(voice_id)
+            if voice is None or voice.state != "paused":
+                return
+            voice.channel.unpause()
+            voice.started_at += time.perf_counter() - voice.paused_at
+            voice.paused_at = None
+            voice.state = "playing"
+        self._changed("resume", voice)
+
+    def seek(self, voice_id, seconds, requested_at=None):
+        """Move a voice to seconds, keeping its state; returns the request-to-applied latency in ms."""
+        requested_at = requested_at or time.perf_counter()
+        if self.stream_mixer is None:
+            return None
+        with self._lock:
+            voice = self.voices.get(voice_id)
+            if voice is None or not voice.is_active():
+                return None
+            rate = self.stream_mixer.sample_rate
+            length = len(voice.sound) if isinstance(voice.channel, MixerChannel) else int(voice.length * rate)
+            frame = max(0, min(int(seconds * rate), length))
+            if not isinstance(voice.channel, MixerChannel):
+                # Un Sound de pygame no salta: la voz pasa al mezclador leyendo el mismo buffer decodificado
+                source = ArraySource(pygame.sndarray.samples(voice.sound), self.stream_mixer.sample_rate,
+                                     owner=voice.sound)
+                channel = self.stream_mixer.channel()
+                channel.set_volume(voice.volume)
+                channel.play(source, start=frame)
+                if voice.state == "paused":
+                    channel.pause()
+                voice.channel.stop()
+                voice.channel, voice.sound, voice.armed = channel, source, False
+            elif isinstance(voice.sound, Mp3Source):
+                source = Mp3Source(voice.file_path, self.seek_index_for(voice.file_path), frame,
+                                   self.cue_cache.gains.get(voice.file_path, 0.0))
+                voice.channel.seek(frame, source)
+                voice.sound = source
+            else:
+                voice.channel.seek(frame)
+        latency_ms = (time.perf_counter() - requested_at) * 1000
+        self.seek_latencies.append(latency_ms)
+        self._changed("seek", voice)
+        return latency_ms
+
+    def set_volume(self, voice_id, volume):
+        with self._lock:
+            voice = self.voices.get(voice_id)
+            if voice and voice.is_active():
+                voice.volume = volume
+                voice.channel.set_volume(volume)
+
+    def set_cue_volume(self, file_path, volume):
+        for voice in self.voices_for(file_path):
+            self.set_volume(voice.id, volume)
+
+    def enqueue(self, file_path, **options):
+        """Append a cue to play_queue; it starts when the previous queued cue ends."""
+        with self._lock:
+            self.play_queue.append((file_path, options))
+            lane = self._queue_voice()
+            if lane is None:
+                self._start_queued()
+            else:
+                self._arm_next(lane)
+                self.events.publish("queue", file_path=file_path)
+
+    def _queue_voice(self):
+        for voice in self.voices.values():
+            if voice.queued and voice.is_active():
+                return voice
+        return None
+
+    def _arm_next(self, voice):
+        # Channel.queue deja el siguiente cue listo para empezar sin hueco
+        while self.play_queue and voice.channel.get_queue() is None:
+            next_path, _ = self.play_queue[0]
+            if isinstance(voice.channel, MixerChannel) or self.is_streamed(next_path):
+                return  # El mezclador no tiene cola: update() lo arranca al terminar la voz
+            try:
+                sound = self.cue_cache.get(next_path)
+            except Exception as e:
+                self.play_queue.popleft()
+                self._queue_failed(next_path, e)
+                continue
+            voice.channel.queue(sound)
+            voice.armed = True
+            return
+
+    def _start_queued(self):
+        """Start the first play_queue cue that loads; the ones that fail leave the queue with an "error" event."""
+        while self.play_queue and self._queue_voice() is None:
+            next_path, options = self.play_queue.popleft()
+            try:
+                self.play(next_path, queued=True, **options)
+            except Exception as e:
+                self._queue_failed(next_path, e)
+
+    def _queue_failed(self, file_path, error):
+        # Un archivo borrado o ilegible no puede parar la cola ni el hilo que la hace avanzar
+        print(f"No se pudo reproducir el cue en cola {file_path}: {error}")
+        self.errors.append(str(error))
+        telemetry.event("error", origen="cola", file_path=file_path, message=str(error))
+        self.events.publish("error", command="enqueue", file_path=file_path, message=str(error))
+
+    def update(self):
+        """Reap finished voices and advance play_queue; return the ended voices."""
+        ended = []
+        try:
+            with self._lock:
+                for voice in list(self.voices.values()):
+                    if voice.is_active() and voice.armed and voice.channel.get_queue() is None \
+                            and voice.channel.get_busy():
+                        # El canal ya pasó al cue encolado
+                        voice.state = "stopped"
+                        next_path, options = self.play_queue.popleft()
+                        successor = Voice(next(self._ids), next_path, voice.channel.get_sound(), voice.channel,
+                                          options.get("volume", 1.0), options.get("fade_out_ms", 0), queued=True)
+                        voice.channel.set_volume(successor.volume)
+                        self.voices[successor.id] = successor
+                        self._arm_next(successor)
+                        self.events.publish("play", voice=successor, voice_id=successor.id,
+                                            file_path=successor.file_path)
+                    elif voice.is_active() and not voice.channel.get_busy():
+                        voice.completed = voice.state == "playing"  # Un fundido de salida lo pidió alguien
+                        voice.state = "stopped"
+                    if not voice.is_active():
+                        ended.append(voice)
+                        del self.voices[voice.id]
+                self._start_queued()
+        finally:
+            # Las voces ya quitadas avisan de su final aunque algo haya fallado después
+            for voice in ended:
+                self.events.publish("end", voice=voice, voice_id=voice.id, file_path=voice.file_path,
+                                    completed=voice.completed)
+        return ended
+
+    def voices_for(self, file_path):
+        with self._lock:
+            return [v for v in self.voices.values() if v.file_path == file_path and v.is_active()]
+
+    def is_busy(self):
+        with self._lock:
+            return any(v.is_active() for v in self.voices.values()) or bool(self.play_queue) \
+                or self._pending > 0
+
+    def snapshot(self):
+        """Per-voice state for the UI."""
+        with self._lock:
+            return [v.snapshot() for v in self.voices.values() if v.is_active()]
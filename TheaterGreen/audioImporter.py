@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+from audioMetadata import file_hash, read_blocks
+
+CANONICAL_SUBTYPE = "PCM_16"
+COPY_CHUNK_BYTES = 1024 * 1024
+BLOCK_FRAMES = 1 << 16
+PROGRESS_INTERVAL = 0.1  # Segundos mínimos entre avisos de progreso
+
+
+def needs_transcode(file_path, sample_rate):
+    """True unless the file is already a 16-bit WAV at sample_rate."""
+    info = sf.info(file_path)
+    return not (info.format == "WAV" and info.samplerate == sample_rate and info.subtype == CANONICAL_SUBTYPE)
+
+
+class Resampler:
+    """Remuestreo por bloques con sinc enventanada (Kaiser), vectorizado en numpy."""
+
+    def __init__(self, in_rate, out_rate, channels, half_taps=16, beta=8.0, max_outputs=8192):
+        self.step = in_rate / out_rate
+        self.cutoff = min(1.0, out_rate / in_rate)  # Antialias al bajar la frecuencia
+        self.half_taps = half_taps
+        self.beta = beta
+        self.max_outputs = max_outputs  # Limita la matriz (salidas x taps x canales) en memoria
+        self.taps = np.arange(-half_taps + 1, half_taps + 1)
+        self.buffer = np.zeros((half_taps, channels), dtype=np.float32)
+        self.offset = -half_taps  # Índice absoluto de entrada de buffer[0]
+        self.next_out = 0
+        self.frames_in = 0
+        # Con frecuencias enteras las fases fraccionarias se repiten: se precalcula un núcleo por fase
+        divisor = np.gcd(int(in_rate), int(out_rate))
+        self.up, self.down = int(out_rate) // divisor, int(in_rate) // divisor
+        self.table = None
+        if self.up <= 4096 and in_rate == int(in_rate) and out_rate == int(out_rate):
+            phases = np.arange(self.up) / self.up
+            self.table = self._kernel(phases[:, None] - self.taps[None, :])
+
+    def _kernel(self, distance):
+        window = np.i0(self.beta * np.sqrt(np.clip(1 - (distance / self.half_taps) ** 2, 0, 1))) / np.i0(self.beta)
+        return (self.cutoff * np.sinc(self.cutoff * distance) * window).astype(np.float32)
+
+    def _render(self, end):
+        outputs = []
+        for start in range(self.next_out, end, self.max_outputs):
+            ks = np.arange(start, min(start + self.max_outputs, end))
+            if self.table is not None:
+                base, phase = np.divmod(ks * self.down, self.up)
+                kernel = self.table[phase]
+            else:
+                positions = ks * self.step
+                base = np.floor(positions).astype(np.int64)
+                kernel = self._kernel((positions - base)[:, None] - self.taps[None, :])
+            window = self.buffer[base[:, None] + self.taps[None, :] - self.offset]
+            outputs.append(np.einsum("kt,ktc->kc", kernel, window))
+        self.next_out = max(self.next_out, end)
+        # Descarta la entrada que ya no necesita ninguna salida futura
+        keep_from = int(np.floor(self.next_out * self.step)) - self.half_taps + 1 - self.offset
+        if keep_from > 0:
+            self.buffer = self.buffer[keep_from:]
+            self.offset += keep_from
+        if not outputs:
+            return np.zeros((0, self.buffer.shape[1]), dtype=np.float32)
+        return np.concatenate(outputs)
+
+    def process(self, block):
+        self.frames_in += len(block)
+        self.buffer = np.concatenate([self.buffer, block.astype(np.float32, copy=False)])
+        last_input = self.offset + len(self.buffer) - self.half_taps - 1
+        return self._render(int(np.floor(last_input / self.step)) + 1 if last_input >= 0 else 0)
+
+    def flush(self):
+        """Remaining output, padding the tail with silence."""
+        self.buffer = np.concatenate([self.buffer, np.zeros((self.half_taps, self.buffer.shape[1]), np.float32)])
+        return self._render(int(np.ceil(self.frames_in / self.step)))
+
+
+class AudioImporter:
+    """Importa audios a la carpeta de datos en un hilo: copia por bloques o conversión a WAV canónico."""
+
+    def __init__(self, data_dir, on_progress=None, on_imported=None, on_finished=None):
+        self.data_dir = data_dir
+        # Callbacks desde el hilo de importación
+        self.on_progress = on_progress  # on_progress(fracción 0-1 del lote, nombre)
+        self.on_imported = on_imported  # on_imported(job, ruta temporal, hash del contenido)
+        self.on_finished = on_finished  # on_finished(importados, [(nombre, error), ...])
+        self._thread = None
+        self._last_progress = 0.0
+
+    @property
+    def busy(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, jobs, sample_rate=None):
+        """Import jobs ({"source", "name", ...}) in order; extra keys are handed back in on_imported.
+
+        With sample_rate (the mixer's) files are converted to 16-bit WAV at that rate, else copied as they are.
+        """
+        if self.busy:
+            raise RuntimeError("Ya hay una importación en curso")
+        self._thread = threading.Thread(target=self._run, args=(list(jobs), sample_rate), daemon=True)
+        self._thread.start()
+
+    def _run(self, jobs, sample_rate):
+        os.makedirs(self.data_dir, exist_ok=True)
+        imported = 0
+        errors = []
+        for index, job in enumerate(jobs):
+            def progress(fraction, index=index, name=job["name"]):
+                self._report((index + min(fraction, 1.0)) / len(jobs), name)
+
+            source = job["source"]
+            convert = False
+            try:
+                convert = sample_rate is not None and needs_transcode(source, sample_rate)
+            except Exception:
+                pass  # libsndfile no lo abre: se copia tal cual y pygame lo intentará al reproducirlo
+            extension = ".wav" if convert else os.path.splitext(source)[1]
+            temp_path = os.path.join(self.data_dir, f".importando-{time.time_ns()}{extension}")
+            try:
+                if convert:
+                    self.transcode_file(source, temp_path, sample_rate, progress)
+                else:
+                    self.copy_file(source, temp_path, progress)
+                digest = file_hash(temp_path)
+            except Exception as e:
+                errors.append((job["name"], str(e)))
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                continue
+            imported += 1
+            if self.on_imported:
+                self.on_imported(job, temp_path, digest)
+        self._report(1.0, "", force=True)
+        if self.on_finished:
+            self.on_finished(imported, errors)
+
+    def _report(self, fraction, name, force=False):
+        now = time.perf_counter()
+        if self.on_progress and (force or now - self._last_progress >= PROGRESS_INTERVAL):
+            self._last_progress = now
+            self.on_progress(fraction, name)
+
+    @staticmethod
+    def copy_file(source, destination, progress=None):
+        """Copy in fixed-size chunks; memory use does not depend on the file size."""
+        total = max(os.path.getsize(source), 1)
+        copied = 0
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            for chunk in iter(lambda: src.read(COPY_CHUNK_BYTES), b""):
+                dst.write(chunk)
+                copied += len(chunk)
+                if progress:
+                    progress(copied / total)
+
+    @staticmethod
+    def transcode_file(source, destination, sample_rate, progress=None):
+        """Decode block by block into a 16-bit WAV at sample_rate, resampling when needed."""
+        info = sf.info(source)
+        total = max(info.frames, 1)
+        resampler = None
+        if info.samplerate != sample_rate:
+            resampler = Resampler(info.samplerate, sample_rate, info.channels)
+        read = 0
+        with sf.SoundFile(destination, "w", samplerate=sample_rate, channels=info.channels,
+                          format="WAV", subtype=CANONICAL_SUBTYPE) as out:
+            for block in read_blocks(source, BLOCK_FRAMES):
+                read += len(block)
+                if resampler is not None:
+                    block = resampler.process(block)
+                # libsndfile no satura al pasar de float a enteros
+                out.write(np.clip(block, -1.0, 1.0, out=block))
+                if progress:
+                    progress(read / total)
+            if resampler is not None:
+                tail = resampler.flush()
+                out.write(np.clip(tail, -1.0, 1.0, out=tail))
@@ -0,0 +1,162 @@
+import json
+import os
+import sqlite3
+import threading
+
+# Claves con columna propia; el resto de campos de un audio va a "extra" como JSON
+COLUMNS = ("name", "file_path", "description")
+
+
+def parse_tags(text):
+    """Tags typed as "a, b, c": trimmed, empty ones dropped, duplicates removed in order."""
+    tags = []
+    for tag in text.split(","):
+        tag = tag.strip()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL COLLATE NOCASE,
+    file_path TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS audio_tags (
+    audio_id INTEGER NOT NULL REFERENCES audios(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (audio_id, tag)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_audios_name ON audios(name);
+CREATE INDEX IF NOT EXISTS idx_audios_file_path ON audios(file_path);
+CREATE INDEX IF NOT EXISTS idx_audio_tags_tag ON audio_tags(tag);
+"""
+
+
+class AudioLibrary:
+    """Biblioteca de audios en SQLite (WAL) con altas, cambios y bajas incrementales."""
+
+    def __init__(self, db_path, legacy_json_path=None):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+        if legacy_json_path:
+            self.migrate_json(legacy_json_path)
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def migrate_json(self, json_path):
+        """Import the old audios.json once; the JSON file is left untouched."""
+        if self.get_meta("json_migrated") or not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                audios = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Error al migrar audios desde JSON: {e}")
+            return 0
+        with self._lock, self.conn:
+            for audio in audios:
+                self._insert(audio)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', '1')")
+        return len(audios)
+
+    @staticmethod
+    def _split(audio):
+        extra = {k: v for k, v in audio.items() if k not in COLUMNS and k not in ("id", "tags")}
+        return (audio["name"], audio["file_path"], audio.get("description", ""),
+                json.dumps(extra, ensure_ascii=False))
+
+    def _insert(self, audio):
+        cursor = self.conn.execute(
+            "INSERT INTO audios (name, file_path, description, extra) VALUES (?, ?, ?, ?)",
+            self._split(audio))
+        audio["id"] = cursor.lastrowid
+        self._write_tags(audio)
+        return audio
+
+    def _write_tags(self, audio):
+        self.conn.execute("DELETE FROM audio_tags WHERE audio_id = ?", (audio["id"],))
+        self.conn.executemany("INSERT OR IGNORE INTO audio_tags (audio_id, tag) VALUES (?, ?)",
+                              [(audio["id"], tag) for tag in audio.get("tags", [])])
+
+    def all(self):
+        """Every audio as a dict, in insertion order. File existence is not checked here."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, name, file_path, description, extra FROM audios ORDER BY id").fetchall()
+            tag_rows = self.conn.execute("SELECT audio_id, tag FROM audio_tags").fetchall()
+        tags = {}
+        for audio_id, tag in tag_rows:
+            tags.setdefault(audio_id, []).append(tag)
+        return [self._row_to_audio(row, tags.get(row[0], [])) for row in rows]
+
+    @staticmethod
+    def _row_to_audio(row, tags):
+        audio_id, name, file_path, description, extra = row
+        audio = json.loads(extra) if extra != "{}" else {}
+        audio.update(id=audio_id, name=name, file_path=file_path, description=description, tags=tags)
+        return audio
+
+    def add(self, audio):
+        """Insert an audio and set its "id"."""
+        with self._lock, self.conn:
+            return self._insert(audio)
+
+    def update(self, audio):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE audios SET name = ?, file_path = ?, description = ?, extra = ? WHERE id = ?",
+                self._split(audio) + (audio["id"],))
+            self._write_tags(audio)
+
+    def delete(self, audio_id):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM audios WHERE id = ?", (audio_id,))
+
+    def save_all(self, audios):
+        """Upsert a whole list in one transaction."""
+        with self._lock, self.conn:
+            for audio in audios:
+                if "id" in audio:
+                    self.conn.execute(
+                        "UPDATE audios SET name = ?, file_path = ?, description = ?, extra = ? WHERE id = ?",
+                        self._split(audio) + (audio["id"],))
+                    self._write_tags(audio)
+                else:
+                    self._insert(audio)
+
+    def find_by_name(self, prefix):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id FROM audios WHERE name LIKE ? ESCAPE '\\' ORDER BY name",
+                (prefix.replace("%", "\\%").replace("_", "\\_") + "%",)).fetchall()
+        return [row[0] for row in rows]
+
+    def find_by_tag(self, tag):
+        with self._lock:
+            rows = self.conn.execute("SELECT audio_id FROM audio_tags WHERE tag = ?", (tag,)).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,253 @@
+import hashlib
+import json
+import mmap
+import os
+import queue
+import threading
+
+import numpy as np
+import soundfile as sf
+
+PEAK_BUCKETS = 256  # Resolución de la miniatura de forma de onda
+HASH_CHUNK = 1024 * 1024
+
+
+def file_hash(file_path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SequentialReader(sf.SoundFile):
+    """SoundFile that only reads forward.
+
+    soundfile asks libsndfile for the position (sf_seek) around every read; on MPEG that
+    re-syncs mpg123 and the first samples of the next block come out corrupted.
+    """
+
+    def seekable(self):
+        return False
+
+
+def read_blocks(file_path, blocksize, overlap=0):
+    """Same blocks as sf.blocks(dtype="float32", always_2d=True), read with SequentialReader."""
+    with SequentialReader(file_path) as f:
+        tail = np.zeros((0, f.channels), dtype=np.float32)
+        while True:
+            block = f.read(blocksize - len(tail), dtype="float32", always_2d=True)
+            if not len(block):
+                return
+            if len(tail):
+                block = np.concatenate([tail, block])
+            yield block
+            if overlap:
+                tail = block[-overlap:]
+
+
+def analyze_audio(file_path, buckets=PEAK_BUCKETS):
+    """Duration, layout, peak/RMS and a min/max peak array, reading the file block by block."""
+    info = sf.info(file_path)
+    frames = max(info.frames, 1)
+    bucket_frames = max(1, -(-frames // buckets))
+    mins = np.zeros(buckets, dtype=np.float32)
+    maxs = np.zeros(buckets, dtype=np.float32)
+    peak = 0.0
+    sum_squares = 0.0
+    bucket = 0
+    # Bloques múltiplos del tamaño de cubeta: cada bloque se reduce con un solo reshape
+    for block in read_blocks(file_path, bucket_frames * 64):
+        mono = block.mean(axis=1)
+        peak = max(peak, float(np.abs(block).max(initial=0.0)))
+        sum_squares += float(np.square(block, dtype=np.float64).sum())
+        count = -(-len(mono) // bucket_frames)
+        padded = np.zeros(count * bucket_frames, dtype=np.float32)
+        padded[:len(mono)] = mono
+        shaped = padded.reshape(count, bucket_frames)
+        end = min(bucket + count, buckets)
+        mins[bucket:end] = shaped.min(axis=1)[:end - bucket]
+        maxs[bucket:end] = shaped.max(axis=1)[:end - bucket]
+        bucket = end
+    rms = float(np.sqrt(sum_squares / (frames * info.channels))) if info.frames else 0.0
+    return {
+        "duration": info.duration,
+        "samplerate": info.samplerate,
+        "channels": info.channels,
+        "frames": info.frames,
+        "format": info.format,
+        "subtype": info.subtype,
+        "peak": peak,
+        "rms": rms,
+        "peak_dbfs": float(20 * np.log10(peak)) if peak > 0 else float("-inf"),
+        "rms_dbfs": float(20 * np.log10(rms)) if rms > 0 else float("-inf"),
+    }, np.stack([mins, maxs])
+
+
+# Capa III: kbps por índice, para MPEG-1 y para MPEG-2/2.5
+MP3_BITRATES = {
+    3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0),
+}
+MP3_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+MP3_DECODER_DELAY = 529  # Retardo de mpg123 que la decodificación sin huecos también descuenta
+
+
+def mp3_seek_index(file_path):
+    """Byte offset of every audio frame of an MP3 (Layer III), plus what is needed to map samples to frames.
+
+    Returns {"seek_index", "mp3_samples_per_frame", "mp3_skip"} or None when no frames are found.
+    """
+    offsets = []
+    samples_per_frame = None
+    skip = 0
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < 4:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            position = 0
+            if data[:3] == b"ID3":
+                tag_size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+                position = 10 + tag_size + (10 if data[5] & 0x10 else 0)
+            while position + 4 <= size:
+                header = int.from_bytes(data[position:position + 4], "big")
+                version = (header >> 19) & 3
+                bitrate = (header >> 12) & 15
+                rate = (header >> 10) & 3
+                if (header >> 21) != 0x7FF or ((header >> 17) & 3) != 1 or version == 1 \
+                        or bitrate in (0, 15) or rate == 3:
+                    position += 1  # No es una cabecera de capa III: se busca la siguiente sincronía
+                    continue
+                length = (144 if version == 3 else 72) * MP3_BITRATES[3 if version == 3 else 2][bitrate] * 1000 \
+                    // MP3_RATES[version][rate] + ((header >> 9) & 1)
+                if samples_per_frame is None:
+                    samples_per_frame = 1152 if version == 3 else 576
+                    frame = data[position:position + length]
+                    if b"Xing" in frame or b"Info" in frame:
+                        # Frame de información, no de audio; la etiqueta LAME trae el retardo del codificador
+                        lame = frame.find(b"LAME")
+                        if lame >= 0 and lame + 24 <= len(frame):
+                            delay = frame[lame + 21:lame + 24]
+                            skip = ((delay[0] << 4) | (delay[1] >> 4)) + MP3_DECODER_DELAY
+                        position += length
+                        continue
+                offsets.append(position)
+                position += length
+    if not offsets:
+        return None
+    return {"seek_index": np.array(offsets, dtype=np.int64), "mp3_samples_per_frame": samples_per_frame,
+            "mp3_skip": skip}
+
+
+class MetadataCache:
+    """Metadatos y picos precalculados en archivos auxiliares, indexados por hash + mtime."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.index = {}  # file_path -> {"mtime_ns", "size", "hash"}
+        self.entries = {}  # file_path -> metadatos con "peaks" ya cargados
+        self.on_ready = None  # Callback (hilo de fondo) cuando un archivo termina de analizarse
+        self._lock = threading.Lock()
+        self._jobs = queue.Queue()
+        self._worker = None
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.index = {}
+
+    def peek(self, file_path):
+        """Metadata already in memory, or None; never touches the audio file."""
+        with self._lock:
+            return self.entries.get(file_path)
+
+    def get(self, file_path):
+        """Metadata for a file, from the sidecar when still valid, analyzing it otherwise."""
+        stat = os.stat(file_path)
+        with self._lock:
+            record = self.index.get(file_path)
+        if record and record["mtime_ns"] == stat.st_mtime_ns and record["size"] == stat.st_size:
+            digest = record["hash"]
+        else:
+            digest = file_hash(file_path)  # Un cambio de mtime con el mismo contenido reutiliza el auxiliar
+        meta = self._load_sidecar(digest)
+        is_mp3 = file_path.lower().endswith(".mp3")
+        if meta is None or (is_mp3 and "seek_index" not in meta):
+            if meta is None:
+                meta, peaks = analyze_audio(file_path)
+            else:
+                peaks = meta.pop("peaks")  # Auxiliar anterior al índice de saltos
+            arrays = {"peaks": peaks}
+            if is_mp3:
+                # Un índice vacío también se guarda para no volver a recorrer el archivo
+                index = mp3_seek_index(file_path) or {"seek_index": np.zeros(0, dtype=np.int64)}
+                arrays["seek_index"] = index.pop("seek_index")
+                meta.update(index)
+            np.savez(self._sidecar_path(digest), meta=json.dumps(meta), **arrays)
+            meta.update(arrays)
+        meta["hash"] = digest
+        with self._lock:
+            self.index[file_path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "hash": digest}
+            self.entries[file_path] = meta
+        return meta
+
+    def _sidecar_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.npz")
+
+    def _load_sidecar(self, digest):
+        try:
+            with np.load(self._sidecar_path(digest)) as data:
+                meta = json.loads(str(data["meta"]))
+                meta["peaks"] = data["peaks"]
+                if "seek_index" in data.files:
+                    meta["seek_index"] = data["seek_index"]
+            return meta
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def invalidate(self, file_path):
+        with self._lock:
+            self.index.pop(file_path, None)
+            self.entries.pop(file_path, None)
+
+    def save_index(self):
+        with self._lock:
+            data = json.dumps(self.index)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.index_path)
+
+    def ingest(self, file_paths):
+        """Analyze files in the background (backfill or new imports); on_ready fires per file."""
+        with self._lock:
+            for file_path in file_paths:
+                self._jobs.put(file_path)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            try:
+                file_path = self._jobs.get(timeout=1.0)
+            except queue.Empty:
+                with self._lock:
+                    if self._jobs.empty():
+                        self._worker = None
+                        return
+                continue
+            try:
+                self.get(file_path)
+            except FileNotFoundError:
+                continue  # El escáner ya marca los cues sin archivo
+            except Exception as e:
+                print(f"Error al analizar '{os.path.basename(file_path)}': {e}")
+                continue
+            if self.on_ready:
+                self.on_ready(file_path)
+            if self._jobs.empty():
+                self.save_index()
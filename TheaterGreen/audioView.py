@@ -1,9 +1,19 @@
 import customtkinter as ctk
-import pygame
+import numpy as np
 import os
 import sys
+import threading
 import time
+import tkinter as tk
 from tkinter import messagebox
+from audioLibrary import parse_tags
+from cueGrid import CueGrid
+from cueSearch import SearchIndex
+from meterBar import MeterBar
+from libraryScanner import normalize_path
+from telemetry import telemetry
+
+WAVEFORM_HEIGHT = 22
 
 def resource_path(relative_path):
     """Obtiene la ruta absoluta para recursos empaquetados."""
@@ -21,24 +31,46 @@ def get_data_path(subpath=""):
         base_path = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base_path, subpath)
 
+def waveform_polygon(peaks, width, height):
+    """Polygon coordinates for a min/max peak envelope squeezed into width pixels"""
+    mins, maxs = peaks
+    points = max(2, min(len(maxs), width // 2))
+    usable = len(maxs) - len(maxs) % points
+    maxs = maxs[:usable].reshape(points, -1).max(axis=1)
+    mins = mins[:usable].reshape(points, -1).min(axis=1)
+    xs = np.linspace(0, width, points)
+    middle = height / 2
+    top = np.column_stack([xs, middle - np.clip(maxs, 0, 1) * middle])
+    bottom = np.column_stack([xs[::-1], middle - np.clip(mins[::-1], -1, 0) * middle])
+    return np.concatenate([top, bottom]).ravel().tolist()
+
 class AudioView(ctk.CTkFrame):
     def __init__(self, master, app, **kwargs):
         super().__init__(master, **kwargs)
         self.configure(fg_color="transparent")
         self.app = app
-        self.currently_playing = None
-        self.play_queue = []
-        self.is_paused = False
-        self.paused_position = 0
+        self.engine = app.audio_engine
         self.after_id = None
-        self.last_played_frame = None
+        self.refresh_pending = False  # Ya hay un redibujado pendiente para los eventos del motor
+        self.last_cue = None
+        self.voice_states = {}  # file_path -> snapshots de sus voces activas
+        self.queued_paths = set()
+        self.missing_paths = set()  # Cues cuyo archivo ya no está en disco
+        self.waveform_coords = {}  # (file_path, hash, ancho) -> coordenadas del polígono
+        self.cue_list_panel = None  # Se construye la primera vez que se abre el modo lista
+        self.cue_list_visible = False
+        self.cue_rows = []
+        self.search_index = None  # Se construye en segundo plano; después se mantiene cue a cue
+        self.search_pending = []  # Cues añadidos o renombrados mientras se construía el índice
+        self.search_query = ""
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
 
-        self.console_panel = ctk.CTkScrollableFrame(self, corner_radius=10)
+        self.console_panel = ctk.CTkFrame(self, corner_radius=10)
         self.console_panel.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
         self.console_panel.grid_columnconfigure(0, weight=1)
+        self.console_panel.grid_rowconfigure(1, weight=1)
 
         # Header frame with title and refresh button
         self.header_frame = ctk.CTkFrame(self.console_panel, fg_color="transparent")
@@ -53,215 +85,652 @@ class AudioView(ctk.CTkFrame):
                                           command=self.refresh_audios)
         self.refresh_button.grid(row=0, column=1, padx=(10, 0))
 
-        self.audio_buttons_container = ctk.CTkFrame(self.console_panel, fg_color="transparent")
-        self.audio_buttons_container.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
-        for i in range(4):
-            self.audio_buttons_container.grid_columnconfigure(i, weight=1)
+        self.stop_all_button = ctk.CTkButton(self.header_frame, text="⏹", width=30, height=30,
+                                           command=self.stop_current_audio, fg_color="#C0392B")
+        self.stop_all_button.grid(row=0, column=2, padx=(10, 0))
+
+        self.cue_list_button = ctk.CTkButton(self.header_frame, text="☰ Lista", width=70, height=30,
+                                           command=self.toggle_cue_list)
+        self.cue_list_button.grid(row=0, column=3, padx=(10, 0))
+
+        self.latency_label = ctk.CTkLabel(self.header_frame, text="", text_color="gray",
+                                        font=ctk.CTkFont(size=12))
+        self.latency_label.grid(row=1, column=0, columnspan=4, sticky="w")
+
+        # Nivel de salida (pico, RMS y pico retenido por canal), al ritmo de los eventos "meter" del motor
+        self.output_meter = MeterBar(self.header_frame, channels=self.engine.pygame_meter.channels)
+        self.output_meter.grid(row=2, column=0, columnspan=4, sticky="ew", pady=(4, 0))
+
+        # Filtra la rejilla con cada tecla: nombre, descripción y etiquetas, por prefijo y con una letra de error
+        self.search_entry = ctk.CTkEntry(self.header_frame, placeholder_text="Buscar por nombre, descripción o "
+                                                                            "etiqueta...")
+        self.search_entry.grid(row=3, column=0, columnspan=4, sticky="ew", pady=(6, 0))
+        self.search_entry.bind("<KeyRelease>", self.on_search)
+        self.search_entry.bind("<Escape>", self.clear_search)
+
+        # Only the rows in view get widgets; they are recycled while scrolling
+        self.cue_grid = CueGrid(self.console_panel, create_cell=self.create_cue_cell,
+                                bind_cell=self.bind_cue_cell, columns=4, row_height=180,
+                                fg_color="transparent")
+        self.cue_grid.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
 
         self.load_existing_audios()
+        audios = list(app.audios)
+        threading.Thread(target=lambda: app.post_to_ui(self.search_index_ready, SearchIndex(audios)),
+                         daemon=True).start()
+
+    def search_index_ready(self, index):
+        index.sync(self.app.audios)  # Altas y bajas mientras se construía
+        for audio in self.search_pending:
+            index.update(audio)
+        self.search_pending = []
+        self.search_index = index
+        if self.search_query:
+            self.apply_search()
 
     def refresh_audios(self):
-        """Reload all audios from disk and update UI"""
+        """Ask the background scanner for a rescan and redraw the grid"""
         self.stop_current_audio()
+        scanner = getattr(self.app, "library_scanner", None)
+        if scanner is not None:
+            scanner.request_rescan()
         self.load_existing_audios()
+
+    def on_library_changed(self, changes):
+        """Apply a batch of data-folder changes from the scanner"""
+        known = {}
+        for audio in self.app.audios:
+            known.setdefault(normalize_path(audio["file_path"]), []).append(audio)
+        cache = self.app.cue_cache
+
+        for path in changes["removed"]:
+            for audio in known.get(path, []):
+                self.missing_paths.add(audio["file_path"])
+                cache.evict(audio["file_path"])
+        for path in changes["modified"]:
+            for audio in known.get(path, []):
+                cache.evict(audio["file_path"])
+                self.app.metadata.invalidate(audio["file_path"])
+                self.app.metadata.ingest([audio["file_path"]])
+            self.app.analyze_loudness(known.get(path, []))  # Vuelve a precargar con la nueva ganancia
+        for path in changes["added"] + changes["modified"]:
+            if path in known:
+                for audio in known[path]:
+                    self.missing_paths.discard(audio["file_path"])
+            elif self.app.blob_store.contains(path):
+                continue  # Blob sin entradas (p. ej. pendiente de borrar): no es un cue nuevo
+            elif path in changes["probes"] and "error" not in changes["probes"][path]:
+                # A file dropped into the data folder becomes a new cue, moved into the blob store
+                name = os.path.splitext(os.path.basename(path))[0]
+                self.app.ingest_file(path, {"name": name, "file_path": path, "description": ""})
+        if changes.get("initial"):
+            data_dir = normalize_path(get_data_path("data"))
+            for path, audios in known.items():
+                if path.startswith(data_dir) and path not in changes["files"]:
+                    self.missing_paths.update(audio["file_path"] for audio in audios)
+        self.refresh_voice_states()
     
+    @telemetry.timed("ui.stop_current_audio")
     def stop_current_audio(self):
-        """Stop any currently playing audio and clean up resources"""
-        if self.currently_playing:
-            try:
-                pygame.mixer.music.stop()
-                pygame.mixer.music.unload()
-                time.sleep(0.5)  # Increased delay for resource release
-                pygame.mixer.quit()
-                pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=4096)
-            except Exception as e:
-                print(f"Error al detener audio: {e}")
-            finally:
-                self.currently_playing = None
-                self.is_paused = False
-                self.paused_position = 0
-                if self.after_id:
-                    self.after_cancel(self.after_id)
-                    self.after_id = None
-                if self.last_played_frame:
-                    self.last_played_frame.pause_button.configure(
-                        text="⏸️", 
-                        command=lambda p=self.last_played_frame: self.pause_audio(p)
-                    )
-    
-    def add_audio_button(self, name, file_path):
-        row_count = len(self.audio_buttons_container.grid_slaves()) // 4
-        col_count = len(self.audio_buttons_container.grid_slaves()) % 4
+        """Stop every playing voice (with each cue's fade-out) and clear the queue"""
+        cue_list = getattr(self.app, "cue_list", None)
+        if cue_list is not None:
+            cue_list.cancel_pending()
+        self.engine.submit(self.engine.stop_all)
 
-        audio_frame = ctk.CTkFrame(self.audio_buttons_container, width=150, height=120,
-                                 corner_radius=8, fg_color="#393E46")
-        audio_frame.grid(row=row_count, column=col_count, padx=8, pady=8, sticky="nsew")
+    def create_cue_cell(self, parent):
+        """Build one reusable cue card; bind_cue_cell fills it with an audio"""
+        audio_frame = ctk.CTkFrame(parent, corner_radius=8, fg_color="#393E46")
         audio_frame.grid_propagate(False)
-        audio_frame.file_path = file_path
+        audio_frame.audio = None
+        audio_frame.file_path = None
+        audio_frame.state_key = None
 
         audio_frame.grid_rowconfigure(0, weight=0)
-        audio_frame.grid_rowconfigure(1, weight=1)
-        audio_frame.grid_rowconfigure(2, weight=0)
+        audio_frame.grid_rowconfigure(1, weight=0)
+        audio_frame.grid_rowconfigure(2, weight=1)
+        audio_frame.grid_rowconfigure(3, weight=0)
+        audio_frame.grid_rowconfigure(4, weight=0)
         audio_frame.grid_columnconfigure(0, weight=1)
         audio_frame.grid_columnconfigure(1, weight=0)
 
-        name_label = ctk.CTkLabel(audio_frame, text=name, font=ctk.CTkFont(size=12, weight="bold"),
+        name_label = ctk.CTkLabel(audio_frame, text="", font=ctk.CTkFont(size=12, weight="bold"),
                                 wraplength=110)
         name_label.grid(row=0, column=0, padx=5, pady=(5, 0), sticky="n")
 
+        # Waveform thumbnail drawn from precomputed peaks; the items are reused on every bind
+        waveform = ctk.CTkCanvas(audio_frame, height=WAVEFORM_HEIGHT, bg="#2B2F36", highlightthickness=0)
+        waveform.grid(row=1, column=0, columnspan=2, padx=5, sticky="ew")
+        audio_frame.wave_item = waveform.create_polygon(0, 0, 0, 0, fill="#5DADE2", outline="")
+        audio_frame.wave_text = waveform.create_text(4, 2, anchor="nw", text="", fill="#D0D3D4",
+                                                     font=("TkDefaultFont", 8))
+        # The waveform doubles as the scrub bar: click or drag to jump, the line marks the playhead
+        audio_frame.playhead_item = waveform.create_line(0, 0, 0, WAVEFORM_HEIGHT, fill="#F4D03F", state="hidden")
+        audio_frame.last_scrub = 0.0
+        waveform.bind("<Button-1>", lambda event, p=audio_frame: self.scrub_cue(p, event.x, force=True))
+        waveform.bind("<B1-Motion>", lambda event, p=audio_frame: self.scrub_cue(p, event.x))
+        waveform.bind("<ButtonRelease-1>", lambda event, p=audio_frame: self.scrub_cue(p, event.x, force=True))
+
         play_button = ctk.CTkButton(audio_frame, text="▶️",
                                   command=lambda p=audio_frame: self.enqueue_audio(p),
-                                  width=120, height=70, corner_radius=5, fg_color="#3498DB")
-        play_button.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
+                                  width=120, height=60, corner_radius=5, fg_color="#3498DB")
+        play_button.grid(row=2, column=0, padx=5, pady=5, sticky="nsew")
 
         pause_button = ctk.CTkButton(audio_frame, text="⏸️",
                                    command=lambda p=audio_frame: self.pause_audio(p),
                                    width=120, height=20, corner_radius=5, fg_color="#27AE46")
-        pause_button.grid(row=2, column=0, padx=5, pady=(0, 5), sticky="nsew")
+        pause_button.grid(row=3, column=0, padx=5, pady=(0, 5), sticky="nsew")
+
+        volume_slider = ctk.CTkSlider(audio_frame, from_=0, to=1, height=12,
+                                    command=lambda value, p=audio_frame: self.set_cue_volume(p, value))
+        volume_slider.grid(row=4, column=0, columnspan=2, padx=5, pady=(0, 5), sticky="ew")
+        volume_slider.bind("<ButtonRelease-1>", lambda event, p=audio_frame: self.save_cue_settings(p))
 
         config_button = ctk.CTkButton(audio_frame, text="⚙️",
                                     command=lambda p=audio_frame: self.show_context_menu(p),
                                     width=30, height=30, corner_radius=5)
         config_button.grid(row=0, column=1, padx=5, pady=5, sticky="ne")
 
+        audio_frame.name_label = name_label
+        audio_frame.waveform = waveform
         audio_frame.play_button = play_button
         audio_frame.pause_button = pause_button
+        audio_frame.volume_slider = volume_slider
+        return audio_frame
+
+    def bind_cue_cell(self, audio_frame, audio):
+        """Show an audio on a recycled cue card"""
+        audio_frame.audio = audio
+        audio_frame.file_path = audio["file_path"]
+        hotkey = audio.get("hotkey") or audio.get("midi_note")
+        audio_frame.name_label.configure(text=audio["name"] + (f"  [{hotkey}]" if hotkey is not None else ""))
+        audio_frame.volume_slider.set(audio.get("volume", 1.0))
+        audio_frame.state_key = None
+        self.apply_voice_state(audio_frame)
+        self.draw_waveform(audio_frame)
+        self.draw_playhead(audio_frame)
+
+    def draw_waveform(self, audio_frame):
+        """Draw the cue's peak envelope from the metadata cache; never decodes the file"""
+        canvas = audio_frame.waveform
+        meta = self.app.metadata.peek(audio_frame.file_path)
+        if meta is None:
+            canvas.coords(audio_frame.wave_item, 0, 0, 0, 0)
+            canvas.itemconfigure(audio_frame.wave_text, text="")
+            return
+        width = canvas.winfo_width() if canvas.winfo_width() > 10 else 130
+        key = (audio_frame.file_path, meta["hash"], width)
+        coords = self.waveform_coords.get(key)
+        if coords is None:
+            coords = waveform_polygon(meta["peaks"], width, WAVEFORM_HEIGHT)
+            self.waveform_coords[key] = coords
+        canvas.coords(audio_frame.wave_item, *coords)
+        minutes, seconds = divmod(int(round(meta["duration"])), 60)
+        canvas.itemconfigure(audio_frame.wave_text, text=f"{minutes}:{seconds:02d}")
+
+    def draw_playhead(self, audio_frame):
+        canvas = audio_frame.waveform
+        voices = self.voice_states.get(audio_frame.file_path, [])
+        if not voices or not voices[0]["length"]:
+            canvas.itemconfigure(audio_frame.playhead_item, state="hidden")
+            return
+        x = min(voices[0]["position"] / voices[0]["length"], 1.0) * canvas.winfo_width()
+        canvas.coords(audio_frame.playhead_item, x, 0, x, WAVEFORM_HEIGHT)
+        canvas.itemconfigure(audio_frame.playhead_item, state="normal")
+
+    def cue_length(self, audio_frame):
+        """Cue length in seconds from a live voice or the metadata cache, or None"""
+        voices = self.engine.voices_for(audio_frame.file_path)
+        if voices:
+            return voices[0].length
+        meta = self.app.metadata.peek(audio_frame.file_path)
+        return meta["duration"] if meta else None
+
+    def scrub_cue(self, audio_frame, x, force=False):
+        """Jump a cue to the clicked point of its waveform, starting it there if it is not playing"""
+        now = time.perf_counter()
+        if not force and now - audio_frame.last_scrub < 0.03:
+            return  # Al arrastrar basta un salto cada 30 ms
+        audio_frame.last_scrub = now
+        length = self.cue_length(audio_frame)
+        width = audio_frame.waveform.winfo_width()
+        if not length or width <= 1 or audio_frame.file_path in self.missing_paths:
+            return
+        seconds = max(0.0, min(x / width, 1.0)) * length
+        voices = self.engine.voices_for(audio_frame.file_path)
+        if voices:
+            for voice in voices:
+                self.engine.submit(self.engine.seek, voice.id, seconds, now)
+        elif force:
+            self.last_cue = audio_frame.file_path
+            self.engine.submit(self.start_cue, audio_frame.file_path, now,
+                               dict(self.cue_options(audio_frame.audio), start=seconds))
+
+    def on_metadata_ready(self, file_path):
+        for audio_frame in self.cue_grid.visible_cells():
+            if audio_frame.file_path == file_path:
+                self.draw_waveform(audio_frame)
+
+    def add_cue(self, audio):
+        if self.search_index is None:
+            self.search_pending.append(audio)
+        else:
+            self.search_index.add(audio)
+        if self.search_query:
+            self.apply_search()
+        else:
+            self.cue_grid.insert(audio)
+
+    def remove_cue(self, audio):
+        if self.search_index is not None:
+            self.search_index.remove(audio)
+        self.cue_grid.remove(audio)
+
+    def update_cue(self, audio):
+        if self.search_index is None:
+            self.search_pending.append(audio)
+        else:
+            self.search_index.update(audio)
+        if self.search_query:
+            self.apply_search()  # Renombrado: puede haber dejado de coincidir (o empezado a hacerlo)
+        self.cue_grid.update_item(audio)
+
+    def on_search(self, event=None):
+        query = self.search_entry.get()
+        if query.strip() != self.search_query:
+            self.search_query = query.strip()
+            self.cue_grid.scroll_px = 0
+            self.apply_search()
+
+    def clear_search(self, event=None):
+        self.search_entry.delete(0, "end")
+        self.on_search()
+
+    def apply_search(self):
+        if self.search_index is None:
+            return  # Todavía construyéndose: search_index_ready filtra con lo ya escrito
+        with telemetry.span("ui.busqueda", cues=len(self.app.audios)):
+            self.cue_grid.set_items(self.search_index.filter(self.search_query, self.app.audios), rebind=False)
+
+    def cue_options(self, audio):
+        """Per-cue playback options stored with the audio entry"""
+        return {
+            "volume": audio.get("volume", 1.0),
+            "fade_in_ms": audio.get("fade_in_ms", 0),
+            "fade_out_ms": audio.get("fade_out_ms", 0),
+        }
 
     def enqueue_audio(self, audio_frame):
-        """Add audio to queue and play if nothing is playing"""
+        """Play a cue on its own voice, layered over whatever is already playing"""
         file_path = audio_frame.file_path
         if not os.path.exists(file_path):
             messagebox.showerror("Error", f"El archivo {os.path.basename(file_path)} no existe.")
             return
 
-        if self.currently_playing == file_path and self.is_paused:
+        voices = self.engine.voices_for(file_path)
+        if voices and all(voice.state == "paused" for voice in voices):
             self.resume_audio(audio_frame)
             return
-        
-        if pygame.mixer.music.get_busy():
-            self.stop_current_audio()
-        
+
         self.play_audio_directly(audio_frame)
 
+    @telemetry.timed("ui.play_audio_directly")
     def play_audio_directly(self, audio_frame):
-        """Play audio immediately (bypassing queue)"""
+        """Play audio immediately (bypassing queue), restarting the cue if it is already playing"""
+        file_path = audio_frame.file_path
+        self.last_cue = file_path
+        self.engine.submit(self.start_cue, file_path, time.perf_counter(), self.cue_options(audio_frame.audio))
+        self.app.blob_store.verify_later([file_path])  # Integridad comprobada al primer uso, en segundo plano
+
+    @telemetry.timed("motor.start_cue")
+    def start_cue(self, file_path, started_at, options):
+        """Runs on the audio worker: restart the cue and record its latency"""
+        cache = self.app.cue_cache
+        hit = cache.contains(file_path)
+        self.engine.stop_cue(file_path, fade_out_ms=0)
+        self.engine.play(file_path, **options)
+        cache.record_latency(file_path, started_at, hit)
+
+    def queue_audio(self, audio_frame):
+        """Add a cue to the sequential play queue"""
         file_path = audio_frame.file_path
-        try:
-            self.stop_current_audio()
-            
-            pygame.mixer.music.load(file_path)
-            pygame.mixer.music.play()
-            self.currently_playing = file_path
-            self.last_played_frame = audio_frame
-            self.is_paused = False
-            self.paused_position = 0
-            
+        if not os.path.exists(file_path):
+            messagebox.showerror("Error", f"El archivo {os.path.basename(file_path)} no existe.")
+            return
+        self.engine.submit(self.engine.enqueue, file_path, **self.cue_options(audio_frame.audio))
+
+    def update_latency_label(self):
+        parts = []
+        latency = self.app.cue_cache.latencies.get(self.last_cue)
+        if latency is not None:
+            latency_ms, hit = latency
+            parts.append(f"Cambio de cue: {latency_ms:.1f} ms ({'caché' if hit else 'disco'})")
+        if self.engine.seek_latencies and self.engine.stream_mixer is not None:
+            mixer = self.engine.stream_mixer
+            buffer_ms = mixer.blocksize / mixer.sample_rate * 1000
+            parts.append(f"Salto: {self.engine.seek_latencies[-1]:.1f} ms (búfer {buffer_ms:.0f} ms)")
+        triggers = getattr(self.app, "triggers", None)
+        if triggers is not None and triggers.latencies:
+            source, trigger_ms = triggers.latencies[-1]
+            parts.append(f"Entrada {source}: {trigger_ms:.1f} ms")
+        if parts:
+            self.latency_label.configure(text="  ·  ".join(parts))
+
+    def set_cue_volume(self, audio_frame, volume):
+        audio_frame.audio["volume"] = round(volume, 3)
+        self.engine.submit(self.engine.set_cue_volume, audio_frame.file_path, volume)
+
+    def save_cue_settings(self, audio_frame):
+        self.app.update_audio(audio_frame.audio)
+
+    def refresh_voice_states(self):
+        """Reflect each voice's state on the visible cue cards"""
+        states = {}
+        for voice in self.engine.snapshot():
+            states.setdefault(voice["file_path"], []).append(voice)
+        self.voice_states = states
+        self.queued_paths = {file_path for file_path, _ in self.engine.play_queue}
+        for audio_frame in self.cue_grid.visible_cells():
+            self.apply_voice_state(audio_frame)
+            self.draw_playhead(audio_frame)
+
+    def apply_voice_state(self, audio_frame):
+        voices = self.voice_states.get(audio_frame.file_path, [])
+        if audio_frame.file_path in self.missing_paths:
+            state_key = "missing"
+        elif voices and all(v["state"] == "paused" for v in voices):
+            state_key = "paused"
+        elif voices:
+            state_key = "playing"
+        else:
+            state_key = "queued" if audio_frame.file_path in self.queued_paths else "idle"
+        if state_key == audio_frame.state_key:
+            return  # Evita redibujar tarjetas que no cambiaron
+        audio_frame.state_key = state_key
+
+        if state_key == "paused":
+            audio_frame.configure(fg_color="#7F6A00")
+            audio_frame.pause_button.configure(
+                text="▶️",
+                command=lambda p=audio_frame: self.resume_audio(p)
+            )
+        else:
+            audio_frame.configure(fg_color={"playing": "#1E6F3E", "queued": "#2C3E50",
+                                            "missing": "#5A5A5A"}.get(state_key, "#393E46"))
             audio_frame.pause_button.configure(
-                text="⏸️", 
+                text="⏸️",
                 command=lambda p=audio_frame: self.pause_audio(p)
             )
-            
-            self.monitor_playback()
-        except pygame.error as e:
-            messagebox.showerror("Error", f"No se pudo reproducir el audio: {e}")
-            self.currently_playing = None
+
+    def on_engine_event(self, kind, data):
+        """Engine events reach the UI here (through post_to_ui); a burst of them is drawn once"""
+        if kind == "meter":
+            self.output_meter.draw(data["levels"])
+            return
+        if kind == "error":
+            messagebox.showerror("Error", f"No se pudo reproducir el audio: {data['message']}")
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.after_idle(self.monitor_playback)
 
     def monitor_playback(self):
-        """Check playback status and update UI"""
-        if pygame.mixer.music.get_busy():
+        """Redraw cue states; while something plays the playheads keep moving every 100 ms"""
+        self.refresh_pending = False
+        if self.after_id:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+        self.refresh_voice_states()
+        self.update_latency_label()
+        if any(voice["state"] in ("playing", "fading") for voices in self.voice_states.values() for voice in voices):
             self.after_id = self.after(100, self.monitor_playback)
-        else:
-            if self.last_played_frame:
-                self.last_played_frame.pause_button.configure(
-                    text="⏸️", 
-                    command=lambda p=self.last_played_frame: self.pause_audio(p)
-                )
-            self.currently_playing = None
-            self.is_paused = False
-            self.paused_position = 0
 
     def pause_audio(self, audio_frame):
-        """Pause current audio"""
-        if self.currently_playing == audio_frame.file_path and pygame.mixer.music.get_busy():
-            self.paused_position = pygame.mixer.music.get_pos()
-            pygame.mixer.music.pause()
-            audio_frame.pause_button.configure(
-                text="▶️", 
-                command=lambda p=audio_frame: self.resume_audio(p)
-            )
-            self.is_paused = True
-            if self.after_id:
-                self.after_cancel(self.after_id)
+        """Pause every voice of a cue"""
+        voices = [v for v in self.engine.voices_for(audio_frame.file_path) if v.state == "playing"]
+        if voices:
+            for voice in voices:
+                self.engine.submit(self.engine.pause, voice.id)
         else:
             messagebox.showwarning("Advertencia", "El audio no está en reproducción.")
 
     def resume_audio(self, audio_frame):
-        """Resume paused audio"""
-        if self.currently_playing == audio_frame.file_path and self.is_paused:
-            pygame.mixer.music.unpause()
-            audio_frame.pause_button.configure(
-                text="⏸️", 
-                command=lambda p=audio_frame: self.pause_audio(p)
-            )
-            self.is_paused = False
-            self.monitor_playback()
+        """Resume the paused voices of a cue"""
+        voices = [v for v in self.engine.voices_for(audio_frame.file_path) if v.state == "paused"]
+        if voices:
+            for voice in voices:
+                self.engine.submit(self.engine.resume, voice.id)
         else:
             messagebox.showwarning("Advertencia", "El audio no está pausado o no puede reanudarse.")
 
     def show_context_menu(self, audio_frame):
         """Show context menu for audio options"""
-        menu = ctk.CTkOptionMenu(self, values=["Eliminar"],
-                               command=lambda option: self.delete_audio(audio_frame) if option == "Eliminar" else None)
+        actions = {
+            "Encolar": self.queue_audio,
+            "Añadir a la lista": self.add_to_cue_list,
+            "Atajo...": self.assign_trigger,
+            "Enlazar al video": self.link_to_video,
+            "Renombrar": self.rename_audio,
+            "Etiquetas...": self.edit_tags,
+            "Eliminar": self.delete_audio,
+        }
+        menu = ctk.CTkOptionMenu(self, values=list(actions),
+                               command=lambda option: actions[option](audio_frame) if option in actions else None)
         menu._dropdown_menu.post(self.winfo_pointerx(), self.winfo_pointery())
 
+    def link_to_video(self, audio_frame):
+        """Let the video view follow this cue, timed from when the video starts"""
+        self.app.linked_video_cue = audio_frame.audio
+        if self.app.video_view is not None:
+            self.app.video_view.refresh_sync_options()
+
+    def rename_audio(self, audio_frame):
+        """Rename a cue; only the library entry changes, the file keeps its content hash name"""
+        audio = audio_frame.audio
+        dialog = ctk.CTkInputDialog(text=f"Nuevo nombre para '{audio['name']}':", title="Renombrar")
+        new_name = (dialog.get_input() or "").strip()
+        if not new_name or new_name == audio["name"]:
+            return
+        audio["name"] = new_name
+        self.app.update_audio(audio)
+
+    def edit_tags(self, audio_frame):
+        """Replace a cue's tags (comma separated); they are searchable like its name and description"""
+        audio = audio_frame.audio
+        current = ", ".join(audio.get("tags") or ()) or "ninguna"
+        dialog = ctk.CTkInputDialog(text=f"Etiquetas de '{audio['name']}', separadas por comas.\n"
+                                         f"Actuales: {current}. Vacío para quitarlas.", title="Etiquetas")
+        value = dialog.get_input()
+        if value is None:
+            return
+        tags = parse_tags(value)
+        if tags == list(audio.get("tags") or ()):
+            return
+        audio["tags"] = tags
+        self.app.update_audio(audio)
+
+    def assign_trigger(self, audio_frame):
+        """Bind a cue to a key (keysym such as F1 or q) or to a MIDI note number; empty clears both"""
+        audio = audio_frame.audio
+        dialog = ctk.CTkInputDialog(text=f"Tecla (p. ej. F1, q) o nota MIDI (0-127) para '{audio['name']}'.\n"
+                                         "Vacío para quitar el atajo.", title="Atajo")
+        value = dialog.get_input()
+        if value is None:
+            return
+        value = value.strip()
+        if value.isdigit() and not 0 <= int(value) <= 127:
+            messagebox.showerror("Error", "Las notas MIDI van de 0 a 127.")
+            return
+        key = "midi_note" if value.isdigit() else "hotkey"
+        # Un atajo dispara un solo cue: se le quita al que lo tuviera
+        for other in self.app.audios:
+            if other is not audio and value and str(other.get(key, "")) == value:
+                other.pop(key)
+                self.app.update_audio(other)
+        audio.pop("hotkey", None)
+        audio.pop("midi_note", None)
+        if value:
+            audio[key] = int(value) if key == "midi_note" else value
+        self.app.update_audio(audio)
+
     def delete_audio(self, audio_frame):
-        """Delete audio file and update UI"""
+        """Remove the cue from the library; its file goes to the janitor once no other cue uses it"""
+        audio = audio_frame.audio
         file_path = audio_frame.file_path
-        
-        if self.currently_playing == file_path:
-            self.stop_current_audio()
-        
-        if not os.path.exists(file_path):
-            messagebox.showerror("Error", f"El archivo {os.path.basename(file_path)} no existe.")
+        self.app.remove_audio(audio)
+
+        if not any(a["file_path"] == file_path for a in self.app.audios):
+            self.engine.submit(self.engine.stop_cue, file_path, fade_out_ms=0)
+            self.app.cue_cache.evict(file_path)
+            if os.path.exists(file_path):
+                self.app.file_janitor.delete(file_path)
+        messagebox.showinfo("Éxito", "Audio eliminado correctamente")
+
+    def toggle_cue_list(self):
+        """Show or hide the show's cue list next to the grid"""
+        if self.cue_list_panel is None:
+            self.build_cue_list_panel()
+        self.cue_list_visible = not self.cue_list_visible
+        if self.cue_list_visible:
+            self.cue_list_panel.grid(row=0, column=1, sticky="nsew", padx=(0, 10), pady=10)
+            self.on_cue_list_changed()
+        else:
+            self.cue_list_panel.grid_remove()
+
+    def build_cue_list_panel(self):
+        panel = ctk.CTkFrame(self, corner_radius=10, width=320)
+        panel.grid_columnconfigure(0, weight=1)
+        panel.grid_rowconfigure(3, weight=1)
+        ctk.CTkLabel(panel, text="Lista de cues", font=ctk.CTkFont(size=18, weight="bold")).grid(
+            row=0, column=0, sticky="w", padx=10, pady=(15, 5))
+        self.go_button = ctk.CTkButton(panel, text="GO", height=60, fg_color="#27AE46",
+                                       font=ctk.CTkFont(size=24, weight="bold"), command=self.go)
+        self.go_button.grid(row=1, column=0, sticky="ew", padx=10, pady=5)
+        self.standby_label = ctk.CTkLabel(panel, text="", text_color="gray", font=ctk.CTkFont(size=12),
+                                          anchor="w", wraplength=280)
+        self.standby_label.grid(row=2, column=0, sticky="ew", padx=10)
+        self.cue_rows_frame = ctk.CTkScrollableFrame(panel, width=300, fg_color="transparent")
+        self.cue_rows_frame.grid(row=3, column=0, sticky="nsew", padx=5, pady=(5, 10))
+        self.cue_rows_frame.grid_columnconfigure(0, weight=1)
+        self.cue_list_panel = panel
+
+    def go_key(self, event):
+        """Space bar fires GO while the cue list is open, except when typing"""
+        if not self.cue_list_visible or isinstance(event.widget, (tk.Entry, tk.Text)):
+            return None
+        self.go()
+        return "break"
+
+    def go(self):
+        """Fire the standby cue of the list; it was decoded and armed beforehand"""
+        self.engine.submit(self.app.cue_list.go, time.perf_counter())
+
+    def add_to_cue_list(self, audio_frame):
+        self.app.cue_list.add(audio_frame.audio)
+        if not self.cue_list_visible:
+            self.toggle_cue_list()
+
+    def on_cue_list_changed(self):
+        """Redraw the cue list; rows are rebuilt only when cues are added, removed or moved"""
+        if not self.cue_list_visible:
             return
+        cue_list = self.app.cue_list
+        cues = [dict(cue) for cue in cue_list.cues]
+        if [row.cue for row in self.cue_rows] != cues:
+            for row in self.cue_rows:
+                row.destroy()
+            self.cue_rows = [self.create_cue_row(index, cue) for index, cue in enumerate(cues)]
+        for index, row in enumerate(self.cue_rows):
+            state_key = "standby" if index == cue_list.standby else "done" if index < cue_list.standby else "idle"
+            if row.state_key != state_key:
+                row.state_key = state_key
+                row.configure(fg_color={"standby": "#1E6F3E", "done": "#2B2F36"}.get(state_key, "#393E46"))
+        audio = cue_list.audio_for(cue_list.standby)
+        if audio is None:
+            text = "Fin de la lista" if cue_list.standby >= len(cues) else "El cue en espera ya no existe"
+        else:
+            text = f"En espera: {cue_list.standby + 1}. {audio['name']}"
+            text += "  ·  armado" if cue_list.is_armed() else "  ·  preparando..."
+        if cue_list.go_latencies:
+            text += f"  ·  GO: {cue_list.go_latencies[-1]:.1f} ms"
+        self.standby_label.configure(text=text)
 
-        max_attempts = 5
-        deleted = False
-        
-        for attempt in range(max_attempts):
+    def create_cue_row(self, index, cue):
+        cue_list = self.app.cue_list
+        audio = cue_list.audio_for(index)
+        row = ctk.CTkFrame(self.cue_rows_frame, corner_radius=6, fg_color="#393E46")
+        row.grid(row=index, column=0, sticky="ew", pady=2)
+        row.grid_columnconfigure(0, weight=1)
+        row.cue = cue
+        row.state_key = None
+        details = []
+        if cue["pre_wait"]:
+            details.append(f"espera {cue['pre_wait']:g} s")
+        if cue["fade_in_ms"] or cue["fade_out_ms"]:
+            details.append(f"fundido {cue['fade_in_ms']}/{cue['fade_out_ms']} ms")
+        if cue["stop_others"]:
+            details.append("para los demás")
+        if cue["auto_follow"]:
+            details.append("sigue")
+        name = audio["name"] if audio else "(audio eliminado)"
+        label = ctk.CTkLabel(row, text=f"{index + 1}. {name}" + (f"\n{' · '.join(details)}" if details else ""),
+                             anchor="w", justify="left", font=ctk.CTkFont(size=12))
+        label.grid(row=0, column=0, sticky="ew", padx=6, pady=3)
+        label.bind("<Button-1>", lambda event, i=index: cue_list.set_standby(i))
+        buttons = (("↑", lambda i=index: cue_list.move(i, -1)), ("↓", lambda i=index: cue_list.move(i, 1)),
+                   ("⚙️", lambda i=index: self.edit_list_cue(i)), ("✕", lambda i=index: cue_list.remove(i)))
+        for column, (text, command) in enumerate(buttons, start=1):
+            ctk.CTkButton(row, text=text, width=24, height=24, command=command).grid(row=0, column=column, padx=1)
+        return row
+
+    def edit_list_cue(self, index):
+        """Edit the pre-wait, fades and follow/stop actions of one cue of the list"""
+        cue_list = self.app.cue_list
+        cue = cue_list.cues[index]
+        dialog = ctk.CTkToplevel(self)
+        dialog.title(f"Cue {index + 1}")
+        dialog.transient(self.winfo_toplevel())
+        entries = {}
+        fields = (("pre_wait", "Pre-espera (s)"), ("fade_in_ms", "Fundido de entrada (ms)"),
+                  ("fade_out_ms", "Fundido de salida (ms)"))
+        for row, (key, text) in enumerate(fields):
+            ctk.CTkLabel(dialog, text=text).grid(row=row, column=0, padx=10, pady=5, sticky="w")
+            entries[key] = ctk.CTkEntry(dialog, width=80)
+            entries[key].insert(0, f"{cue[key]:g}")
+            entries[key].grid(row=row, column=1, padx=10, pady=5)
+        follow_var = ctk.BooleanVar(value=cue["auto_follow"])
+        stop_var = ctk.BooleanVar(value=cue["stop_others"])
+        ctk.CTkCheckBox(dialog, text="Seguir con el siguiente al terminar", variable=follow_var).grid(
+            row=3, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+        ctk.CTkCheckBox(dialog, text="Parar los demás al arrancar", variable=stop_var).grid(
+            row=4, column=0, columnspan=2, padx=10, pady=5, sticky="w")
+
+        def save():
             try:
-                with open(file_path, 'a') as f:
-                    pass
-                os.remove(file_path)
-                deleted = True
-                break
-            except (PermissionError, IOError):
-                try:
-                    pygame.mixer.quit()
-                    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=4096)
-                    time.sleep(0.5 * (attempt + 1))
-                    os.remove(file_path)
-                    deleted = True
-                    break
-                except Exception:
-                    continue
-            except Exception as e:
-                if attempt == max_attempts - 1:
-                    messagebox.showerror("Error", f"No se pudo eliminar el archivo. Error: {str(e)}")
-                time.sleep(0.3)
-                continue
-
-        if deleted:
-            self.app.audios = [audio for audio in self.app.audios if audio["file_path"] != file_path]
-            self.app.save_audios()
-            self.load_existing_audios()
-            messagebox.showinfo("Éxito", "Audio eliminado correctamente")
+                options = {key: max(0.0, float(entries[key].get().replace(",", "."))) for key, _ in fields}
+            except ValueError:
+                messagebox.showerror("Error", "Los tiempos deben ser números.", parent=dialog)
+                return
+            options["fade_in_ms"] = int(options["fade_in_ms"])
+            options["fade_out_ms"] = int(options["fade_out_ms"])
+            cue_list.update(index, auto_follow=follow_var.get(), stop_others=stop_var.get(), **options)
+            dialog.destroy()
 
-    def load_existing_audios(self):
-        """Load all audio files from app's audios list"""
-        for widget in self.audio_buttons_container.winfo_children():
-            widget.destroy()
+        ctk.CTkButton(dialog, text="Guardar", command=save).grid(row=5, column=0, columnspan=2, pady=10)
+        dialog.after(100, dialog.grab_set)  # CTkToplevel aún no es visible justo después de crearse
 
-        for audio in self.app.audios:
-            if os.path.exists(audio["file_path"]):
-                self.add_audio_button(audio["name"], audio["file_path"])
\ No newline at end of file
+    def on_blob_corrupt(self, file_path):
+        """A stored file no longer matches its hash: treat its cues as missing"""
+        self.missing_paths.add(file_path)
+        self.app.cue_cache.evict(file_path)
+        self.refresh_voice_states()
+
+    @telemetry.timed("ui.load_existing_audios")
+    def load_existing_audios(self):
+        """Show all audios from app's audios list"""
+        # File existence is checked lazily when a cue is played
+        if self.search_index is None:
+            self.cue_grid.set_items(self.app.audios)
+            return
+        self.search_index.sync(self.app.audios)
+        self.cue_grid.set_items(self.search_index.filter(self.search_query, self.app.audios))
+        self.refresh_voice_states()
@@ -0,0 +1,1581 @@
+"""Pruebas de rendimiento sin interfaz para la consola.
+
+Uso: python benchmarks.py [escenario ...] [--json resultados.json] [--baseline base.json] [--save-baseline]
+                          [--no-baseline]
+
+Cada métrica con unidades se compara contra la línea base (por defecto benchmarks_baseline.json, en el
+repositorio) y una regresión hace fallar la corrida, igual que un escenario con "ok": False. Si falta la
+línea base la corrida falla sin medir nada: --save-baseline la crea y --no-baseline sólo mira los "ok".
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+class FakeStatus:
+    def __init__(self, input_overflow=False):
+        self.input_overflow = input_overflow
+
+    def __bool__(self):
+        return self.input_overflow
+
+
+class FakeInputStream:
+    """Imita sd.InputStream: llama al callback en tiempo real (o speed veces más rápido) desde su propio hilo."""
+
+    def __init__(self, samplerate, channels, blocksize, callback, dtype="float32", latency=None, speed=1.0,
+                 device=None):
+        self.samplerate = samplerate
+        self.speed = speed
+        self.channels = channels
+        self.blocksize = blocksize
+        self.callback = callback
+        self.frames_sent = 0
+        self._running = False
+        self._thread = None
+        self._block = np.zeros((blocksize, channels), dtype=dtype)
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        period = self.blocksize / self.samplerate / self.speed
+        next_time = time.perf_counter()
+        noise = np.random.uniform(-0.5, 0.5, (self.blocksize * 16,) + self._block.shape[1:])
+        while self._running:
+            block = (self.frames_sent // self.blocksize) % 16
+            self._block[:] = noise[block * self.blocksize:(block + 1) * self.blocksize]
+            self.callback(self._block, self.blocksize, None, FakeStatus())
+            self.frames_sent += self.blocksize
+            next_time += period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join()
+
+    def close(self):
+        pass
+
+
+class FakeOutputStream:
+    """Imita sd.OutputStream sin dispositivo: el benchmark pide los bloques con pull()."""
+
+    def __init__(self, samplerate, channels, blocksize, callback, dtype="float32", latency=None, device=None):
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.callback = callback
+        self._block = np.zeros((blocksize, channels), dtype=dtype)
+
+    def pull(self, blocks=1):
+        """Run the callback blocks times and return the rendered audio."""
+        out = np.empty((blocks * self.blocksize, self.channels), dtype=self._block.dtype)
+        for i in range(blocks):
+            self.callback(self._block, self.blocksize, None, None)
+            out[i * self.blocksize:(i + 1) * self.blocksize] = self._block
+        return out
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StubWidget:
+    """Stands in for any Tk or CustomTkinter widget, font or variable without a display: every method is
+    accepted and counted, and the window keeps the size the scenario asked for."""
+
+    calls = 0
+    width, height = 1000, 700
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return self._call
+
+    def _call(self, *args, **kwargs):
+        StubWidget.calls += 1
+        return 1  # Lo que devuelven create_polygon y compañía: el id de un elemento
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def get(self):
+        return ""
+
+
+@contextlib.contextmanager
+def stub_tk(ui_modules=("audioView", "cueGrid", "meterBar")):
+    """Inside, tkinter and customtkinter hand out StubWidgets and ui_modules are imported against them; the
+    real modules are back on exit."""
+    import tkinter
+
+    def stub_attribute(name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return StubWidget
+
+    names = ("tkinter", "tkinter.messagebox", "customtkinter") + tuple(ui_modules)
+    saved = {name: sys.modules.pop(name, None) for name in names}
+    for name in names[:3]:
+        sys.modules[name] = types.ModuleType(name)
+        sys.modules[name].__getattr__ = stub_attribute
+    sys.modules["tkinter"].messagebox = sys.modules["tkinter.messagebox"]
+    sys.modules["tkinter"].TclError = tkinter.TclError
+    try:
+        yield
+    finally:
+        for name in names:
+            sys.modules.pop(name, None)
+            if saved[name] is not None:
+                sys.modules[name] = saved[name]
+
+
+def busy_main_thread(seconds):
+    """Keep the GIL busy the way a redrawing Tk loop would."""
+    end = time.perf_counter() + seconds
+    counter = 0
+    while time.perf_counter() < end:
+        counter += sum(i * i for i in range(2000))
+    return counter
+
+
+def bench_recorder(seconds=5.0, sample_rate=48000, channels=2):
+    """Capture a stereo 48 kHz take with a fake stream while the main thread is busy."""
+    from streamRecorder import StreamRecorder
+    import soundfile as sf
+
+    streams = []
+
+    def factory(**kwargs):
+        streams.append(FakeInputStream(**kwargs))
+        return streams[-1]
+
+    recorder = StreamRecorder(sample_rate=sample_rate, channels=channels, stream_factory=factory)
+    with tempfile.TemporaryDirectory() as tmp:
+        take_path = os.path.join(tmp, "take.wav")
+        recorder.start(take_path)
+        busy_main_thread(seconds)
+        recorder.stop()
+        stats = recorder.stats()
+        stats["frames_sent"] = streams[0].frames_sent
+        stats["frames_on_disk"] = sf.info(take_path).frames
+    stats["ok"] = stats["dropped_frames"] == 0 and stats["frames_on_disk"] == stats["frames_sent"]
+    return stats
+
+
+def bench_long_take(minutes=10.0, speed=40.0, sample_rate=48000, channels=2):
+    """Record a long take with a fake stream running speed times faster than real time.
+
+    Throughput is how many times real time the recorder sustained without dropping frames; the memory
+    figure is the Python allocation peak during the take, which must not grow with its length.
+    """
+    import tracemalloc
+    from streamRecorder import StreamRecorder
+
+    streams = []
+
+    def factory(**kwargs):
+        streams.append(FakeInputStream(speed=speed, **kwargs))
+        return streams[-1]
+
+    recorder = StreamRecorder(sample_rate=sample_rate, channels=channels, stream_factory=factory)
+    frames = int(minutes * 60 * sample_rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        tracemalloc.start()
+        start = time.perf_counter()
+        recorder.start(os.path.join(tmp, "take.wav"))
+        while streams[0].frames_sent < frames:
+            time.sleep(0.05)
+        recorder.stop()
+        elapsed = time.perf_counter() - start
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats = recorder.stats()
+    return {"minutes": minutes, "realtime_x": stats["frames_written"] / sample_rate / elapsed,
+            "peak_alloc_mb": peak_bytes / 1e6, "dropped_frames": stats["dropped_frames"],
+            "max_ring_fill": stats["max_ring_fill"],
+            "ok": stats["dropped_frames"] == 0 and stats["frames_written"] == streams[0].frames_sent
+            and peak_bytes < 16e6}
+
+
+def bench_library(sizes=(10, 100, 1000, 10000), repeats=3):
+    """Migrate a legacy audios.json, then time a cold load, a full save and a single update at each size.
+
+    Each figure is the best of repeats runs, so that a busy machine does not read as a regression.
+    """
+    import json
+    from audioLibrary import AudioLibrary
+
+    results = {}
+    for entries in sizes:
+        runs = []
+        for _ in range(repeats):
+            with tempfile.TemporaryDirectory() as tmp:
+                json_path = os.path.join(tmp, "audios.json")
+                db_path = os.path.join(tmp, "audios.db")
+                with open(json_path, "w", encoding="utf-8") as f:
+                    json.dump([{"name": f"Cue {i}", "file_path": os.path.join(tmp, f"{i}.wav"),
+                                "description": "Breve descripción"} for i in range(entries)], f)
+
+                start = time.perf_counter()
+                AudioLibrary(db_path, legacy_json_path=json_path).close()
+                migrate_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                library = AudioLibrary(db_path, legacy_json_path=json_path)
+                audios = library.all()
+                load_ms = (time.perf_counter() - start) * 1000
+
+                for audio in audios:
+                    audio["volume"] = 0.8
+                start = time.perf_counter()
+                library.save_all(audios)
+                save_all_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                audios[0]["volume"] = 0.5
+                library.update(audios[0])
+                update_ms = (time.perf_counter() - start) * 1000
+                library.close()
+            runs.append((migrate_ms, load_ms, save_all_ms, update_ms))
+        best = np.min(runs, axis=0)
+        results[entries] = {"migrate_ms": float(best[0]), "load_ms": float(best[1]),
+                            "save_all_ms": float(best[2]), "update_ms": float(best[3]), "loaded": len(audios)}
+    largest = results[max(sizes)]
+    return {**results, "ok": largest["load_ms"] < 100 and all(r["loaded"] == n for n, r in results.items())}
+
+
+def bench_search(sizes=(1000, 10000), seed=7):
+    """Keystroke-to-filtered-list latency of the cue search while typing, with typos and several terms, plus
+    the cost of indexing one added, renamed or deleted cue. Must stay under one 60 Hz frame (16 ms)."""
+    import random
+    from cueSearch import SearchIndex
+
+    rng = random.Random(seed)
+    words = ("trueno", "lluvia", "viento", "puerta", "campana", "disparo", "aplausos", "música", "tema", "final",
+             "acto", "escena", "entrada", "salida", "ambiente", "bosque", "ciudad", "noche", "tráfico", "pasos",
+             "risa", "grito", "teléfono", "timbre", "reloj", "mar", "olas", "pájaros", "coro", "piano")
+    tags = ("sfx", "música", "ambiente", "voz", "transición", "acto1", "acto2", "acto3")
+    typing = ["t", "tr", "tru", "true", "truen", "trueno", "trueno a", "trueno ac", "trueno act", "trueno acto"]
+    typos = ["truneo", "lluvai", "campaan", "aplauso", "musica", "escna 12", "ambiente noche sfx"]
+    results = {}
+    for size in sizes:
+        audios = [{"id": index, "name": f"{rng.choice(words).capitalize()} {rng.choice(words)} {index}",
+                   "description": " ".join(rng.choice(words) for _ in range(6)),
+                   "tags": rng.sample(tags, 2), "file_path": f"{index}.wav"} for index in range(size)]
+        start = time.perf_counter()
+        index = SearchIndex(audios)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        keystrokes = []
+        for query in typing + typos:
+            start = time.perf_counter()
+            shown = index.filter(query, audios)
+            keystrokes.append((time.perf_counter() - start) * 1000)
+        found_typo = any(audio["name"].lower().startswith("trueno") for audio in index.filter("truneo", audios))
+
+        edits = []
+        for audio in rng.sample(audios, 50):
+            start = time.perf_counter()
+            audio["name"] = f"Renombrado {audio['id']}"
+            index.update(audio)
+            new = dict(audio, name=f"Nuevo {audio['id']}")
+            index.add(new)
+            index.remove(new)
+            edits.append((time.perf_counter() - start) * 1000 / 3)
+        renamed = index.filter("renombrado", audios)
+        results[size] = {"build_ms": build_ms, "keystroke_p50_ms": float(np.median(keystrokes)),
+                         "keystroke_max_ms": float(max(keystrokes)), "edit_us": float(np.mean(edits)) * 1000,
+                         "words": len(index.vocabulary), "last_shown": len(shown),
+                         "typo_found": found_typo, "renamed_found": len(renamed) == 50}
+    return {**results, "ok": all(r["keystroke_max_ms"] < 16 and r["typo_found"] and r["renamed_found"]
+                                 for r in results.values())}
+
+
+def bench_grid(sizes=(100, 1000, 10000)):
+    """Time AudioView refresh, single-cue insert and scroll at several library sizes.
+
+    Without a display the widgets are StubWidgets: the times are then only the view's own Python work and
+    go under "sin_pantalla", so they are never compared with a real display's. The widget calls each step
+    makes are counted as well.
+    """
+    import tkinter as tk
+    import customtkinter as ctk
+
+    try:
+        root = ctk.CTk()
+    except tk.TclError as e:
+        print(f"grid: sin pantalla ({e}); se mide con widgets simulados")
+        with stub_tk():
+            return {"sin_pantalla": grid_timings(sizes)}
+    root.destroy()
+    return grid_timings(sizes)
+
+
+def grid_timings(sizes):
+    import customtkinter as ctk
+    from cueCache import CueCache
+    from audioEngine import AudioEngine
+    from audioView import AudioView
+    from audioMetadata import MetadataCache
+    from deviceManager import init_mixer
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    root = ctk.CTk()
+    init_mixer(44100)
+    cache = CueCache()
+    ui_calls = queue.Queue()
+    app = types.SimpleNamespace(audios=[], cue_cache=cache, audio_engine=AudioEngine(cache),
+                                metadata=MetadataCache(tempfile.mkdtemp()),
+                                post_to_ui=lambda func, *args: ui_calls.put((func, args)))
+    root.geometry("1000x700")
+    view = AudioView(root, app=app)
+    view.pack(fill="both", expand=True)
+    func, args = ui_calls.get(timeout=10)  # El índice de búsqueda, como lo entrega el bucle de Tk
+    func(*args)
+    root.update()
+
+    def timed(step):
+        calls, start = StubWidget.calls, time.perf_counter()
+        step()
+        root.update_idletasks()
+        return (time.perf_counter() - start) * 1000, StubWidget.calls - calls
+
+    results = {}
+    for size in sizes:
+        app.audios = [{"id": i, "name": f"Cue {i}", "file_path": f"cue_{i}.wav", "description": ""}
+                      for i in range(size)]
+        refresh_ms, refresh_calls = timed(view.load_existing_audios)
+        insert_ms, insert_calls = timed(
+            lambda: view.add_cue({"id": size, "name": "Nuevo", "file_path": "nuevo.wav", "description": ""}))
+        scroll_ms, scroll_calls = timed(lambda: view.cue_grid.scroll_to(view.cue_grid.max_scroll() // 2))
+        results[size] = {"refresh_ms": refresh_ms, "insert_ms": insert_ms, "scroll_ms": scroll_ms,
+                         "widgets": len(view.cue_grid.pool) * view.cue_grid.columns}
+        if isinstance(root, StubWidget):
+            results[size].update(refresh_calls=refresh_calls, insert_calls=insert_calls, scroll_calls=scroll_calls)
+    root.destroy()
+    return results
+
+
+def bench_scanner(files=5000):
+    """Initial scans (a new file is reported on the second scan that sees it unchanged) and a no-change
+    rescan of a data folder; the rescan must probe nothing. A file still being copied in must not be
+    reported until it stops growing."""
+    from libraryScanner import LibraryScanner
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(files):
+            with open(os.path.join(tmp, f"cue_{i}.wav"), "wb") as f:
+                f.write(b"RIFF")
+        scanner = LibraryScanner(tmp, on_changes=lambda changes: None)
+        start = time.perf_counter()
+        scanner.scan()
+        initial = scanner.scan()
+        initial_ms = (time.perf_counter() - start) * 1000
+        probed = scanner.probed
+        start = time.perf_counter()
+        changes = scanner.scan()
+        rescan_ms = (time.perf_counter() - start) * 1000
+        reprobed = scanner.probed - probed
+
+        copying = os.path.join(tmp, "copiando.wav")
+        seen_while_copying = []
+        with open(copying, "wb") as f:
+            for _ in range(3):
+                f.write(b"\0" * 65536)
+                f.flush()  # Cada bloque cambia el tamaño: la copia sigue en marcha
+                seen_while_copying += scanner.scan()["added"]
+        settled = scanner.scan()["added"]
+    return {"files": files, "initial_ms": initial_ms, "rescan_ms": rescan_ms, "reprobed": reprobed,
+            "ok": reprobed == 0 and len(initial["added"]) == files and not changes["added"]
+            and not changes["modified"] and not seen_while_copying and len(settled) == 1}
+
+
+def bench_metadata():
+    """Cold analysis versus sidecar hit for the bundled sample cue."""
+    from audioMetadata import MetadataCache
+
+    sample = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dist", "data",
+                          "8 trompetras de princesa.wav")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = MetadataCache(tmp)
+        start = time.perf_counter()
+        meta = cache.get(sample)
+        cold_ms = (time.perf_counter() - start) * 1000
+        cache.save_index()
+        start = time.perf_counter()
+        MetadataCache(tmp).get(sample)
+        warm_ms = (time.perf_counter() - start) * 1000
+    return {"duration_s": meta["duration"], "cold_ms": cold_ms, "warm_ms": warm_ms,
+            "ok": warm_ms < cold_ms}
+
+
+def bench_loudness(files=32, seconds=10.0, sample_rate=48000):
+    """Bulk LUFS analysis, one process versus the pool, plus BS.1770 reference tone checks (mono and 5.1)."""
+    import soundfile as sf
+    from loudness import analyze_file, analyze_library
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(files):
+            path = os.path.join(tmp, f"cue_{i}.wav")
+            level = 10 ** (-rng.uniform(6, 30) / 20)
+            sf.write(path, rng.standard_normal((int(seconds * sample_rate), 2)) * level * 0.3, sample_rate)
+            paths.append(path)
+        # 997 Hz a -20 dBFS en un canal debe medir -23.0 LUFS
+        tone_path = os.path.join(tmp, "tone.wav")
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        sf.write(tone_path, 0.1 * np.sin(2 * np.pi * 997 * t), sample_rate, subtype="FLOAT")
+        tone = analyze_file(tone_path)
+        # 5.1 (L R C LFE Ls Rs): el LFE no cuenta y cada envolvente pesa 1.41 (+1.5 dB)
+        surround = {}
+        for name, channels in (("center_lfe", (2, 3)), ("rear_right", (5,))):
+            signal = np.zeros((len(t), 6))
+            signal[:, list(channels)] = 0.1 * np.sin(2 * np.pi * 997 * t)[:, None]
+            path = os.path.join(tmp, f"{name}.wav")
+            sf.write(path, signal, sample_rate, subtype="FLOAT")
+            surround[name] = analyze_file(path)["lufs"]
+
+        start = time.perf_counter()
+        for path in paths:
+            analyze_file(path)
+        serial_s = time.perf_counter() - start
+        start = time.perf_counter()
+        results = analyze_library(paths)
+        pool_s = time.perf_counter() - start
+    errors = sum("error" in result for result in results.values())
+    return {"files": files, "serial_files_per_s": files / serial_s, "pool_files_per_s": files / pool_s,
+            "workers": os.cpu_count(), "tone_lufs": tone["lufs"], "surround_lufs": surround,
+            "ok": errors == 0 and abs(tone["lufs"] + 23.0) < 0.1 and abs(surround["center_lfe"] + 23.0) < 0.1
+            and abs(surround["rear_right"] + 23.0 - float(10 * np.log10(1.41))) < 0.1}
+
+
+def bench_import(seconds=300.0, sample_rate=48000, mixer_rate=44100):
+    """Transcode a long 48 kHz take on the importer thread to the mixer's rate; memory must stay flat and the
+    main thread live."""
+    import tracemalloc
+    import soundfile as sf
+    from audioImporter import AudioImporter, BLOCK_FRAMES
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.wav")
+        with sf.SoundFile(source, "w", samplerate=sample_rate, channels=2, subtype="FLOAT") as f:
+            for _ in range(int(seconds * sample_rate) // BLOCK_FRAMES):
+                f.write(rng.uniform(-0.5, 0.5, (BLOCK_FRAMES, 2)).astype(np.float32))
+        source_mb = os.path.getsize(source) / (1024 * 1024)
+        done = threading.Event()
+        imported = []
+        importer = AudioImporter(os.path.join(tmp, "data"),
+                                 on_imported=lambda job, temp_path, digest: imported.append(sf.info(temp_path)),
+                                 on_finished=lambda count, errors: done.set())
+        tracemalloc.start()
+        start = time.perf_counter()
+        importer.start([{"source": source, "name": "cue"}], sample_rate=mixer_rate)
+        # El hilo principal mide cuánto tarda en recuperar el control mientras se importa
+        worst_gap_ms = 0.0
+        last = time.perf_counter()
+        while not done.wait(0.005):
+            now = time.perf_counter()
+            worst_gap_ms = max(worst_gap_ms, (now - last) * 1000 - 5)
+            last = now
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    peak_mb = peak / (1024 * 1024)
+    return {"source_mb": source_mb, "seconds": elapsed, "mb_per_s": source_mb / elapsed,
+            "peak_alloc_mb": peak_mb, "worst_main_gap_ms": worst_gap_ms,
+            "imported_rate": imported[0].samplerate if imported else None,
+            "ok": peak_mb < 64 and worst_gap_ms < 100 and bool(imported) and imported[0].samplerate == mixer_rate
+            and abs(imported[0].frames - seconds * mixer_rate) < mixer_rate}
+
+
+def bench_memmap(minutes=30.0, sample_rate=44100):
+    """Open a long WAV bed mapped from disk, pause/resume it and check the output is sample-continuous."""
+    import tracemalloc
+    import soundfile as sf
+    from streamMixer import StreamMixer
+
+    streams = []
+
+    def factory(**kwargs):
+        streams.append(FakeOutputStream(**kwargs))
+        return streams[-1]
+
+    frames = int(minutes * 60 * sample_rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bed.wav")
+        ramp = (np.arange(frames, dtype=np.int64) % 65536 - 32768).astype(np.int16)
+        sf.write(path, np.stack([ramp, -ramp - 1], axis=1), sample_rate, subtype="PCM_16")
+        del ramp
+
+        mixer = StreamMixer(sample_rate=sample_rate, channels=2, stream_factory=factory)
+        accepted = mixer.accepts(path)
+        tracemalloc.start()
+        start = time.perf_counter()
+        channel = mixer.channel()
+        source = mixer.open(path)
+        channel.play(source)
+        open_ms = (time.perf_counter() - start) * 1000
+        before = streams[0].pull(40)
+        channel.pause()
+        silent = streams[0].pull(10)
+        channel.unpause()
+        after = streams[0].pull(40)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        expected = source.frames[:len(before) + len(after)].astype(np.float32) / 32768
+        continuous = np.array_equal(np.concatenate([before, after]), expected)
+        mixer.close()
+        del source, channel
+    return {"minutes": minutes, "accepted": accepted, "open_ms": open_ms, "peak_alloc_mb": peak / (1024 * 1024),
+            "paused_silent": not silent.any(), "sample_continuous": continuous,
+            "ok": accepted and continuous and not silent.any() and peak < 16 * 1024 * 1024}
+
+
+def bench_voices(voices=16, seconds=30.0, sample_rate=44100, blocksize=4096):
+    """Sixteen simultaneous voices at the 4096-frame buffer main.py configures, without underruns.
+
+    pygame mixes inside SDL, where the render time cannot be seen, so on that path the check is that every voice
+    keeps its own busy channel for the whole run (none stolen or cut short). The numpy mixer's callback is timed
+    block by block against the block period while the main thread holds the GIL the way Tk does; a block that
+    takes longer than its period would be an underrun on a real device.
+    """
+    import soundfile as sf
+    from audioEngine import AudioEngine
+    from cueCache import CueCache
+    from streamMixer import ArraySource, StreamMixer
+    from deviceManager import init_mixer
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    init_mixer(sample_rate)
+    streams = []
+
+    def factory(**kwargs):
+        streams.append(FakeOutputStream(**kwargs))
+        return streams[-1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        t = np.arange(int(3 * sample_rate)) / sample_rate
+        for index in range(voices):
+            path = os.path.join(tmp, f"voice{index}.wav")
+            tone = np.sin(2 * np.pi * (110 + 20 * index) * t) * 0.05
+            sf.write(path, np.stack([tone] * 2, axis=1), sample_rate, subtype="PCM_16")
+            paths.append(path)
+
+        engine = AudioEngine(CueCache())
+        for path in paths:
+            engine.cue_cache.get(path)
+        playing = [engine.play(path, volume=0.5) for path in paths]
+        concurrent = []
+        for _ in range(20):  # Dos segundos: ninguna de las voces de 3 s puede haber terminado
+            time.sleep(0.1)
+            concurrent.append(sum(voice.channel.get_busy() for voice in playing))
+        channels = len({id(voice.channel) for voice in playing})
+        engine.stop_all(fade_out_ms=0)
+        engine.shutdown()
+
+        mixer = StreamMixer(sample_rate=sample_rate, channels=2, blocksize=blocksize, stream_factory=factory)
+        long_t = np.arange(int(seconds * sample_rate)) / sample_rate
+        for index in range(voices):
+            tone = np.sin(2 * np.pi * (110 + 20 * index) * long_t) * 0.05
+            samples = (np.stack([tone] * 2, axis=1) * 32767).astype(np.int16)
+            if index % 2:
+                # La mitad como WAV mapeado desde disco, la otra como muestras de la caché
+                path = os.path.join(tmp, f"bed{index}.wav")
+                sf.write(path, samples, sample_rate, subtype="PCM_16")
+                source = mixer.open(path)
+            else:
+                source = ArraySource(samples, sample_rate)
+            channel = mixer.channel()
+            channel.set_volume(0.5)
+            channel.play(source, fade_ms=500 if index % 4 == 0 else 0)
+        stop = threading.Event()
+
+        def keep_busy():
+            while not stop.is_set():
+                busy_main_thread(0.05)
+
+        busy = threading.Thread(target=keep_busy)
+        busy.start()
+        render_ms = []
+        for _ in range(int(seconds * sample_rate / blocksize) - 1):
+            start = time.perf_counter()
+            streams[0].pull(1)
+            render_ms.append((time.perf_counter() - start) * 1000)
+        stop.set()
+        busy.join()
+        mixed = sum(channel.busy for channel in mixer._channels)
+        mixer.close()
+    period_ms = blocksize / sample_rate * 1000
+    late = sum(ms > period_ms for ms in render_ms)
+    return {"voices": voices, "pygame_min_concurrent": min(concurrent), "pygame_channels": channels,
+            "mixer_voices": mixed, "block_period_ms": period_ms,
+            "render_p99_ms": float(np.percentile(render_ms, 99)), "render_max_ms": max(render_ms),
+            "render_p99_percent": float(np.percentile(render_ms, 99)) / period_ms * 100, "underruns": late,
+            "ok": min(concurrent) == voices and channels == voices and mixed == voices and late == 0
+                  and float(np.percentile(render_ms, 99)) < period_ms / 2}
+
+
+def bench_seek(seeks=200, seconds=120.0, sample_rate=44100):
+    """Random seeks on a mapped WAV and an indexed MP3; p99 seek latency must stay under one buffer."""
+    import soundfile as sf
+    from audioMetadata import MetadataCache
+    from streamMixer import Mp3Source, StreamMixer
+
+    streams = []
+
+    def factory(**kwargs):
+        streams.append(FakeOutputStream(**kwargs))
+        return streams[-1]
+
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    # Barrido de frecuencia: cada posición suena distinta, así un salto mal alineado se nota
+    signal = 0.4 * np.sin(2 * np.pi * (200 * t + 20 * t ** 2))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = os.path.join(tmp, "bed.wav")
+        mp3_path = os.path.join(tmp, "bed.mp3")
+        sf.write(wav_path, np.stack([signal, signal], axis=1), sample_rate, subtype="PCM_16")
+        sf.write(mp3_path, np.stack([signal, signal], axis=1), sample_rate, format="MP3")
+        del signal, t
+        mixer = StreamMixer(sample_rate=sample_rate, channels=2, min_seconds=1, stream_factory=factory)
+        buffer_ms = mixer.blocksize / sample_rate * 1000
+
+        for kind, path in (("wav", wav_path), ("mp3", mp3_path)):
+            meta = MetadataCache(os.path.join(tmp, "meta")).get(path)
+            reference, _ = sf.read(path, dtype="float32", always_2d=True)
+            channel = mixer.channel()
+            channel.play(mixer.open(path) if kind == "wav" else Mp3Source(path, meta))
+            latencies = []
+            worst_error = 0.0
+            for target in rng.integers(0, len(reference) - mixer.blocksize * 8, seeks):
+                start = time.perf_counter()
+                if kind == "wav":
+                    channel.seek(int(target))
+                else:
+                    channel.seek(int(target), Mp3Source(path, meta, int(target)))
+                latencies.append((time.perf_counter() - start) * 1000)
+                block = streams[0].pull(4)
+                worst_error = max(worst_error, float(np.abs(block - reference[target:target + len(block)]).max()))
+            channel.stop()
+            results[kind] = {"p50_ms": float(np.percentile(latencies, 50)),
+                             "p99_ms": float(np.percentile(latencies, 99)), "max_error": worst_error}
+        mixer.close()
+    results["buffer_ms"] = buffer_ms
+    # El MP3 se compara con su propia decodificación completa: con el pre-roll el salto es exacto
+    results["ok"] = all(results[kind]["p99_ms"] < buffer_ms for kind in ("wav", "mp3")) \
+        and max(results[kind]["max_error"] for kind in ("wav", "mp3")) < 1e-4
+    return results
+
+
+def bench_go(rounds=15, sample_rate=44100):
+    """GO-to-first-sample over a cue list mixing very short and very long files; jitter must stay under 5 ms.
+
+    The latency is GO until the voice is playing (what CueList.go_latencies records) plus, for mapped
+    WAV voices, rendering the output block that carries the cue's first sample; pygame voices (the MP3)
+    count until Channel.play returns. Saving show.json after the GO does not delay the audio.
+    """
+    import pygame
+    import soundfile as sf
+    from audioEngine import AudioEngine
+    from cueCache import CueCache
+    from cueList import CueList
+    from streamMixer import MixerChannel, StreamMixer
+    from deviceManager import init_mixer
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    init_mixer(sample_rate)
+    streams = []
+
+    def factory(**kwargs):
+        streams.append(FakeOutputStream(**kwargs))
+        return streams[-1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audios = []
+        for index, (seconds, extension) in enumerate(((0.5, "wav"), (10.0, "wav"), (600.0, "wav"), (20.0, "mp3"))):
+            t = np.arange(int(seconds * sample_rate)) / sample_rate
+            tone = 0.3 * np.cos(2 * np.pi * 440 * t)  # Empieza en el máximo: la primera muestra no es cero
+            path = os.path.join(tmp, f"cue{index}.{extension}")
+            sf.write(path, np.stack([tone, tone], axis=1), sample_rate,
+                     **({"subtype": "PCM_16"} if extension == "wav" else {"format": "MP3"}))
+            audios.append({"id": index, "name": f"Cue {index}", "file_path": path, "seconds": seconds})
+        del t, tone
+
+        cache = CueCache()
+        mixer = StreamMixer(sample_rate=sample_rate, channels=2, min_seconds=0, stream_factory=factory)
+        engine = AudioEngine(cache, stream_mixer=mixer)
+        cue_list = CueList(engine, os.path.join(tmp, "show.json"),
+                           resolve=lambda audio_id: audios[audio_id] if audio_id < len(audios) else None)
+        for _ in range(rounds):
+            for audio in audios:
+                cue_list.add(audio)
+        cue_list.set_standby(0)
+
+        latencies = {audio["id"]: [] for audio in audios}
+        for cue in list(cue_list.cues):
+            deadline = time.perf_counter() + 10
+            while not cue_list.is_armed() and time.perf_counter() < deadline:
+                time.sleep(0.005)  # Como en una función: el siguiente GO llega con el cue ya armado
+            voice = cue_list.go(time.perf_counter())
+            latency_ms = cue_list.go_latencies[-1]
+            if isinstance(voice.channel, MixerChannel):
+                start = time.perf_counter()
+                if not streams[0].pull(1)[0].any():
+                    latency_ms = float("inf")  # El primer bloque tras el GO debe traer ya el cue
+                latency_ms += (time.perf_counter() - start) * 1000
+            latencies[cue["audio_id"]].append(latency_ms)
+            engine.stop_all(fade_out_ms=0)
+            engine.update()
+        mixer.close()
+        engine.shutdown()
+
+        cache.clear()
+        start = time.perf_counter()
+        engine.play(audios[-1]["file_path"])  # Sin armar: se decodifica al pulsar
+        cold_mp3_ms = (time.perf_counter() - start) * 1000
+        pygame.mixer.stop()
+
+    every = np.concatenate([values for values in latencies.values()])
+    jitter_ms = float(every.max() - every.min())
+    return {"per_cue_p50_ms": {f"{audios[i]['seconds']:g}s.{audios[i]['file_path'][-3:]}": float(np.median(v))
+                               for i, v in latencies.items()},
+            "p50_ms": float(np.median(every)), "p99_ms": float(np.percentile(every, 99)),
+            "jitter_ms": jitter_ms, "unarmed_mp3_ms": cold_mp3_ms, "ok": jitter_ms < 5}
+
+
+def bench_cues(cues=8, rounds=5, sample_rate=44100):
+    """Cue load-to-play (not cached: decode, then start) and cue switch (stop one cue, start the next, both
+    cached), through the engine the way the grid buttons use it."""
+    import soundfile as sf
+    from audioEngine import AudioEngine
+    from cueCache import CueCache
+    from deviceManager import init_mixer
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    init_mixer(sample_rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        t = np.arange(5 * sample_rate) / sample_rate
+        tone = 0.3 * np.sin(2 * np.pi * 440 * t)
+        for index in range(cues):
+            extension = "mp3" if index % 2 else "wav"
+            path = os.path.join(tmp, f"cue{index}.{extension}")
+            sf.write(path, np.stack([tone, tone], axis=1), sample_rate,
+                     **({"subtype": "PCM_16"} if extension == "wav" else {"format": "MP3"}))
+            paths.append(path)
+        del t, tone
+
+        cache = CueCache()
+        engine = AudioEngine(cache)
+        load = {"wav": [], "mp3": []}
+        for _ in range(rounds):
+            for path in paths:
+                cache.clear()
+                start = time.perf_counter()
+                engine.play(path)
+                load[path[-3:]].append((time.perf_counter() - start) * 1000)
+                engine.stop_all(fade_out_ms=0)
+        for path in paths:
+            cache.get(path)
+        switch = []
+        for _ in range(rounds):
+            for path in paths:
+                start = time.perf_counter()
+                engine.stop_all(fade_out_ms=0)
+                engine.play(path)
+                switch.append((time.perf_counter() - start) * 1000)
+        engine.stop_all(fade_out_ms=0)
+        engine.shutdown()
+    return {"load_to_play_wav_p50_ms": float(np.median(load["wav"])),
+            "load_to_play_mp3_p50_ms": float(np.median(load["mp3"])),
+            "switch_p50_ms": float(np.median(switch)), "switch_p99_ms": float(np.percentile(switch, 99)),
+            "ok": float(np.percentile(switch, 99)) < 5}
+
+
+def bench_triggers(triggers=1000, sample_rate=44100):
+    """Fire OSC triggers over loopback UDP, one at a time; p50/p99 from packet arrival to a playing voice."""
+    import socket
+    import soundfile as sf
+    from audioEngine import AudioEngine
+    from cueCache import CueCache
+    from triggerInput import TriggerInput, osc_message
+    from deviceManager import init_mixer
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    init_mixer(sample_rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cue.wav")
+        t = np.arange(sample_rate // 10) / sample_rate
+        sf.write(path, np.stack([np.sin(2 * np.pi * 440 * t)] * 2, axis=1) * 0.3, sample_rate, subtype="PCM_16")
+        engine = AudioEngine(CueCache())
+        engine.cue_cache.get(path)
+
+        def play(audio_id):
+            engine.stop_cue(path, fade_out_ms=0)
+            engine.play(path)
+
+        done = threading.Semaphore(0)
+        trigger_input = TriggerInput(engine, {"play": play})
+        trigger_input.on_triggered = done.release
+        address = trigger_input.start_osc("127.0.0.1", 0)
+        client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        packet = osc_message("/cue/1/play")
+        round_trips = []
+        lost = 0
+        for _ in range(triggers):
+            sent = time.perf_counter()
+            client.sendto(packet, address)
+            if not done.acquire(timeout=1.0):
+                lost += 1
+                continue
+            round_trips.append((time.perf_counter() - sent) * 1000)
+        client.close()
+        trigger_input.close()
+        engine.stop_all(fade_out_ms=0)
+        engine.shutdown()
+    stats = trigger_input.latency_stats()
+    return {"triggers": triggers, "lost": lost, "p50_ms": stats["p50_ms"], "p99_ms": stats["p99_ms"],
+            "send_to_done_p99_ms": float(np.percentile(round_trips, 99)),
+            "ok": lost == 0 and stats["p99_ms"] < 5}
+
+
+def _remote_tablets(host, port, clients, rounds, think, cues):
+    """Tablets for bench_remote, run in their own process like real ones on their own devices, so their
+    work does not steal the console's GIL from the hotkeys being measured."""
+    import asyncio
+    from remoteControl import encode_frame, read_frame
+
+    async def tablet(index, round_trips, states):
+        pause = np.random.default_rng(index).uniform(0.5, 1.5, rounds) * think
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(f"GET /ws?token=prueba HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                     "Connection: Upgrade\r\n"
+                     "Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n"
+                     .encode("latin-1"))
+        await reader.readuntil(b"\r\n\r\n")
+        for ref in range(rounds):
+            message = {"action": "play" if ref % 4 else "pause", "cue": (index + ref) % cues, "ref": ref}
+            sent = time.perf_counter()
+            writer.write(encode_frame(json.dumps(message), mask=os.urandom(4)))
+            while True:
+                _, payload = await read_frame(reader)
+                if payload.startswith(b'{"type": "state"'):
+                    states[index] += 1  # Una tablet de verdad lo dibuja en su propio procesador
+                elif json.loads(payload).get("ref") == ref:
+                    break
+            round_trips.append((time.perf_counter() - sent) * 1000)
+            await asyncio.sleep(pause[ref])
+        writer.write(encode_frame(b"\x03\xe8", opcode=0x8, mask=os.urandom(4)))
+        writer.close()
+
+    async def load_test():
+        round_trips, states = [], [0] * clients
+        started = time.perf_counter()
+        await asyncio.wait_for(asyncio.gather(*(tablet(index, round_trips, states) for index in range(clients))),
+                               timeout=60)
+        return round_trips, states, time.perf_counter() - started
+
+    return asyncio.run(load_test())
+
+
+def bench_remote(clients=50, rounds=40, think=0.02, cues=8, local_interval=0.005, sample_rate=44100):
+    """Trigger round trip over the remote's WebSocket with many tablets at once (send to ack, which leaves once
+    the engine played the cue), plus the local hotkey latency idle and under that load, which must not move.
+    Requests without the token, from another site's Origin or for a foreign Host must be refused, and silent
+    connections closed.
+
+    Each tablet fires again think seconds (with jitter) after its ack: 50 of them are ~2000 triggers/s, far
+    more than a show, and they start together so the first rounds collide.
+    """
+    import asyncio
+    import soundfile as sf
+    import remoteControl
+    from audioEngine import AudioEngine
+    from cueCache import CueCache
+    from remoteControl import RemoteServer
+    from triggerInput import TriggerInput
+    from deviceManager import init_mixer
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    init_mixer(sample_rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        audios = []
+        t = np.arange(sample_rate // 2) / sample_rate
+        for index in range(cues):
+            path = os.path.join(tmp, f"cue{index}.wav")
+            tone = np.sin(2 * np.pi * (220 + 55 * index) * t) * 0.3
+            sf.write(path, np.stack([tone] * 2, axis=1), sample_rate, subtype="PCM_16")
+            audios.append({"id": index, "name": f"Cue {index}", "file_path": path})
+        engine = AudioEngine(CueCache())
+        for audio in audios:
+            engine.cue_cache.get(audio["file_path"])
+
+        def play(audio_id):
+            engine.stop_cue(audios[audio_id]["file_path"], fade_out_ms=0)
+            engine.play(audios[audio_id]["file_path"])
+
+        def pause(audio_id):
+            for voice in engine.voices_for(audios[audio_id]["file_path"]):
+                engine.pause(voice.id)
+
+        trigger_input = TriggerInput(engine, {"play": play, "enqueue": play, "pause": pause,
+                                              "stop": lambda: engine.stop_all(fade_out_ms=0)})
+        remote = RemoteServer(trigger_input, engine, "prueba")
+        remote.set_cues(audios)
+        host, port = remote.start("127.0.0.1", 0)
+
+        def local_latency(seconds, load=None):
+            # Atajos de teclado a ritmo fijo; devuelve su p99 mientras corre load (o en reposo)
+            trigger_input.latencies.clear()
+            stop = threading.Event()
+
+            def fire():
+                while not stop.wait(local_interval):
+                    trigger_input.trigger("play", 0, source="teclado")
+
+            thread = threading.Thread(target=fire)
+            thread.start()
+            result = load() if load else time.sleep(seconds)
+            stop.set()
+            thread.join()
+            engine.submit(lambda: None)
+            time.sleep(0.1)
+            values = sorted(ms for source, ms in trigger_input.latencies if source == "teclado")
+            return result, values[min(len(values) - 1, int(len(values) * 0.99))]
+
+        async def status(request, wait=2.0):
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request.encode("latin-1"))
+            try:
+                reply = await asyncio.wait_for(reader.read(), wait)  # El servidor cierra al terminar
+            finally:
+                writer.close()
+            return int(reply.split(b" ", 2)[1]) if reply else None
+
+        async def refusals():
+            upgrade = "Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n"
+            same_host = f"Host: {host}:{port}\r\n"
+            codes = {
+                "no_token": await status(f"POST /go HTTP/1.1\r\n{same_host}\r\n"),
+                "cross_site_post": await status(f"POST /go?token=prueba HTTP/1.1\r\n{same_host}"
+                                                "Origin: http://evil.example\r\n\r\n"),
+                "cross_site_ws": await status(f"GET /ws?token=prueba HTTP/1.1\r\n{same_host}{upgrade}"
+                                              "Origin: http://evil.example\r\n\r\n"),
+                "rebound_host": await status("GET /cues?token=prueba HTTP/1.1\r\nHost: evil.example:8765\r\n\r\n"),
+                "own_page": await status(f"GET /cues?token=prueba HTTP/1.1\r\n{same_host}"
+                                         f"Origin: http://{host}:{port}\r\n\r\n"),
+            }
+            # Una petición a medias y un WebSocket que no contesta al ping se cierran solos
+            remoteControl.READ_TIMEOUT, remoteControl.WS_IDLE_SECONDS = 0.2, 0.2
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(b"GET /cues?token=prueba HTTP/1.1\r\n")
+                half_closed = await asyncio.wait_for(reader.read(), 2.0) == b""
+                writer.close()
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(f"GET /ws?token=prueba HTTP/1.1\r\n{same_host}{upgrade}\r\n".encode("latin-1"))
+                idle_closed = (await asyncio.wait_for(reader.read(), 2.0)).startswith(b"HTTP/1.1 101")
+                writer.close()
+            finally:
+                remoteControl.READ_TIMEOUT, remoteControl.WS_IDLE_SECONDS = 5.0, 30.0
+            return codes, half_closed, idle_closed
+
+        try:
+            codes, half_closed, idle_closed = asyncio.run(refusals())
+            _, idle_p99 = local_latency(1.0)
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                tablets = pool.submit(_remote_tablets, host, port, clients, rounds, think, cues)
+                (round_trips, states, elapsed), loaded_p99 = local_latency(0, tablets.result)
+        finally:
+            remote.close()
+            engine.stop_all(fade_out_ms=0)
+            engine.shutdown()
+    return {"clients": clients, "triggers": len(round_trips), "per_s": len(round_trips) / elapsed,
+            "round_trip_p50_ms": float(np.percentile(round_trips, 50)),
+            "round_trip_p99_ms": float(np.percentile(round_trips, 99)),
+            "states_per_client": min(states), "local_idle_p99_ms": idle_p99, "local_loaded_p99_ms": loaded_p99,
+            "status": codes, "half_open_closed": half_closed, "idle_ws_closed": idle_closed,
+            "ok": len(round_trips) == clients * rounds and float(np.percentile(round_trips, 99)) < 50
+                  and loaded_p99 < 5 and min(states) > 0 and codes["own_page"] == 200 and half_closed
+                  and idle_closed and all(code == 403 for name, code in codes.items() if name != "own_page")}
+
+
+def bench_video(seconds=5.0, fps=30, display=(1280, 720)):
+    """Play a 1080p30 H.264 clip through VideoPlayer: decoder throughput, then real-time playback with dropped
+    frames, A/V lag and the main-thread time per frame (the Tk paste, or an equal copy without a display).
+
+    The clip's AAC track is extracted to WAV, and the clip is played again following a voice that has been
+    sounding for 20 minutes: counted from when the video starts, it must drop no more frames than the wall clock.
+    """
+    import av
+    import soundfile as sf
+    from videoEngine import VideoPlayer, VoiceClock, WallClock, extract_audio, prune_tracks
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "clip.mp4")
+        output = av.open(path, "w")
+        stream = output.add_stream("libx264", rate=fps)
+        stream.width, stream.height, stream.pix_fmt = 1920, 1080, "yuv420p"
+        audio = output.add_stream("aac", rate=48000)
+        audio.layout = "stereo"
+        t = np.arange(1024) / 48000
+        for index in range(int(seconds * 48000 / 1024)):
+            tone = (0.2 * np.sin(2 * np.pi * 440 * (t + index * 1024 / 48000))).astype(np.float32)
+            frame = av.AudioFrame.from_ndarray(np.stack([tone, tone]), format="fltp", layout="stereo")
+            frame.sample_rate, frame.pts = 48000, index * 1024
+            for packet in audio.encode(frame):
+                output.mux(packet)
+        for packet in audio.encode():
+            output.mux(packet)
+        picture = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        for index in range(int(seconds * fps)):
+            picture[:] = 40
+            picture[:, (index * 16) % 1920:(index * 16) % 1920 + 240] = (200, 80, 20)  # Barra que se desplaza
+            for packet in stream.encode(av.VideoFrame.from_ndarray(picture, format="rgb24")):
+                output.mux(packet)
+        for packet in stream.encode():
+            output.mux(packet)
+        output.close()
+
+        player = VideoPlayer()
+        player.open(path, *display)
+        try:
+            import tkinter as tk
+            from PIL import Image, ImageTk
+            root = tk.Tk()
+            width, height = player.size
+            frames = [Image.frombuffer("RGBA", (width, height), slot, "raw", "RGBA", 0, 1) for slot in player.slots]
+            photo = ImageTk.PhotoImage("RGBA", (width, height))
+            show = lambda slot: photo.paste(frames[slot])
+        except Exception:
+            root = None
+            screen = np.zeros_like(player.slots[0])
+            show = lambda slot: np.copyto(screen, player.slots[slot])  # Lo mismo que copia Tk al pegar
+
+        # Reloj un fotograma por delante de la pantalla: cada next_frame() toma el siguiente sin descartar nada
+        player.play(clock=lambda: 0.0 if player.current_pts is None else player.current_pts + 1.5 / fps)
+        start = time.perf_counter()
+        while not player.is_finished():
+            player.next_frame()
+            time.sleep(0.001)
+        decoded_fps = player.converted / (time.perf_counter() - start)
+
+        clock = WallClock()
+        player.play(clock=clock)
+        ui_ms, lag_ms = [], []
+        while not player.is_finished():
+            start = time.perf_counter()
+            slot = player.next_frame()
+            if slot is not None:
+                show(slot)
+                ui_ms.append((time.perf_counter() - start) * 1000)
+                lag_ms.append((clock() - player.current_pts) * 1000)
+            time.sleep(max(0.001, player.seconds_to_next()))
+        stats = player.stats()
+
+        class SoundingVoice:
+            started_at = time.perf_counter() - 1200  # Un fondo que lleva 20 minutos sonando
+
+            def position(self):
+                return time.perf_counter() - self.started_at
+
+            def is_active(self):
+                return True
+
+        player.play(clock=VoiceClock(SoundingVoice()))
+        while not player.is_finished():
+            player.next_frame()
+            time.sleep(max(0.001, player.seconds_to_next()))
+        followed = player.stats()
+        player.close()
+        if root is not None:
+            root.destroy()
+        track_path = os.path.join(tmp, "track.wav")
+        has_track = extract_audio(path, track_path, 44100)
+        track_seconds = sf.info(track_path).duration if has_track else 0.0
+
+        # Caché de pistas con cuatro: las dos usadas hace más tiempo no caben en el tope de dos
+        cache_dir = os.path.join(tmp, "cache")
+        os.makedirs(cache_dir)
+        for age in range(4):
+            cached = os.path.join(cache_dir, f"pista{age}.wav")
+            shutil.copyfile(track_path, cached)
+            os.utime(cached, ns=(time.time_ns(), time.time_ns() - age * 10 ** 9))
+        two_tracks_mb = 2 * os.path.getsize(track_path) / (1024 * 1024)
+        pruned = prune_tracks(cache_dir, budget_mb=two_tracks_mb, keep=[os.path.join(cache_dir, "pista3.wav")])
+        left = sorted(os.listdir(cache_dir))
+    frames = int(seconds * fps)
+    return {"size": f"{player.size[0]}x{player.size[1]}", "display": root is not None,
+            "decoded_fps": decoded_fps, "shown": stats["shown"], "dropped": stats["dropped"],
+            "followed_dropped": followed["dropped"], "track_seconds": track_seconds, "pruned_tracks": left,
+            "ui_p50_ms": float(np.median(ui_ms)), "ui_p99_ms": float(np.percentile(ui_ms, 99)),
+            "av_lag_p99_ms": float(np.percentile(lag_ms, 99)),
+            "ok": decoded_fps >= fps and stats["dropped"] <= frames * 0.02 and float(np.percentile(ui_ms, 99)) < 8
+            and float(np.percentile(lag_ms, 99)) < 1000 / fps and followed["dropped"] <= frames * 0.02
+            and abs(track_seconds - seconds) < 0.1 and pruned == 2 and left == ["pista0.wav", "pista3.wav"]}
+
+
+def bench_devices(min_stable=256):
+    """Device manager against a fake PortAudio: cached queries, hot-plug detection, the latency probe (the
+    fake output underruns below min_stable frames) and the configuration surviving a restart. PortAudio must
+    not be restarted while the device fingerprint stays put, nor while a stream is being opened."""
+    import itertools
+    import types
+    from deviceManager import (MAX_INPUT_CHANNELS, PROBE_HEADROOM_STEPS, PROBE_BLOCKSIZES, DeviceManager,
+                               device_id)
+    from streamMixer import StreamMixer
+
+    devices = [{"index": 0, "name": "Micrófono", "hostapi": "WASAPI", "inputs": 2, "outputs": 0,
+                "default_samplerate": 48000.0},
+               {"index": 1, "name": "Altavoces", "hostapi": "WASAPI", "inputs": 0, "outputs": 2,
+                "default_samplerate": 48000.0}]
+    queries = []
+    restarting = threading.Event()
+
+    def query(rescan=False):
+        queries.append(rescan)
+        if rescan:
+            restarting.set()
+        time.sleep(0.02)  # Lo que tarda PortAudio en enumerar
+        restarting.clear()
+        return [dict(device) for device in devices], (0, 1)
+
+    class ProbeStream(FakeOutputStream):
+        """Runs the callback in real time; blocks smaller than min_stable report an underrun."""
+
+        def start(self):
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+        def _run(self):
+            status = types.SimpleNamespace(output_underflow=self.blocksize < min_stable)
+            period = self.blocksize / self.samplerate
+            next_time = time.perf_counter()
+            while self._running:
+                self.callback(self._block, self.blocksize, None, status)
+                next_time += period
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+
+        def stop(self):
+            self._running = False
+            self._thread.join()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "audio_config.json")
+        manager = DeviceManager(config_path, query=query, signature=lambda: len(devices))
+        rate = manager.startup_rate()
+        start = time.perf_counter()
+        for _ in range(1000):
+            manager.find("output")
+        cached_us = (time.perf_counter() - start) / 1000 * 1e6
+
+        changes = []
+        changed = threading.Event()
+        manager.on_change = lambda added, removed: (changes.append((added, removed)), changed.set())
+        probed = threading.Event()
+        manager.on_probed = lambda blocksize: probed.set()
+        manager.start_watching(is_idle=lambda: True, interval=0.05, stream_factory=ProbeStream)
+        probed.wait(30)
+        default_input_channels = manager.config["input_channels"]  # El micrófono predeterminado es estéreo
+        rescans = queries.count(True)
+        time.sleep(0.5)  # Diez vueltas del vigilante sin cambios en el sistema
+        idle_rescans = queries.count(True) - rescans
+        changed.clear()
+        devices.append({"index": 2, "name": "Interfaz USB", "hostapi": "WASAPI", "inputs": 8, "outputs": 8,
+                        "default_samplerate": 96000.0})
+        plugged_at = time.perf_counter()
+        changed.wait(5)
+        hotplug_ms = (time.perf_counter() - plugged_at) * 1000
+        manager.stop()
+        probed_blocksize = manager.blocksize()
+        manager.select("output", "Interfaz USB, WASAPI")
+        manager.select("input", "Interfaz USB, WASAPI")  # Ocho entradas: se graba en estéreo
+
+        restarted = DeviceManager(config_path, query=query)
+        expected = PROBE_BLOCKSIZES[PROBE_BLOCKSIZES.index(min_stable) + PROBE_HEADROOM_STEPS]
+
+        # Una huella que cambia en cada vuelta fuerza un reinicio continuo mientras se abren streams sin parar
+        overlaps = []
+
+        def open_stream(**kwargs):
+            overlaps.append(restarting.is_set())
+            return FakeOutputStream(**kwargs)
+
+        mixer = StreamMixer(stream_factory=open_stream)
+        racing = DeviceManager(config_path, query=query, signature=itertools.count().__next__)
+        racing.devices()
+        racing.config["blocksizes"][racing.probe_key()] = min_stable
+        rescans = queries.count(True)
+        racing.start_watching(is_idle=lambda: not mixer.is_open(), interval=0.001)
+        deadline = time.perf_counter() + 1.0
+        while time.perf_counter() < deadline:
+            mixer = StreamMixer(stream_factory=open_stream)
+            time.sleep(0.005)  # Hueco sin streams: el vigilante empieza un reinicio y el stream llega a mitad
+            mixer.ensure_stream()
+        racing.stop()
+        race_restarts = queries.count(True) - rescans
+    return {"startup_rate": rate, "cached_find_us": cached_us, "queries": len(queries),
+            "hotplug_ms": hotplug_ms, "plugged": changes[-1][0] if changes else None,
+            "probed_blocksize": probed_blocksize, "input_channels": (default_input_channels,
+                                                                     restarted.config["input_channels"]),
+            "idle_rescans": idle_rescans, "streams_opened": len(overlaps),
+            "race_restarts": race_restarts, "opened_during_restart": sum(overlaps),
+            "ok": rate == 48000 and idle_rescans == 0 and default_input_channels == 2
+            and restarted.config["input_channels"] == MAX_INPUT_CHANNELS and race_restarts > 0 and not any(overlaps)
+            and changes[-1] == (["Interfaz USB, WASAPI"], []) and hotplug_ms < 500
+            and probed_blocksize == expected and restarted.config["output"] == "Interfaz USB, WASAPI"
+            and restarted.startup_rate() == 96000 and device_id(restarted.find("output")) == "Interfaz USB, WASAPI"}
+
+
+def bench_events(cues=20, sample_rate=44100):
+    """Lag from a cue really ending to the engine's "end" event, and CPU used while the console sits idle.
+
+    The true end is a 1 ms poll of the pygame channel, or the output block in which a mapped voice ran
+    out; the event must arrive within one UI frame (16.7 ms). Idle CPU must stay near zero. A queue with
+    an unreadable and a deleted file between two good cues must report both errors and still play and end
+    the good ones.
+    """
+    import pygame
+    import soundfile as sf
+    from audioEngine import AudioEngine
+    from cueCache import CueCache
+    from streamMixer import StreamMixer
+    from deviceManager import init_mixer
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    init_mixer(sample_rate)
+    streams = []
+
+    def factory(**kwargs):
+        streams.append(FakeOutputStream(**kwargs))
+        return streams[-1]
+
+    def pull_in_real_time():
+        period = streams[0].blocksize / sample_rate
+        next_time = time.perf_counter()
+        while pulling:
+            streams[0].pull(1)
+            for channel in list(mixer._channels):
+                if not channel.get_busy() and channel not in true_ends:
+                    true_ends[channel] = time.perf_counter()
+            next_time += period
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for kind, seconds in (("pygame", 0.3), ("mixer", 2.0)):
+            t = np.arange(int(seconds * sample_rate)) / sample_rate
+            paths[kind] = os.path.join(tmp, f"{kind}.wav")
+            sf.write(paths[kind], np.stack([np.sin(2 * np.pi * 440 * t)] * 2, axis=1) * 0.3, sample_rate,
+                     subtype="PCM_16")
+        cache = CueCache()
+        mixer = StreamMixer(sample_rate=sample_rate, channels=2, min_seconds=1.0, stream_factory=factory)
+        cache.is_streamed = mixer.accepts
+        engine = AudioEngine(cache, stream_mixer=mixer)
+        ended = {}
+        engine.events.subscribe("end", lambda kind, data: ended.setdefault(data["voice_id"], time.perf_counter()))
+        mixer.ensure_stream()
+        true_ends = {}
+        pulling = True
+        puller = threading.Thread(target=pull_in_real_time, daemon=True)
+        puller.start()
+
+        lags = {"pygame": [], "mixer": []}
+        for index in range(cues):
+            kind = "pygame" if index % 2 == 0 else "mixer"
+            voice = engine.play(paths[kind])
+            if kind == "pygame":
+                while voice.channel.get_busy():
+                    time.sleep(0.001)  # Referencia: sondeo del canal cada 1 ms
+                true_end = time.perf_counter()
+            else:
+                while voice.channel not in true_ends:
+                    time.sleep(0.001)
+                true_end = true_ends.pop(voice.channel)
+            deadline = time.perf_counter() + 1
+            while voice.id not in ended and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            lags[kind].append((ended.get(voice.id, float("inf")) - true_end) * 1000)
+        pulling = False
+        puller.join()
+
+        garbage, missing = os.path.join(tmp, "roto.wav"), os.path.join(tmp, "borrado.wav")
+        with open(garbage, "wb") as f:
+            f.write(os.urandom(4096))
+        errors, queue_ends = [], []
+        engine.events.subscribe("error", lambda kind, data: errors.append(data["file_path"]))
+        engine.events.subscribe("end", lambda kind, data: queue_ends.append(data["file_path"]))
+        for path in (paths["pygame"], garbage, missing, paths["pygame"], garbage):
+            engine.enqueue(path)
+        deadline = time.perf_counter() + 5
+        while len(queue_ends) < 2 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        queue_survived = queue_ends == [paths["pygame"]] * 2 and errors == [garbage, missing, garbage] \
+            and not engine.play_queue and engine._watcher.is_alive()
+
+        time.sleep(3.5)  # Los medidores de salida caen 20 dB/s hasta -60 dBFS y luego dejan de publicarse
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        time.sleep(2.0)  # Consola en reposo: sin voces no debe despertarse nada
+        idle_cpu_percent = (time.process_time() - cpu) / (time.perf_counter() - wall) * 100
+        mixer.close()
+        engine.shutdown()
+        pygame.mixer.stop()
+
+    every = lags["pygame"] + lags["mixer"]
+    return {"end_lag_p50_ms": {kind: float(np.median(values)) for kind, values in lags.items()},
+            "end_lag_max_ms": float(max(every)), "idle_cpu_percent": idle_cpu_percent,
+            "queue_survived": queue_survived,
+            "ok": max(every) < 1000 / 60 and idle_cpu_percent < 1.0 and queue_survived}
+
+
+def bench_meter(blocks=5000):
+    """Per-block metering cost in the audio callback against the block period (must stay under 1%), with
+    no allocation per block. A 0.5 amplitude sine must read -6.0 dBFS peak and -9.0 dBFS RMS once settled.
+    """
+    import tracemalloc
+    from levelMeter import METER_FPS, LevelMeter
+
+    results = {}
+    for sample_rate, channels, blocksize in ((44100, 2, 1024), (48000, 8, 256), (48000, 2, 512)):
+        t = np.arange(blocksize * 64) / sample_rate
+        signal = (0.5 * np.sin(2 * np.pi * 997 * t)).astype(np.float32)
+        frames = np.repeat(signal[:, None], channels, axis=1).reshape(64, blocksize, channels)
+        meter = LevelMeter(channels, sample_rate, max_frames=blocksize * 4)
+        start = time.perf_counter()
+        for index in range(blocks):
+            meter.process(frames[index % 64])
+        per_block_ms = (time.perf_counter() - start) * 1000 / blocks
+        tracemalloc.start()
+        for index in range(200):
+            meter.process(frames[index % 64])
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        meter.reset()
+        blocks_per_frame = max(1, sample_rate // METER_FPS // blocksize)
+        read_ms = []
+        for index in range(60):  # Dos segundos de fotogramas de la UI
+            for block in range(blocks_per_frame):
+                meter.process(frames[(index * blocks_per_frame + block) % 64])
+            start = time.perf_counter()
+            levels = meter.read()
+            read_ms.append((time.perf_counter() - start) * 1000)
+        period_ms = blocksize / sample_rate * 1000
+        results[f"{channels}ch/{blocksize}@{sample_rate}"] = {
+            "per_block_us": per_block_ms * 1000, "percent_of_period": per_block_ms / period_ms * 100,
+            "peak_alloc_bytes": peak_bytes, "read_us": float(np.median(read_ms)) * 1000,
+            "peak_dbfs": levels["peak"][0], "rms_dbfs": levels["rms"][0]}
+    return {**results, "ok": all(r["percent_of_period"] < 1.0 and r["peak_alloc_bytes"] < 4096
+                                 and abs(r["peak_dbfs"] + 6.02) < 0.1 and abs(r["rms_dbfs"] + 9.03) < 0.1
+                                 for r in results.values())}
+
+
+def bench_telemetry(spans=100000):
+    """Cost of a timing span and of a logged event; spans must stay cheap enough to leave on in a show."""
+    from telemetry import SLOW_SPAN_MS, Telemetry
+
+    telemetry = Telemetry()
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "consola.log")
+        telemetry.start(log_path, max_bytes=64 * 1024, backups=2)
+
+        @telemetry.timed("bench.timed")
+        def work():
+            pass
+
+        start = time.perf_counter()
+        for _ in range(spans):
+            work()
+        span_us = (time.perf_counter() - start) / spans * 1e6
+        start = time.perf_counter()
+        for index in range(2000):
+            telemetry.record_span("bench.lento", SLOW_SPAN_MS + index)  # Cada una va al registro
+        event_us = (time.perf_counter() - start) / 2000 * 1e6
+        telemetry.stop()
+        files = sorted(os.listdir(tmp))
+        with open(log_path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+    stats = telemetry.summary()["spans"]["bench.timed"]
+    return {"span_us": span_us, "logged_event_us": event_us, "log_files": files, "last_kind": lines[-1]["kind"],
+            "ok": span_us < 20 and event_us < 200 and stats["count"] == spans and len(files) == 3}
+
+
+SCENARIOS = {
+    "recorder": bench_recorder,
+    "long_take": bench_long_take,
+    "library": bench_library,
+    "grid": bench_grid,
+    "search": bench_search,
+    "scanner": bench_scanner,
+    "metadata": bench_metadata,
+    "loudness": bench_loudness,
+    "import": bench_import,
+    "voices": bench_voices,
+    "memmap": bench_memmap,
+    "seek": bench_seek,
+    "go": bench_go,
+    "cues": bench_cues,
+    "triggers": bench_triggers,
+    "remote": bench_remote,
+    "video": bench_video,
+    "devices": bench_devices,
+    "events": bench_events,
+    "meter": bench_meter,
+    "telemetry": bench_telemetry,
+}
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks_baseline.json")
+TOLERANCE = 0.5  # Empeorar más de un 50 % respecto a la línea base es una regresión
+# Sufijo de la métrica -> margen absoluto por debajo del cual una diferencia se toma como ruido
+LOWER_IS_BETTER = {"_ms": 2.0, "_us": 2.0, "_s": 0.05, "_mb": 1.0, "_bytes": 1024, "_percent": 0.5}
+HIGHER_IS_BETTER = {"_per_s": 0.0, "_fps": 1.0, "_x": 1.0}
+
+
+def flatten(result, prefix=""):
+    """Numeric metrics of a scenario result as {"a.b.c": value}; flags and lists are left out."""
+    metrics = {}
+    for key, value in result.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[path] = value
+    return metrics
+
+
+def direction(metric):
+    """(+1 lower is better / -1 higher is better, noise margin), or None for metrics without units."""
+    for suffixes, sign in ((HIGHER_IS_BETTER, -1), (LOWER_IS_BETTER, 1)):
+        for suffix, margin in suffixes.items():
+            if metric.endswith(suffix):
+                return sign, margin
+    return None
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Regressions of results against baseline: [(scenario, metric, baseline, current)]."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not isinstance(result, dict) or not isinstance(before, dict):
+            continue
+        previous = flatten(before)
+        for metric, value in flatten(result).items():
+            rule = direction(metric)
+            if rule is None or metric not in previous:
+                continue
+            sign, margin = rule
+            worse = (value - previous[metric]) * sign
+            if worse > margin and worse > abs(previous[metric]) * tolerance:
+                regressions.append((name, metric, previous[metric], value))
+    return regressions
+
+
+def machine():
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "numpy": np.__version__}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento sin interfaz de la consola.")
+    parser.add_argument("scenarios", nargs="*", help="escenarios a correr (por defecto, todos)")
+    parser.add_argument("--list", action="store_true", help="mostrar los escenarios y salir")
+    parser.add_argument("--json", metavar="RUTA", help="guardar los resultados en JSON")
+    parser.add_argument("--baseline", metavar="RUTA", default=BASELINE_PATH, help="línea base a comparar")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="guardar estos resultados como línea base en vez de comparar")
+    parser.add_argument("--no-baseline", action="store_true", help="no comparar con ninguna línea base")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="empeoramiento relativo tolerado (0.5 = 50 %%)")
+    args = parser.parse_args(argv)
+    if args.list:
+        for name, scenario in SCENARIOS.items():
+            print(f"{name:<12}{' '.join((scenario.__doc__ or '').split(chr(10) * 2)[0].split())}")
+        return 0
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"escenarios desconocidos: {', '.join(unknown)}")
+    if not args.save_baseline and not args.no_baseline and not os.path.exists(args.baseline):
+        # Sin esto una corrida sin línea base no compara nada y siempre pasa
+        print(f"ERROR: no existe la línea base {args.baseline}; créela con --save-baseline o corra con "
+              "--no-baseline para mirar sólo los \"ok\"", file=sys.stderr)
+        return 2
+
+    failed = []
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        result = SCENARIOS[name]()
+        results[name] = result
+        print(f"{name}: {result}")
+        if isinstance(result, dict) and result.get("ok") is False:
+            failed.append(name)
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "machine": machine(), "results": results}
+
+    regressions = []
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        # Se reemplazan sólo los escenarios corridos; el resto de la línea base se conserva
+        report["results"] = {**baseline.get("results", {}), **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Línea base guardada en {args.baseline}")
+        report["results"] = results
+    elif not args.no_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if baseline.get("machine") != report["machine"]:
+            print("Aviso: la línea base se tomó en otra máquina; las diferencias pueden no ser regresiones")
+        for name, metric, before, now in regressions:
+            print(f"REGRESIÓN {name}.{metric}: {before:.4g} -> {now:.4g}")
+    report["failed"] = failed
+    report["regressions"] = [{"scenario": name, "metric": metric, "baseline": before, "current": now}
+                             for name, metric, before, now in regressions]
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=str)
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import os
+import queue
+import threading
+
+from audioMetadata import file_hash
+
+
+class BlobStore:
+    """Audios guardados por contenido: el archivo se llama como su hash y el nombre vive en la biblioteca."""
+
+    def __init__(self, root):
+        self.root = root
+        self.on_corrupt = None  # Callback (hilo de fondo) cuando un blob ya no coincide con su hash
+        self.verified = {}  # blob_path -> (mtime_ns, tamaño) de la última verificación correcta
+        self.corrupt = set()
+        self._lock = threading.Lock()
+        self._jobs = queue.Queue()
+        self._worker = None
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, digest, extension):
+        # Dos niveles para no llenar un solo directorio con miles de archivos
+        return os.path.join(self.root, digest[:2], f"{digest}{extension.lower()}")
+
+    def contains(self, file_path):
+        return os.path.normcase(os.path.abspath(file_path)).startswith(
+            os.path.normcase(os.path.abspath(self.root)) + os.sep)
+
+    def put(self, file_path, digest=None):
+        """Move a finished file into the store; identical content reuses the existing blob.
+
+        Returns (blob_path, reclaimed_bytes); reclaimed_bytes > 0 means the file was a duplicate.
+        """
+        digest = digest or file_hash(file_path)
+        blob_path = self.path_for(digest, os.path.splitext(file_path)[1])
+        if os.path.normcase(os.path.abspath(file_path)) == os.path.normcase(os.path.abspath(blob_path)):
+            return blob_path, 0
+        if os.path.exists(blob_path):
+            size = os.path.getsize(file_path)
+            os.remove(file_path)
+            return blob_path, size
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(file_path, blob_path)
+        stat = os.stat(blob_path)
+        with self._lock:
+            self.verified[blob_path] = (stat.st_mtime_ns, stat.st_size)
+            self.corrupt.discard(blob_path)
+        return blob_path, 0
+
+    def is_verified(self, blob_path):
+        try:
+            stat = os.stat(blob_path)
+        except OSError:
+            return False
+        with self._lock:
+            return self.verified.get(blob_path) == (stat.st_mtime_ns, stat.st_size)
+
+    def verify(self, blob_path):
+        """Re-hash a blob and compare with its name; unchanged files are not read again."""
+        if self.is_verified(blob_path):
+            return True
+        stat = os.stat(blob_path)
+        digest = os.path.splitext(os.path.basename(blob_path))[0]
+        ok = file_hash(blob_path) == digest
+        with self._lock:
+            if ok:
+                self.verified[blob_path] = (stat.st_mtime_ns, stat.st_size)
+                self.corrupt.discard(blob_path)
+            else:
+                self.corrupt.add(blob_path)
+        return ok
+
+    def verify_later(self, blob_paths):
+        """Queue blobs for a background check; on_corrupt fires for each one that fails."""
+        pending = [path for path in blob_paths if self.contains(path) and not self.is_verified(path)]
+        with self._lock:
+            for blob_path in pending:
+                self._jobs.put(blob_path)
+            if self._worker is None and not self._jobs.empty():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            try:
+                blob_path = self._jobs.get(timeout=1.0)
+            except queue.Empty:
+                with self._lock:
+                    if self._jobs.empty():
+                        self._worker = None
+                        return
+                continue
+            try:
+                ok = self.verify(blob_path)
+            except FileNotFoundError:
+                continue  # El escáner ya marca los cues sin archivo
+            except OSError as e:
+                print(f"No se pudo verificar '{os.path.basename(blob_path)}': {e}")
+                continue
+            if not ok:
+                print(f"El archivo '{os.path.basename(blob_path)}' está dañado (no coincide con su hash)")
+                if self.on_corrupt:
+                    self.on_corrupt(blob_path)
+
+    def migrate(self, audios):
+        """Move every entry's file into the store, merging duplicates.
+
+        Entries are updated in place. Returns {"moved", "deduplicated", "reclaimed_bytes", "missing"}.
+        """
+        report = {"moved": 0, "deduplicated": 0, "reclaimed_bytes": 0, "missing": 0}
+        moved = {}  # ruta antigua -> blob, para entradas que compartían archivo
+        for audio in audios:
+            old_path = audio["file_path"]
+            if self.contains(old_path):
+                continue
+            if old_path in moved:
+                audio["file_path"] = moved[old_path]
+                continue
+            if not os.path.exists(old_path):
+                report["missing"] += 1
+                continue
+            try:
+                blob_path, reclaimed = self.put(old_path)
+            except OSError as e:
+                print(f"No se pudo migrar '{os.path.basename(old_path)}': {e}")
+                continue
+            moved[old_path] = audio["file_path"] = blob_path
+            report["moved"] += 1
+            if reclaimed:
+                report["deduplicated"] += 1
+                report["reclaimed_bytes"] += reclaimed
+        return report
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+DEFAULT_BUDGET_MB = 512
+GAIN_CHUNK_SAMPLES = 1 << 20  # Muestras por pasada al aplicar la ganancia de normalización
+
+
+class CueCache:
+    """Caché LRU de cues ya decodificados en memoria (pygame.mixer.Sound)."""
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.latencies = {}  # file_path -> (ms, hit) de la última reproducción
+        self.gains = {}  # file_path -> ganancia de normalización (dB) aplicada al decodificar
+        self._sounds = OrderedDict()  # file_path -> (sound, size_bytes)
+        self._lock = threading.Lock()
+        self._loading = set()  # file_path que se están decodificando ahora mismo
+        self._pinned = {}  # file_path -> nº de fijaciones; la LRU no los expulsa (p. ej. el cue en espera)
+        self._preload_queue = []
+        self.is_streamed = lambda file_path: False  # Cues que se reproducen sin decodificar (mapeados)
+        self._preload_thread = None
+
+    def sound_size(self, sound):
+        """Bytes que ocupa un Sound decodificado en el formato del mixer."""
+        frequency, fmt, channels = pygame.mixer.get_init()
+        frames = int(round(sound.get_length() * frequency))
+        return frames * channels * (abs(fmt) // 8)
+
+    def get(self, file_path):
+        """Return the decoded Sound for a cue, decoding it on a cache miss."""
+        with self._lock:
+            entry = self._sounds.get(file_path)
+            if entry is not None:
+                self._sounds.move_to_end(file_path)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        sound = self._decode(file_path)
+        self._insert(file_path, sound)
+        return sound
+
+    def _decode(self, file_path):
+        with self._lock:
+            self._loading.add(file_path)
+        try:
+            sound = pygame.mixer.Sound(file_path)
+            gain_db = self.gains.get(file_path, 0.0)
+            if gain_db:
+                self.apply_gain(sound, gain_db)
+            return sound
+        finally:
+            with self._lock:
+                self._loading.discard(file_path)
+
+    @staticmethod
+    def apply_gain(sound, gain_db):
+        """Scale a decoded Sound in place, with clipping; done once per decode, never per play."""
+        samples = pygame.sndarray.samples(sound).reshape(-1)
+        factor = 10 ** (gain_db / 20)
+        info = np.iinfo(samples.dtype) if samples.dtype.kind == "i" else None
+        for start in range(0, len(samples), GAIN_CHUNK_SAMPLES):
+            chunk = samples[start:start + GAIN_CHUNK_SAMPLES]
+            scaled = chunk * np.float32(factor)
+            if info is not None:
+                np.clip(np.rint(scaled, out=scaled), info.min, info.max, out=scaled)
+            chunk[:] = scaled
+
+    def set_gain(self, file_path, gain_db):
+        """Set a cue's normalization gain; a cached copy decoded with another gain is dropped."""
+        gain_db = float(gain_db or 0.0)
+        if self.gains.get(file_path, 0.0) == gain_db:
+            return False
+        self.gains[file_path] = gain_db
+        self.evict(file_path)
+        return True
+
+    def contains(self, file_path):
+        with self._lock:
+            return file_path in self._sounds
+
+    def is_loading(self, file_path):
+        """True while the file is open for decoding."""
+        with self._lock:
+            return file_path in self._loading
+
+    def _insert(self, file_path, sound):
+        size = self.sound_size(sound)
+        if size > self.budget_bytes:
+            return False  # Demasiado grande: se reproduce pero no se retiene
+        with self._lock:
+            if file_path in self._sounds:
+                self._sounds.move_to_end(file_path)
+                return True
+            while self.used_bytes + size > self.budget_bytes:
+                victim = next((path for path in self._sounds if path not in self._pinned), None)
+                if victim is None:
+                    return False  # Sólo quedan cues fijados: se reproduce pero no se retiene
+                self.used_bytes -= self._sounds.pop(victim)[1]
+            self._sounds[file_path] = (sound, size)
+            self.used_bytes += size
+        return True
+
+    def pin(self, file_path):
+        """Keep a cue out of LRU eviction until the matching unpin()."""
+        with self._lock:
+            self._pinned[file_path] = self._pinned.get(file_path, 0) + 1
+
+    def unpin(self, file_path):
+        with self._lock:
+            count = self._pinned.pop(file_path, 0) - 1
+            if count > 0:
+                self._pinned[file_path] = count
+
+    def evict(self, file_path):
+        with self._lock:
+            self._preload_queue = [path for path in self._preload_queue if path != file_path]
+            entry = self._sounds.pop(file_path, None)
+            if entry is not None:
+                self.used_bytes -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._sounds.clear()
+            self.used_bytes = 0
+
+    def preload(self, file_paths):
+        """Decode cues in a background thread until the budget is full."""
+        with self._lock:
+            self._preload_queue.extend(file_paths)
+            if self._preload_thread and self._preload_thread.is_alive():
+                return
+            self._preload_thread = threading.Thread(target=self._preload_worker, daemon=True)
+            self._preload_thread.start()
+
+    def _preload_worker(self):
+        while True:
+            with self._lock:
+                if not self._preload_queue:
+                    self._preload_thread = None
+                    return
+                file_path = self._preload_queue.pop(0)
+                if file_path in self._sounds or self.is_streamed(file_path):
+                    continue
+                budget_left = self.budget_bytes - self.used_bytes
+            if not os.path.exists(file_path):
+                continue
+            # La precarga nunca expulsa cues: sólo ocupa el espacio libre
+            if os.path.getsize(file_path) > budget_left and file_path.lower().endswith(".wav"):
+                continue
+            try:
+                sound = self._decode(file_path)
+            except pygame.error as e:
+                print(f"Error al precargar '{os.path.basename(file_path)}': {e}")
+                continue
+            if self.sound_size(sound) <= self.budget_bytes - self.used_bytes:
+                self._insert(file_path, sound)
+
+    def record_latency(self, file_path, started_at, hit):
+        """Store press-to-play latency (ms) for a cue and return it."""
+        latency_ms = (time.perf_counter() - started_at) * 1000
+        self.latencies[file_path] = (latency_ms, hit)
+        return latency_ms
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached": len(self._sounds),
+                "used_mb": self.used_bytes / (1024 * 1024),
+                "budget_mb": self.budget_bytes / (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,142 @@
+import math
+
+import customtkinter as ctk
+
+
+class CueGrid(ctk.CTkFrame):
+    """Rejilla virtualizada: sólo existen celdas para las filas visibles y se reciclan al desplazar."""
+
+    def __init__(self, master, create_cell, bind_cell, columns=4, row_height=156, padding=8, **kwargs):
+        super().__init__(master, **kwargs)
+        self.create_cell = create_cell  # create_cell(parent) -> frame reutilizable
+        self.bind_cell = bind_cell  # bind_cell(cell, item) vuelca un item en una celda existente
+        self.columns = columns
+        self.row_height = row_height
+        self.padding = padding
+        self.items = []
+        self.scroll_px = 0
+        self.pool = []  # filas recicladas; cada una guarda sus celdas en row.cells
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.body.bind("<Configure>", lambda event: self.render())
+        self.bind("<Enter>", self.bind_mousewheel)
+        self.bind("<Leave>", self.unbind_mousewheel)
+
+    def bind_mousewheel(self, event=None):
+        self.bind_all("<MouseWheel>", self.on_mousewheel)
+        # X11 entrega la rueda como botones 4 y 5
+        self.bind_all("<Button-4>", self.on_mousewheel)
+        self.bind_all("<Button-5>", self.on_mousewheel)
+
+    def unbind_mousewheel(self, event=None):
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.unbind_all(sequence)
+
+    def row_count(self):
+        return math.ceil(len(self.items) / self.columns)
+
+    def max_scroll(self):
+        return max(0, self.row_count() * self.row_height - self.body.winfo_height())
+
+    def set_items(self, items, rebind=True):
+        """Replace the whole item list; nothing is rebuilt. With rebind=False only cells whose item changed
+        are rebound (filtering), otherwise every visible cell is."""
+        self.items = list(items)
+        self.scroll_px = min(self.scroll_px, self.max_scroll())
+        self.render(force=rebind)
+
+    def insert(self, item, index=None):
+        self.items.insert(len(self.items) if index is None else index, item)
+        self.render()
+
+    def remove(self, item):
+        self.items = [i for i in self.items if i is not item]
+        self.scroll_px = min(self.scroll_px, self.max_scroll())
+        self.render()
+
+    def update_item(self, item):
+        """Rebind the cell showing item, if it is on screen."""
+        for cell in self.visible_cells():
+            if cell.item is item:
+                self.bind_cell(cell, item)
+
+    def visible_cells(self):
+        return [cell for row in self.pool for cell in row.cells if cell.item is not None]
+
+    def scroll_to(self, pixels):
+        self.scroll_px = max(0, min(int(pixels), self.max_scroll()))
+        self.render()
+
+    def on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self.row_count() * self.row_height)
+        elif args[0] == "scroll":
+            step = self.row_height if args[2] == "units" else self.body.winfo_height()
+            self.scroll_to(self.scroll_px + int(args[1]) * step)
+
+    def on_mousewheel(self, event):
+        if getattr(event, "num", None) == 4:
+            delta = -1
+        elif getattr(event, "num", None) == 5:
+            delta = 1
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self.scroll_to(self.scroll_px + delta * self.row_height // 3)
+
+    def _ensure_pool(self):
+        visible_rows = math.ceil(max(self.body.winfo_height(), 1) / self.row_height) + 1
+        while len(self.pool) < visible_rows:
+            row = ctk.CTkFrame(self.body, height=self.row_height, fg_color="transparent")
+            row.grid_propagate(False)
+            row.grid_rowconfigure(0, weight=1)
+            row.cells = []
+            for c in range(self.columns):
+                row.grid_columnconfigure(c, weight=1, uniform="cue")
+                cell = self.create_cell(row)
+                cell.item = None
+                cell.grid(row=0, column=c, padx=self.padding / 2, pady=self.padding / 2, sticky="nsew")
+                cell.grid_remove()
+                row.cells.append(cell)
+            self.pool.append(row)
+
+    def render(self, force=False):
+        """Place pool rows over the rows in view, rebinding only cells whose item changed."""
+        self._ensure_pool()
+        first_row = self.scroll_px // self.row_height
+        offset = self.scroll_px % self.row_height
+        for r, row in enumerate(self.pool):
+            if (first_row + r) * self.columns >= len(self.items):
+                row.place_forget()
+                for cell in row.cells:
+                    if cell.item is not None:
+                        cell.item = None
+                        cell.grid_remove()
+                continue
+            row.place(relx=0, relwidth=1, y=r * self.row_height - offset)
+            for c, cell in enumerate(row.cells):
+                index = (first_row + r) * self.columns + c
+                if index >= len(self.items):
+                    if cell.item is not None:
+                        cell.item = None
+                        cell.grid_remove()
+                    continue
+                item = self.items[index]
+                if force or cell.item is not item:
+                    if cell.item is None:
+                        cell.grid()
+                    self.bind_cell(cell, item)
+                    cell.item = item
+
+        total = self.row_count() * self.row_height
+        if total <= 0:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.scroll_px / total,
+                               min(1, (self.scroll_px + self.body.winfo_height()) / total))
@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Opciones de cada cue de la lista; los tiempos de fundido sustituyen a los del audio
+CUE_DEFAULTS = {
+    "pre_wait": 0.0,  # Segundos entre el GO y el arranque
+    "fade_in_ms": 0,
+    "fade_out_ms": 0,
+    "auto_follow": False,  # Al terminar este cue se dispara el siguiente
+    "stop_others": False,  # Para (con su fundido) todo lo que suena antes de arrancar
+}
+
+
+class CueList:
+    """Lista ordenada del espectáculo (show.json): GO dispara el cue en espera, que ya está armado."""
+
+    def __init__(self, engine, show_path, resolve):
+        self.engine = engine
+        self.show_path = show_path
+        self.resolve = resolve  # resolve(audio_id) -> entrada de la biblioteca o None si se borró
+        self.cues = []  # {"audio_id", **CUE_DEFAULTS}
+        self.standby = 0  # Índice del cue que dispara el próximo GO
+        self.on_changed = None  # Callback (cualquier hilo) cuando cambia la lista, el cue en espera o el armado
+        self.go_latencies = deque(maxlen=200)  # ms desde el GO hasta que el cue está sonando (sin pre-espera)
+        self._armed = None  # (índice, file_path, Sound o fuente de prepare())
+        self._arming = 0  # Serie del último armado pedido; los anteriores se descartan al terminar
+        self._follow = {}  # voice_id -> índice del cue que sigue automáticamente
+        self._timers = set()  # Pre-esperas en curso
+        self._lock = threading.RLock()
+        self.load()
+        engine.events.subscribe("end", self.on_voice_end)
+
+    def load(self):
+        try:
+            with open(self.show_path, "r", encoding="utf-8") as f:
+                show = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error al cargar la lista de cues: {e}")
+            return
+        self.cues = [dict(CUE_DEFAULTS, **cue) for cue in show.get("cues", []) if "audio_id" in cue]
+        self.standby = max(0, min(int(show.get("standby", 0)), len(self.cues)))
+
+    def save(self):
+        """Write show.json atomically, so a crash never leaves a half-written show."""
+        temp_path = self.show_path + ".tmp"
+        with self._lock:
+            show = {"standby": self.standby, "cues": self.cues}
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(show, f, indent=4, ensure_ascii=False)
+                os.replace(temp_path, self.show_path)
+            except OSError as e:
+                print(f"Error al guardar la lista de cues: {e}")
+
+    def _changed(self):
+        self.save()
+        self.arm()
+        self._notify()
+
+    def _notify(self):
+        if self.on_changed:
+            self.on_changed()
+
+    def audio_for(self, index):
+        with self._lock:
+            if not 0 <= index < len(self.cues):
+                return None
+            return self.resolve(self.cues[index]["audio_id"])
+
+    def add(self, audio, index=None, **options):
+        """Insert a library audio as a cue (at the end by default); fades start from the audio's own."""
+        cue = dict(CUE_DEFAULTS, fade_in_ms=audio.get("fade_in_ms", 0), fade_out_ms=audio.get("fade_out_ms", 0))
+        cue.update(options, audio_id=audio["id"])
+        with self._lock:
+            index = len(self.cues) if index is None else index
+            self.cues.insert(index, cue)
+            if index < self.standby:
+                self.standby += 1
+        self._changed()
+
+    def remove(self, index):
+        with self._lock:
+            del self.cues[index]
+            if index < self.standby:
+                self.standby -= 1
+            self.standby = min(self.standby, len(self.cues))
+        self._changed()
+
+    def move(self, index, offset):
+        with self._lock:
+            target = index + offset
+            if not 0 <= target < len(self.cues):
+                return
+            self.cues[index], self.cues[target] = self.cues[target], self.cues[index]
+            if self.standby in (index, target):
+                self.standby = target if self.standby == index else index
+        self._changed()
+
+    def update(self, index, **options):
+        with self._lock:
+            self.cues[index].update((key, value) for key, value in options.items() if key in CUE_DEFAULTS)
+        self._changed()
+
+    def set_standby(self, index):
+        with self._lock:
+            self.standby = max(0, min(index, len(self.cues)))
+        self._changed()
+
+    def is_armed(self, index=None):
+        with self._lock:
+            index = self.standby if index is None else index
+            return self._armed is not None and self._armed[0] == index
+
+    def arm(self):
+        """Decode or map the standby cue in the background and keep it pinned until GO."""
+        with self._lock:
+            index = self.standby
+            audio = self.audio_for(index)
+            file_path = audio["file_path"] if audio else None
+            if self._armed is not None and self._armed[:2] == (index, file_path):
+                return
+            self._release()
+            self._arming += 1
+            serial = self._arming
+        if file_path is None or not os.path.exists(file_path):
+            return
+        threading.Thread(target=self._arm, args=(serial, index, file_path), daemon=True).start()
+
+    def _arm(self, serial, index, file_path):
+        try:
+            sound = self.engine.prepare(file_path)
+        except Exception as e:
+            print(f"No se pudo armar '{os.path.basename(file_path)}': {e}")
+            return
+        with self._lock:
+            if serial != self._arming:
+                return  # Mientras tanto cambió el cue en espera
+            self.engine.cue_cache.pin(file_path)
+            self._armed = (index, file_path, sound)
+        self._notify()
+
+    def _release(self):
+        if self._armed is not None:
+            self.engine.cue_cache.unpin(self._armed[1])
+            self._armed = None
+
+    def go(self, pressed_at=None):
+        """Fire the standby cue and arm the next one; runs on the engine worker. Returns the voice or None."""
+        pressed_at = pressed_at or time.perf_counter()
+        with self._lock:
+            index = self.standby
+            if not 0 <= index < len(self.cues):
+                return None
+            cue = dict(self.cues[index])
+            if self._armed is not None and self._armed[0] != index:
+                self._release()
+            armed, self._armed = self._armed, None
+            self._arming += 1  # Un armado en curso del mismo cue ya no sirve
+            self.standby = index + 1
+        voice = None
+        if cue["pre_wait"] > 0:
+            timer = threading.Timer(cue["pre_wait"], self._fire_later, args=(index, cue, armed))
+            timer.daemon = True
+            with self._lock:
+                self._timers.add(timer)
+            timer.start()
+        else:
+            voice = self._fire(index, cue, armed, pressed_at)
+        self.save()
+        self.arm()
+        self._notify()
+        return voice
+
+    def _fire_later(self, index, cue, armed):
+        with self._lock:
+            self._timers.discard(threading.current_thread())
+        self.engine.submit(self._fire, index, cue, armed, time.perf_counter())
+
+    def _fire(self, index, cue, armed, started_at):
+        audio = self.resolve(cue["audio_id"])
+        if armed is not None:
+            self.engine.cue_cache.unpin(armed[1])
+        if audio is None:
+            print(f"El cue {index + 1} ya no está en la biblioteca")
+            return None
+        file_path = audio["file_path"]
+        sound = armed[2] if armed is not None and armed[1] == file_path else None
+        if cue["stop_others"]:
+            self.engine.stop_all()
+        voice = self.engine.play(file_path, volume=audio.get("volume", 1.0), fade_in_ms=cue["fade_in_ms"],
+                                 fade_out_ms=cue["fade_out_ms"], sound=sound)
+        self.go_latencies.append((time.perf_counter() - started_at) * 1000)
+        if cue["auto_follow"]:
+            with self._lock:
+                self._follow[voice.id] = index + 1
+        self._notify()
+        return voice
+
+    def on_voice_end(self, kind, data):
+        """Engine "end" event: fire the auto-follow cue if the voice reached its end (not stopped by hand)."""
+        with self._lock:
+            next_index = self._follow.pop(data["voice_id"], None)
+        if data["completed"] and next_index is not None and next_index == self.standby:
+            self.engine.submit(self.go)
+
+    def cancel_pending(self):
+        """Drop pre-waits and auto-follows in flight (panic stop)."""
+        with self._lock:
+            timers, self._timers = self._timers, set()
+            self._follow.clear()
+        for timer in timers:
+            timer.cancel()
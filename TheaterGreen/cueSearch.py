@@ -0,0 +1,172 @@
+import bisect
+import re
+import unicodedata
+
+FUZZY_MIN_LENGTH = 4  # Términos más cortos sólo buscan por prefijo: con una letra de error casi todo coincide
+SEARCH_FIELDS = ("name", "description")  # Además de las etiquetas (tags)
+COMBINING_MARKS = re.compile("[\u0300-\u036f]")  # Tildes, diéresis y demás marcas que NFKD separa de la letra
+WORD = re.compile(r"\w+")
+
+
+def fold(text):
+    """Lowercase without accents, so "canción" and "cancion" are the same word."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    return COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", text))
+
+
+def tokenize(text):
+    return WORD.findall(fold(text))
+
+
+def deletes(token):
+    """The token with each single character removed: two words within one edit share one of these."""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def within_one_edit(a, b):
+    """True if a and b differ by at most one insertion, deletion, substitution or adjacent swap."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    start = 0
+    while start < min(len(a), len(b)) and a[start] == b[start]:
+        start += 1
+    if len(a) == len(b):
+        if a[start + 1:] == b[start + 1:]:
+            return True
+        return a[start:start + 2] == b[start:start + 2][::-1] and a[start + 2:] == b[start + 2:]
+    shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+    return shorter[start:] == longer[start + 1:]
+
+
+class SearchIndex:
+    """Índice invertido en memoria sobre el nombre, la descripción y las etiquetas de los cues.
+
+    Un término coincide con las palabras que empiezan por él (vocabulario ordenado + bisect) y, si tiene
+    FUZZY_MIN_LENGTH letras o más, con las que están a una edición de distancia (índice de borrados, como
+    SymSpell). Varios términos se combinan con Y. Añadir, quitar o renombrar un cue toca sólo sus palabras.
+    Los cues se identifican por identidad, igual que en la rejilla.
+    """
+
+    def __init__(self, audios=()):
+        self.postings = {}  # palabra -> ids de los cues que la contienen
+        self.vocabulary = []  # Palabras ordenadas, para los rangos de prefijo
+        self.neighbours = {}  # palabra con una letra borrada -> palabras del vocabulario que la generan
+        self.documents = {}  # id(audio) -> (audio, palabras)
+        # Carga inicial en bloque: el vocabulario se ordena una vez en vez de insertar palabra a palabra
+        for audio in audios:
+            words = self.words(audio)
+            self.documents[id(audio)] = (audio, words)
+            for word in words:
+                self.postings.setdefault(word, set()).add(id(audio))
+        self.vocabulary = sorted(self.postings)
+        for word in self.vocabulary:
+            for variant in deletes(word):
+                self.neighbours.setdefault(variant, set()).add(word)
+
+    @staticmethod
+    def words(audio):
+        texts = [audio.get(field) or "" for field in SEARCH_FIELDS]
+        texts.extend(audio.get("tags") or ())
+        return set(tokenize(" ".join(texts)))
+
+    def add(self, audio):
+        if id(audio) in self.documents:
+            self.update(audio)
+            return
+        words = self.words(audio)
+        self.documents[id(audio)] = (audio, words)
+        for word in words:
+            self._add_posting(word, id(audio))
+
+    def remove(self, audio):
+        entry = self.documents.pop(id(audio), None)
+        if entry is None:
+            return
+        for word in entry[1]:
+            self._remove_posting(word, id(audio))
+
+    def update(self, audio):
+        """Re-index a renamed or edited cue; only the words that changed are touched."""
+        entry = self.documents.get(id(audio))
+        if entry is None:
+            self.add(audio)
+            return
+        words = self.words(audio)
+        for word in entry[1] - words:
+            self._remove_posting(word, id(audio))
+        for word in words - entry[1]:
+            self._add_posting(word, id(audio))
+        self.documents[id(audio)] = (audio, words)
+
+    def sync(self, audios):
+        """Bring the index in line with a whole list: new cues are added, missing ones removed."""
+        present = {id(audio): audio for audio in audios}
+        for key in [key for key in self.documents if key not in present]:
+            self.remove(self.documents[key][0])
+        for key, audio in present.items():
+            if key not in self.documents:
+                self.add(audio)
+
+    def _add_posting(self, word, key):
+        documents = self.postings.get(word)
+        if documents is None:
+            documents = self.postings[word] = set()
+            bisect.insort(self.vocabulary, word)
+            for variant in deletes(word):
+                self.neighbours.setdefault(variant, set()).add(word)
+        documents.add(key)
+
+    def _remove_posting(self, word, key):
+        documents = self.postings.get(word)
+        if documents is None:
+            return
+        documents.discard(key)
+        if documents:
+            return
+        del self.postings[word]
+        del self.vocabulary[bisect.bisect_left(self.vocabulary, word)]
+        for variant in deletes(word):
+            words = self.neighbours.get(variant)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self.neighbours[variant]
+
+    def _matching_words(self, term):
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + "\U0010ffff")
+        words = set(self.vocabulary[start:end])
+        if len(term) >= FUZZY_MIN_LENGTH:
+            candidates = set(self.neighbours.get(term, ()))  # Al término le falta una letra
+            for variant in deletes(term):
+                if variant in self.postings:
+                    candidates.add(variant)  # Le sobra una
+                candidates.update(self.neighbours.get(variant, ()))  # Tiene una cambiada o dos cruzadas
+            words.update(word for word in candidates if within_one_edit(term, word))
+        return words
+
+    def match(self, query):
+        """ids of the cues matching every term of query, or None for an empty query (everything)."""
+        terms = tokenize(query)
+        if not terms:
+            return None
+        result = None
+        for term in sorted(set(terms), key=len, reverse=True):  # Los términos largos filtran más
+            keys = set()
+            for word in self._matching_words(term):
+                keys |= self.postings[word]
+            result = keys if result is None else result & keys
+            if not result:
+                return set()
+        return result
+
+    def filter(self, query, audios):
+        """The cues of audios that match query, in their original order."""
+        keys = self.match(query)
+        if keys is None:
+            return list(audios)
+        return [audio for audio in audios if id(audio) in keys]
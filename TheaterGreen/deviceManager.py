@@ -0,0 +1,306 @@
+import json
+import os
+import sys
+import threading
+import time
+
+DEFAULT_SAMPLE_RATE = 44100
+DEFAULT_BLOCKSIZE = 1024
+PYGAME_BUFFER = 4096  # pygame mezcla las voces cortas por adelantado; su latencia no sale del probe
+PROBE_BLOCKSIZES = (64, 128, 256, 512, 1024, 2048)
+PROBE_SECONDS = 0.5  # Tiempo que tiene que aguantar cada tamaño de bloque sin underruns
+PROBE_HEADROOM_STEPS = 1  # El probe corre en silencio; el mezclador real necesita un escalón más de margen
+MAX_INPUT_CHANNELS = 2  # Las tomas se reproducen en un mezclador estéreo: más canales sólo ocupan disco
+HOTPLUG_SECONDS = 2.0  # Cada cuánto se mira la huella de dispositivos del sistema (barata, sin PortAudio)
+RESCAN_FALLBACK_SECONDS = 60.0  # Sin huella del sistema, PortAudio se reinicia como mucho así de seguido
+
+# Se toma al abrir un stream de PortAudio y al reiniciarlo: un reinicio nunca pilla un stream a medio abrir
+PORTAUDIO_LOCK = threading.RLock()
+
+
+def init_mixer(sample_rate=DEFAULT_SAMPLE_RATE, channels=2, buffer=PYGAME_BUFFER):
+    """Open pygame's mixer for the whole app, once; returns pygame.mixer.get_init()."""
+    import pygame
+
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=sample_rate, size=-16, channels=channels, buffer=buffer)
+    return pygame.mixer.get_init()
+
+
+def device_id(device):
+    """"Name, Host API": how a device is stored and opened (sounddevice matches it as a substring)."""
+    return f"{device['name']}, {device['hostapi']}"
+
+
+def device_signature():
+    """A cheap fingerprint of the system's audio devices that changes on plug and unplug, without PortAudio;
+    None where there is none, and the watcher falls back to rescanning every RESCAN_FALLBACK_SECONDS."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            winmm = ctypes.windll.winmm
+            return winmm.waveInGetNumDevs(), winmm.waveOutGetNumDevs()
+        if os.path.isdir("/dev/snd"):
+            return tuple(sorted(os.listdir("/dev/snd")))
+    except (OSError, AttributeError):
+        pass
+    return None
+
+
+def query_sounddevice(rescan=False):
+    """Devices as plain dicts plus the (input, output) default indices, from PortAudio."""
+    import sounddevice as sd
+
+    if rescan:
+        # PortAudio sólo ve los dispositivos que había al inicializarse; reiniciarlo corta los streams abiertos
+        sd._terminate()
+        sd._initialize()
+    hostapis = sd.query_hostapis()
+    devices = [{"index": device["index"], "name": device["name"], "hostapi": hostapis[device["hostapi"]]["name"],
+                "inputs": device["max_input_channels"], "outputs": device["max_output_channels"],
+                "default_samplerate": device["default_samplerate"]} for device in sd.query_devices()]
+    return devices, tuple(sd.default.device)
+
+
+class DeviceManager:
+    """Dispositivos de audio y la configuración elegida (entrada, salida, frecuencia y bloque), persistida en JSON.
+
+    La lista de dispositivos se consulta una vez y queda en caché. Para ver un dispositivo nuevo hay que
+    reiniciar PortAudio, así que un hilo vigila una huella barata del sistema (device_signature) y sólo cuando
+    cambia vuelve a pedir la lista, bajo PORTAUDIO_LOCK y si no hay streams abiertos (is_idle).
+    """
+
+    def __init__(self, config_path, query=None, signature=None):
+        self.config_path = config_path
+        self.query = query or query_sounddevice
+        self.signature = signature or device_signature
+        self.config = {"input": None, "output": None, "input_channels": 1, "sample_rate": None, "blocksizes": {}}
+        self.on_change = None  # Callback (hilo del vigilante) con (altas, bajas) como listas de ids
+        self.on_probed = None  # Callback (hilo del vigilante) con el tamaño de bloque medido
+        self.error = None
+        self._devices = None
+        self._defaults = (None, None)
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._stop = threading.Event()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.config_path, encoding="utf-8") as f:
+                self.config.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Error al leer la configuración de audio: {e}")
+
+    def save(self):
+        """Write the configuration atomically."""
+        temp_path = self.config_path + ".tmp"
+        with self._lock:
+            config = dict(self.config, blocksizes=dict(self.config["blocksizes"]))
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=4, ensure_ascii=False)
+            os.replace(temp_path, self.config_path)
+        except OSError as e:
+            print(f"Error al guardar la configuración de audio: {e}")
+
+    def devices(self, refresh=False):
+        """Cached device list; queried the first time or with refresh."""
+        with self._lock:
+            if self._devices is not None and not refresh:
+                return self._devices
+        devices, defaults = self.query(rescan=refresh and self._devices is not None)
+        with self._lock:
+            self._devices, self._defaults = devices, defaults
+        return devices
+
+    def rescan(self, is_idle):
+        """Restart PortAudio for a fresh device list, or None if a stream is open (is_idle checked under the lock)."""
+        with PORTAUDIO_LOCK:
+            if not is_idle():
+                return None
+            return self.devices(refresh=True)
+
+    def cached(self):
+        """The device list if it was already queried, else None (never touches PortAudio)."""
+        with self._lock:
+            return self._devices
+
+    def inputs(self):
+        return [device for device in self.devices() if device["inputs"] > 0]
+
+    def outputs(self):
+        return [device for device in self.devices() if device["outputs"] > 0]
+
+    def find(self, kind):
+        """The chosen input or output device, falling back to the system default when it is gone."""
+        devices = self.devices()
+        wanted = self.config[kind]
+        for device in devices:
+            if wanted is not None and device_id(device) == wanted:
+                return device
+        default = self._defaults[0 if kind == "input" else 1]
+        key = "inputs" if kind == "input" else "outputs"
+        return next((device for device in devices if device["index"] == default and device[key] > 0),
+                    next((device for device in devices if device[key] > 0), None))
+
+    def native_rate(self, kind):
+        device = self.find(kind)
+        return int(device["default_samplerate"]) if device else DEFAULT_SAMPLE_RATE
+
+    def startup_rate(self):
+        """Playback rate for this launch: the saved one, or the output's native rate on the first run.
+
+        With a saved rate PortAudio is not loaded here; the watcher checks it in the background later.
+        """
+        if self.config["sample_rate"]:
+            return int(self.config["sample_rate"])
+        try:
+            rate = self.native_rate("output")
+        except Exception as e:
+            print(f"No se pudieron consultar los dispositivos de audio: {e}")
+            return DEFAULT_SAMPLE_RATE
+        with self._lock:
+            self.config["sample_rate"] = rate
+        self.save()
+        return rate
+
+    def select(self, kind, device):
+        """Choose an input or output by id (None for the system default) and persist it."""
+        with self._lock:
+            self.config[kind] = device
+        if kind == "output":
+            try:
+                rate = self.native_rate("output")
+            except Exception:
+                rate = None
+            with self._lock:
+                self.config["sample_rate"] = rate  # None: se negocia en el próximo arranque
+        else:
+            self.update_input_channels()
+        self.save()
+
+    def update_input_channels(self):
+        """Record as many channels as the chosen input has, up to MAX_INPUT_CHANNELS; returns the count."""
+        try:
+            device = self.find("input")
+        except Exception:
+            device = None
+        channels = max(1, min(device["inputs"], MAX_INPUT_CHANNELS)) if device else 1
+        with self._lock:
+            self.config["input_channels"] = channels
+        return channels
+
+    def probe_key(self, sample_rate=None):
+        return f"{self.config['output'] or 'predeterminado'}@{sample_rate or self.config['sample_rate']}"
+
+    def blocksize(self, sample_rate=None):
+        """The probed block size for the current output and rate, or the default until it is probed."""
+        return self.config["blocksizes"].get(self.probe_key(sample_rate), DEFAULT_BLOCKSIZE)
+
+    def is_probed(self, sample_rate=None):
+        return self.probe_key(sample_rate) in self.config["blocksizes"]
+
+    def probe_latency(self, stream_factory=None, blocksizes=PROBE_BLOCKSIZES, seconds=PROBE_SECONDS):
+        """Run the output with ever larger blocks; the smallest that stays clean (plus headroom) is saved."""
+        if stream_factory is None:
+            import sounddevice as sd
+            stream_factory = sd.OutputStream
+        sample_rate = int(self.config["sample_rate"] or DEFAULT_SAMPLE_RATE)
+        chosen = blocksizes[-1]
+        for step, blocksize in enumerate(blocksizes):
+            counts = {"blocks": 0, "underflows": 0}
+
+            def callback(outdata, frames, time_info, status):
+                if status and status.output_underflow:
+                    counts["underflows"] += 1
+                counts["blocks"] += 1
+                outdata.fill(0)
+
+            stream = stream_factory(device=self.config["output"], samplerate=sample_rate, channels=2,
+                                    blocksize=blocksize, latency="low", dtype="float32", callback=callback)
+            try:
+                stream.start()
+                time.sleep(seconds)
+                stream.stop()
+            finally:
+                stream.close()
+            # Un bloque que no llega a tiempo también cuenta, aunque el driver no avise del underrun
+            if not counts["underflows"] and counts["blocks"] >= seconds * sample_rate / blocksize * 0.9:
+                chosen = blocksizes[min(step + PROBE_HEADROOM_STEPS, len(blocksizes) - 1)]
+                break
+        with self._lock:
+            self.config["blocksizes"][self.probe_key(sample_rate)] = chosen
+        self.save()
+        return chosen
+
+    def start_watching(self, is_idle, interval=HOTPLUG_SECONDS, stream_factory=None,
+                       fallback=RESCAN_FALLBACK_SECONDS):
+        """Watch for hot-plugged devices in the background; the first pass also probes an unprobed output."""
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(is_idle, interval, stream_factory, fallback),
+                                         daemon=True)
+        self._watcher.start()
+
+    def _watch(self, is_idle, interval, stream_factory, fallback):
+        seen = self.signature()
+        rescanned_at = time.monotonic()
+        first = True
+        while True:
+            try:
+                before = self.cached()
+                if first:
+                    if is_idle():
+                        self._first_pass()
+                        first = False
+                else:
+                    signature = self.signature()
+                    due = signature != seen if signature is not None else time.monotonic() - rescanned_at >= fallback
+                    # Si hay un stream abierto la huella queda pendiente y se reintenta en la siguiente vuelta
+                    after = self.rescan(is_idle) if due else None
+                    if after is not None:
+                        seen, rescanned_at = signature, time.monotonic()
+                        self._check_input_channels()  # Sin la entrada elegida se graba con la predeterminada
+                        old, new = {device_id(d) for d in before}, {device_id(d) for d in after}
+                        if old != new and self.on_change:
+                            self.on_change(sorted(new - old), sorted(old - new))
+                if self.cached() is not None and not self.is_probed() and is_idle():
+                    blocksize = self.probe_latency(stream_factory)
+                    if self.on_probed:
+                        self.on_probed(blocksize)
+            except Exception as e:
+                if self.error is None:
+                    print(f"Error al consultar los dispositivos de audio: {e}")
+                self.error = e
+            if self._stop.wait(interval):
+                return
+
+    def _first_pass(self):
+        """First pass of the watcher (the list may already be cached): check the input's channels, report every
+        device and check the output's native rate."""
+        with PORTAUDIO_LOCK:
+            after = self.devices()
+        self._check_input_channels()  # También la entrada predeterminada, que nadie eligió en Ajustes
+        if self.on_change:
+            self.on_change([device_id(d) for d in after], [])
+        rate = self.native_rate("output")
+        if rate != self.config["sample_rate"]:
+            # La salida cambió de frecuencia desde el último arranque: vale para el próximo
+            print(f"La salida de audio trabaja a {rate} Hz; se usará en el próximo arranque.")
+            with self._lock:
+                self.config["sample_rate"] = rate
+            self.save()
+
+    def _check_input_channels(self):
+        channels = self.config["input_channels"]
+        if self.update_input_channels() != channels:
+            self.save()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
@@ -0,0 +1,64 @@
+import time
+
+import customtkinter as ctk
+
+REFRESH_MS = 1000
+
+
+class DiagnosticsPanel(ctk.CTkToplevel):
+    """Ventana oculta (Ctrl+Mayús+D) con los tiempos, contadores y eventos recientes de la telemetría.
+
+    Sólo se refresca mientras está abierta, así que cerrada no cuesta nada.
+    """
+
+    def __init__(self, master, telemetry, extra_lines=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.telemetry = telemetry
+        self.extra_lines = extra_lines  # Función opcional con líneas propias de la app (motor, caché...)
+        self.title("Diagnóstico")
+        self.geometry("720x520")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.textbox = ctk.CTkTextbox(self, font=ctk.CTkFont(family="Courier", size=12), wrap="none")
+        self.textbox.grid(row=0, column=0, sticky="nsew", padx=10, pady=(10, 5))
+        self.path_label = ctk.CTkLabel(self, text=f"Registro: {telemetry.log_path or 'desactivado'}",
+                                       text_color="gray", font=ctk.CTkFont(size=11), anchor="w")
+        self.path_label.grid(row=1, column=0, sticky="ew", padx=10, pady=(0, 10))
+        self.after_id = None
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def render(self):
+        summary = self.telemetry.summary()
+        lines = [f"{'Medición':<36}{'n':>7}{'p50 ms':>10}{'p99 ms':>10}{'máx ms':>10}"]
+        for name, stats in sorted(summary["spans"].items()):
+            lines.append(f"{name:<36}{stats['count']:>7}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                         f"{stats['max_ms']:>10.2f}")
+        lines.append("")
+        lines.append("Contadores")
+        for name, total in sorted(summary["counters"].items()):
+            lines.append(f"  {name:<34}{total:>7}")
+        if self.extra_lines:
+            lines.append("")
+            lines.extend(self.extra_lines())
+        lines.append("")
+        lines.append("Eventos recientes")
+        for at, kind, fields in reversed(self.telemetry.recent_events()[-30:]):
+            details = ", ".join(f"{key}={value}" for key, value in fields.items())
+            lines.append(f"  {time.strftime('%H:%M:%S', time.localtime(at))}  {kind}  {details}")
+        return "\n".join(lines)
+
+    def refresh(self):
+        position = self.textbox.yview()[0]
+        self.textbox.configure(state="normal")
+        self.textbox.delete("0.0", "end")
+        self.textbox.insert("0.0", self.render())
+        self.textbox.configure(state="disabled")
+        self.textbox.yview_moveto(position)
+        self.after_id = self.after(REFRESH_MS, self.refresh)
+
+    def close(self):
+        if self.after_id:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+        self.destroy()
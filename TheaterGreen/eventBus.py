@@ -0,0 +1,30 @@
+import threading
+
+
+class EventBus:
+    """Publicación/suscripción entre hilos para los eventos del motor (play, pause, end, error...).
+
+    Los callbacks corren en el hilo que publica; la UI se suscribe a través de App.post_to_ui.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # tipo -> tupla de callbacks; se reemplaza entera al suscribir
+        self._lock = threading.Lock()
+
+    def subscribe(self, kind, callback):
+        """Call callback(kind, data) for every event of kind ("*" for all of them)."""
+        with self._lock:
+            self._subscribers[kind] = self._subscribers.get(kind, ()) + (callback,)
+        return callback
+
+    def unsubscribe(self, kind, callback):
+        with self._lock:
+            self._subscribers[kind] = tuple(c for c in self._subscribers.get(kind, ()) if c is not callback)
+
+    def publish(self, kind, **data):
+        subscribers = self._subscribers
+        for callback in subscribers.get(kind, ()) + subscribers.get("*", ()):
+            try:
+                callback(kind, data)
+            except Exception as e:
+                print(f"Error al atender el evento '{kind}': {e}")
@@ -0,0 +1,85 @@
+import os
+import queue
+import threading
+import time
+
+
+class FileJanitor:
+    """Borra archivos en segundo plano, reintentando hasta que se liberen."""
+
+    def __init__(self, is_released=None, max_backoff=5.0):
+        self.is_released = is_released or (lambda file_path: True)
+        self.max_backoff = max_backoff
+        self.pending = {}  # file_path -> (intentos, próximo intento)
+        self._queued = {}  # file_path -> peticiones aún en la cola
+        self._cancelled = set()
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def delete(self, file_path):
+        """Schedule a file for deletion; returns immediately."""
+        with self._lock:
+            self._queued[file_path] = self._queued.get(file_path, 0) + 1
+        self._requests.put(file_path)
+
+    def cancel(self, file_path):
+        """Stop deleting a file that is back in use (e.g. a blob that is referenced again)."""
+        with self._lock:
+            self.pending.pop(file_path, None)
+            if self._queued.get(file_path):
+                self._cancelled.add(file_path)
+
+    def pending_files(self):
+        with self._lock:
+            return list(self.pending)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                waits = [next_try for _, next_try in self.pending.values()]
+            timeout = max(0.0, min(waits) - time.monotonic()) if waits else None
+            try:
+                file_path = self._requests.get(timeout=timeout)
+                with self._lock:
+                    self._queued[file_path] -= 1
+                    if not self._queued[file_path]:
+                        del self._queued[file_path]
+                    if file_path in self._cancelled:
+                        if file_path not in self._queued:
+                            self._cancelled.discard(file_path)
+                    else:
+                        self.pending.setdefault(file_path, (0, time.monotonic()))
+            except queue.Empty:
+                pass
+            self._sweep()
+
+    def _sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [path for path, (_, next_try) in self.pending.items() if next_try <= now]
+        for file_path in due:
+            with self._lock:
+                if file_path not in self.pending:
+                    continue  # Cancelado mientras tanto
+                attempts, _ = self.pending[file_path]
+            if self.is_released(file_path) and self._try_remove(file_path):
+                with self._lock:
+                    self.pending.pop(file_path, None)
+                continue
+            backoff = min(self.max_backoff, 0.05 * (2 ** attempts))
+            with self._lock:
+                if file_path in self.pending:
+                    self.pending[file_path] = (attempts + 1, time.monotonic() + backoff)
+
+    def _try_remove(self, file_path):
+        try:
+            os.remove(file_path)
+            return True
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            # En Windows un archivo abierto da PermissionError: se reintenta más tarde
+            print(f"Borrado pendiente de '{os.path.basename(file_path)}': {e}")
+            return False
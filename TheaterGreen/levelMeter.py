@@ -0,0 +1,118 @@
+import math
+import time
+
+import numpy as np
+
+METER_FLOOR_DB = -60.0  # Por debajo, el medidor se da por vacío
+METER_FPS = 30  # Ritmo al que se publican los niveles a la UI
+CLIP_LEVEL = 0.999  # Una muestra a fondo de escala cuenta como recorte
+
+
+def to_dbfs(value, floor=METER_FLOOR_DB):
+    """Linear amplitude to dBFS, clamped to floor."""
+    return max(floor, 20 * math.log10(value)) if value > 0 else floor
+
+
+class LevelMeter:
+    """Pico, RMS y retención de pico por canal para un stream de audio.
+
+    process() corre en el callback y sólo acumula el pico y la suma de cuadrados del bloque sobre arrays
+    preasignados; la balística (caída del pico, promedio RMS, retención) se aplica en read(), una vez por
+    fotograma de la UI. Hay dos acumuladores: read() cambia de lado y el callback limpia el suyo al entrar,
+    así que nunca se bloquean entre sí (como mucho se pierde el bloque que estaba en curso).
+    """
+
+    def __init__(self, channels, sample_rate, max_frames=8192, hold_seconds=1.5, release_db_per_second=20.0,
+                 rms_seconds=0.3):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.hold_seconds = hold_seconds
+        self.release_db_per_second = release_db_per_second
+        self.rms_seconds = rms_seconds
+        self.clips = 0
+        self.peak = np.zeros(channels)  # Lineal, con caída
+        self.hold = np.zeros(channels)
+        self.mean_square = np.zeros(channels)
+        self._hold_left = np.zeros(channels)  # Segundos que le quedan a cada pico retenido
+        self._scratch = np.zeros((max_frames, channels), dtype=np.float32)
+        self._block = np.zeros(channels, dtype=np.float32)
+        self._peaks = np.zeros((2, channels), dtype=np.float32)  # Acumuladores del callback, uno por lado
+        self._squares = np.zeros((2, channels), dtype=np.float32)
+        self._frames = [0, 0]
+        self._side = 0  # Lado en el que escribe el callback; lo cambia read()
+        self._written_side = 0
+        self._read_at = None
+
+    def process(self, block):
+        """Accumulate a (frames, channels) float block; longer blocks are measured on their last max_frames."""
+        frames = min(len(block), len(self._scratch))
+        if not frames:
+            return
+        side = self._side
+        if side != self._written_side:
+            self._peaks[side].fill(0)
+            self._squares[side].fill(0)
+            self._frames[side] = 0
+            self._written_side = side
+        block = block[-frames:]
+        scratch = self._scratch[:frames]
+        np.abs(block, out=scratch)
+        np.max(scratch, axis=0, out=self._block)
+        np.maximum(self._peaks[side], self._block, out=self._peaks[side])
+        np.einsum("ij,ij->j", block, block, out=self._block)
+        self._squares[side] += self._block
+        self._frames[side] += frames
+
+    def read(self):
+        """Apply the ballistics to what arrived since the last read and return the levels (single reader).
+
+        The ballistics follow the audio clock while blocks arrive and the wall clock when the stream is idle.
+        """
+        now = time.perf_counter()
+        elapsed = 0.0 if self._read_at is None else now - self._read_at
+        self._read_at = now
+        side = self._side
+        self._side = 1 - side
+        if self._written_side == side:
+            frames = self._frames[side]
+            peaks = self._peaks[side].astype(np.float64)
+            squares = self._squares[side].astype(np.float64)
+            self._frames[side] = 0  # El callback ya escribe en el otro lado
+            self._peaks[side].fill(0)
+            self._squares[side].fill(0)
+        else:
+            frames, peaks, squares = 0, np.zeros(self.channels), np.zeros(self.channels)
+        seconds = frames / self.sample_rate if frames else elapsed
+
+        self.peak *= 10 ** (-self.release_db_per_second * seconds / 20)
+        np.maximum(self.peak, peaks, out=self.peak)
+        smoothing = math.exp(-seconds / self.rms_seconds)
+        self.mean_square *= smoothing
+        if frames:
+            self.mean_square += (1 - smoothing) * squares / frames
+        self._hold_left -= seconds
+        renew = (self.peak >= self.hold) | (self._hold_left <= 0)
+        self.hold[renew] = self.peak[renew]
+        self._hold_left[renew] = self.hold_seconds
+        if peaks.max() >= CLIP_LEVEL:
+            self.clips += 1
+        return self.levels()
+
+    def reset(self):
+        for array in (self.peak, self.hold, self.mean_square, self._hold_left, self._peaks, self._squares):
+            array.fill(0)
+        self._frames = [0, 0]
+        self._read_at = None
+        self.clips = 0
+
+    def is_silent(self):
+        return to_dbfs(max(float(self.hold.max()), math.sqrt(float(self.mean_square.max())))) <= METER_FLOOR_DB
+
+    def levels(self):
+        """Per-channel peak, RMS and held peak in dBFS as of the last read(), plus the clip count."""
+        return {
+            "peak": [to_dbfs(value) for value in self.peak.tolist()],
+            "rms": [to_dbfs(math.sqrt(value)) for value in self.mean_square.tolist()],
+            "hold": [to_dbfs(value) for value in self.hold.tolist()],
+            "clips": self.clips,
+        }
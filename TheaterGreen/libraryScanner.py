@@ -0,0 +1,150 @@
+import os
+import threading
+
+import soundfile as sf
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    print("watchdog no está instalado. La carpeta de datos se revisará por sondeo.")
+    FileSystemEventHandler = object
+    Observer = None
+
+AUDIO_EXTENSIONS = (".wav", ".mp3")
+
+
+def normalize_path(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    def __init__(self, scanner):
+        super().__init__()
+        self.scanner = scanner
+
+    def on_any_event(self, event):
+        self.scanner.request_rescan()
+
+
+class LibraryScanner:
+    """Vigila la carpeta de datos en segundo plano y avisa de archivos nuevos, borrados o modificados."""
+
+    def __init__(self, folder, on_changes, poll_interval=5.0, debounce=0.3, settle=1.0):
+        self.folder = folder
+        self.on_changes = on_changes  # Se llama desde el hilo del escáner con un lote de cambios
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.settle = settle  # Espera hasta volver a mirar un archivo que acaba de aparecer o cambiar
+        self.snapshot = {}  # ruta normalizada -> (mtime_ns, tamaño, inodo)
+        self.pending = {}  # Archivos nuevos o cambiados que aún no se vieron iguales dos veces seguidas
+        self.probes = {}  # ruta normalizada -> info del último sondeo de formato
+        self.scans = 0
+        self.probed = 0
+        self.known_paths = set()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._observer = None
+
+    def start(self, known_paths=()):
+        """Start watching; files in known_paths (already in the library) are not probed on the first scan."""
+        self.known_paths = {normalize_path(path) for path in known_paths}
+        os.makedirs(self.folder, exist_ok=True)
+        self._running = True
+        if Observer is not None:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_ChangeHandler(self), self.folder, recursive=True)
+                self._observer.start()
+            except Exception as e:
+                print(f"No se pudo vigilar la carpeta de datos, se usará sondeo: {e}")
+                self._observer = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
+
+    def request_rescan(self):
+        self._wake.set()
+
+    def _run(self):
+        first = True
+        while self._running:
+            try:
+                changes = self.scan()
+                if first or any(changes[key] for key in ("added", "removed", "modified")):
+                    changes["initial"] = first
+                    self.on_changes(changes)
+                first = False
+            except Exception as e:
+                print(f"Error al revisar la carpeta de datos: {e}")
+            # Con watchdog sólo se vuelve a revisar tras un aviso (o como red de seguridad cada minuto); un
+            # archivo pendiente se vuelve a mirar enseguida aunque ya no lleguen avisos
+            if self.pending:
+                timeout = self.settle
+            else:
+                timeout = 60.0 if self._observer is not None else self.poll_interval
+            self._wake.wait(timeout)
+            self._wake.clear()
+            if self._running and self.debounce:
+                # Agrupa ráfagas de avisos (p. ej. una copia grande) en un solo lote
+                while self._wake.wait(self.debounce):
+                    self._wake.clear()
+
+    def _walk(self):
+        stack = [self.folder]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue  # Tomas temporales y cachés ocultas
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                        stat = entry.stat()
+                        yield normalize_path(entry.path), (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def scan(self):
+        """Compare the folder with the last snapshot; only changed files are probed.
+
+        A new or changed file is reported once its (mtime, size) is the same in two scans in a row, so one
+        that is still being copied in is never hashed half-written. Library files are taken as they are on
+        the first scan.
+        """
+        current = dict(self._walk())
+        settled, pending = {}, {}
+        for path, signature in current.items():
+            if self.snapshot.get(path) == signature:
+                continue
+            if self.pending.get(path) == signature or (self.scans == 0 and path in self.known_paths):
+                settled[path] = signature
+            else:
+                pending[path] = signature
+        added = [path for path in settled if path not in self.snapshot]
+        modified = [path for path in settled if path in self.snapshot]
+        removed = [path for path in self.snapshot if path not in current]
+        for path in added + modified:
+            if self.scans == 0 and path in self.known_paths:
+                continue
+            self.probes[path] = self.probe(path)
+        for path in removed:
+            self.probes.pop(path, None)
+            del self.snapshot[path]
+        self.snapshot.update(settled)
+        self.pending = pending
+        self.scans += 1
+        return {"added": added, "removed": removed, "modified": modified, "files": set(current),
+                "probes": {path: self.probes[path] for path in added + modified if path in self.probes}}
+
+    def probe(self, path):
+        self.probed += 1
+        try:
+            info = sf.info(path)
+            return {"duration": info.duration, "samplerate": info.samplerate, "channels": info.channels}
+        except Exception as e:
+            return {"error": str(e)}
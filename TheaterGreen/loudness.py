@@ -0,0 +1,136 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import soundfile as sf
+
+from audioMetadata import read_blocks
+
+TARGET_LUFS = -23.0  # EBU R128
+TRUE_PEAK_CEILING = -1.0  # dBTP máximo tras aplicar la ganancia
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+SUBBLOCK_SECONDS = 0.1  # Los bloques de 400 ms con 75 % de solape se arman con 4 sub-bloques
+CHUNK_SUBBLOCKS = 50
+CONTEXT_SUBBLOCKS = 5  # Contexto descartado al principio de cada trozo para la cola del filtro
+OVERSAMPLING = 4
+
+
+def _biquad_response(b, a, z_inv):
+    return (b[0] + b[1] * z_inv + b[2] * z_inv ** 2) / (a[0] + a[1] * z_inv + a[2] * z_inv ** 2)
+
+
+def k_weighting_response(sample_rate, n_fft):
+    """Complex response of the BS.1770 K-weighting filter at the rfft bins of an n_fft transform."""
+    z_inv = np.exp(-2j * np.pi * np.fft.rfftfreq(n_fft))
+
+    # Etapa 1: estante de alta frecuencia (+4 dB), coeficientes recalculados para cualquier frecuencia de muestreo
+    gain_db, q, fc = 3.999843853973347, 0.7071752369554196, 1681.974450955533
+    k = np.tan(np.pi * fc / sample_rate)
+    v_high = 10 ** (gain_db / 20)
+    v_band = v_high ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf_b = ((v_high + v_band * k / q + k * k) / a0, 2 * (k * k - v_high) / a0,
+               (v_high - v_band * k / q + k * k) / a0)
+    shelf_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    # Etapa 2: paso alto RLB
+    q, fc = 0.5003270373238773, 38.13547087602444
+    k = np.tan(np.pi * fc / sample_rate)
+    a0 = 1 + k / q + k * k
+    high_pass_b = (1.0, -2.0, 1.0)
+    high_pass_a = (1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0)
+
+    return _biquad_response(shelf_b, shelf_a, z_inv) * _biquad_response(high_pass_b, high_pass_a, z_inv)
+
+
+def channel_weights(channels):
+    """BS.1770 channel weights in WAV order: surrounds weigh 1.41 and the LFE is left out."""
+    if channels == 5:
+        return np.array([1.0, 1.0, 1.0, 1.41, 1.41])  # L R C Ls Rs
+    if channels >= 6:
+        # L R C LFE Ls Rs (5.1) y, en 7.1, dos envolventes más al final
+        return np.array([1.0, 1.0, 1.0, 0.0] + [1.41] * (channels - 4))
+    return np.ones(channels)
+
+
+def measure_loudness(file_path):
+    """Integrated loudness (LUFS) and true peak (dBTP) of a file, processed in FFT chunks."""
+    info = sf.info(file_path)
+    rate = info.samplerate
+    subblock = int(round(rate * SUBBLOCK_SECONDS))
+    context = subblock * CONTEXT_SUBBLOCKS
+    chunk = subblock * CHUNK_SUBBLOCKS
+    energies = []
+    true_peak = 0.0
+    response = None
+
+    blocks = read_blocks(file_path, chunk + context, overlap=context)
+    for index, block in enumerate(blocks):
+        n_fft = len(block) + context  # Relleno para que la cola del filtro no se enrolle
+        n_fft += n_fft % 2
+        if response is None or len(response) != n_fft // 2 + 1:
+            response = k_weighting_response(rate, n_fft)
+        spectrum = np.fft.rfft(block, n=n_fft, axis=0)
+        weighted = np.fft.irfft(spectrum * response[:, None], n=n_fft, axis=0)[:len(block)]
+
+        # Pico verdadero: sobremuestreo x4 por relleno espectral
+        oversampled = np.fft.irfft(spectrum, n=n_fft * OVERSAMPLING, axis=0) * OVERSAMPLING
+        true_peak = max(true_peak, float(np.abs(oversampled[:len(block) * OVERSAMPLING]).max(initial=0.0)))
+
+        keep = weighted if index == 0 else weighted[context:]
+        usable = len(keep) - len(keep) % subblock
+        if usable:
+            energies.append(np.square(keep[:usable]).reshape(-1, subblock, keep.shape[1]).mean(axis=1))
+
+    if not energies:
+        return {"lufs": float("-inf"), "true_peak_db": float("-inf")}
+    energies = np.concatenate(energies)
+    if len(energies) < 4:
+        blocks_power = energies.mean(axis=0, keepdims=True)
+    else:
+        kernel = np.ones(4) / 4
+        blocks_power = np.stack([np.convolve(energies[:, c], kernel, mode="valid")
+                                 for c in range(energies.shape[1])], axis=1)
+    weighted_power = blocks_power @ channel_weights(blocks_power.shape[1])
+    with np.errstate(divide="ignore"):
+        block_loudness = -0.691 + 10 * np.log10(weighted_power)
+
+    gated = weighted_power[block_loudness > ABSOLUTE_GATE]
+    if not len(gated):
+        lufs = float("-inf")
+    else:
+        relative = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE
+        gated = weighted_power[(block_loudness > ABSOLUTE_GATE) & (block_loudness > relative)]
+        lufs = float(-0.691 + 10 * np.log10(gated.mean()))
+    true_peak_db = float(20 * np.log10(true_peak)) if true_peak > 0 else float("-inf")
+    return {"lufs": lufs, "true_peak_db": true_peak_db}
+
+
+def normalization_gain(lufs, true_peak_db, target=TARGET_LUFS, ceiling=TRUE_PEAK_CEILING):
+    """Gain (dB) that brings a file to target loudness without pushing its true peak over the ceiling."""
+    if not np.isfinite(lufs):
+        return 0.0
+    return float(min(target - lufs, ceiling - true_peak_db))
+
+
+def analyze_file(file_path):
+    """Loudness, true peak and normalization gain for one file; errors are returned, not raised."""
+    try:
+        result = measure_loudness(file_path)
+        result["gain_db"] = normalization_gain(result["lufs"], result["true_peak_db"])
+        return result
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def analyze_library(file_paths, workers=None):
+    """Analyze many files across a process pool; returns {file_path: result}."""
+    file_paths = list(file_paths)
+    if len(file_paths) <= 1:
+        return {path: analyze_file(path) for path in file_paths}
+    # "spawn" también en Linux: se llama desde un hilo de la app y no conviene heredar pygame/Tk por fork
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=context) as pool:
+        return dict(zip(file_paths, pool.map(analyze_file, file_paths, chunksize=4)))
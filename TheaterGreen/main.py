@@ -1,23 +1,37 @@
-import customtkinter as ctk
-import sounddevice as sd
-import soundfile as sf
-import pygame
-import numpy as np
-import os
 import time
+
+STARTED_AT = time.perf_counter()  # Antes de cualquier import: cuenta para el perfil de arranque
+
+from startupProfiler import StartupProfiler
+
+profiler = StartupProfiler(STARTED_AT)
+
+with profiler.phase("import customtkinter"):
+    import customtkinter as ctk
+import os
+import math
 import threading
 import sys
-import json
+import queue
+import multiprocessing
+import importlib
+import tkinter as tk
 from tkinter import filedialog, messagebox
 from datetime import timedelta
-from audioView import AudioView
-from videoView import VideoView
-
-try:
-    from PIL import Image
-except ImportError:
-    print("Pillow no está instalado. Los iconos no se mostrarán.")
-    Image = None
+from audioLibrary import AudioLibrary, parse_tags
+from cueList import CueList
+from triggerInput import TriggerInput
+from fileJanitor import FileJanitor
+from deviceManager import DeviceManager
+from telemetry import telemetry
+
+CUE_CACHE_BUDGET_MB = 512  # Memoria máxima para cues decodificados
+DEFAULT_INPUT = "Micrófono (Predeterminado)"
+DEFAULT_OUTPUT = "Salida (Predeterminada)"
+# Módulos pesados (numpy, soundfile, pygame y lo que los usa): se importan en segundo plano mientras la
+# ventana ya se dibuja; después, los "from ... import" de cada método los encuentran ya cargados
+AUDIO_STACK = ("numpy", "soundfile", "pygame", "audioMetadata", "libraryScanner", "blobStore", "cueCache",
+               "streamMixer", "audioEngine", "loudness", "audioView")
 
 def resource_path(relative_path):
     """Obtiene la ruta absoluta para recursos empaquetados."""
@@ -41,12 +55,24 @@ class SettingsView(ctk.CTkFrame):
         self.configure(fg_color="transparent")
         self.app = audio_app
 
-        self.sample_rate = 44100
-        self.channels = 1
+        self.devices = audio_app.devices
+        self.channels = self.devices.config["input_channels"]
+        self.blocksize = 1024
+        self.latency = "high"  # Latencia del driver: "high" prioriza no perder muestras
         self.is_recording = False
-        self.recording_thread = None
-        self.recorded_audio_data = None
+        self.recorder = None  # Se crea (con sounddevice) la primera vez que se graba
+        self.recorded_file = None  # Toma grabada en disco, pendiente de guardar
         self.recording_start_time = None
+        from audioImporter import AudioImporter
+        from levelMeter import METER_FPS
+        from meterBar import MeterBar
+        self.meter_interval_ms = 1000 // METER_FPS
+        self.importer = AudioImporter(
+            get_data_path("data"),
+            on_progress=lambda fraction, name: self.app.post_to_ui(self.import_progress_changed, fraction, name),
+            on_imported=lambda job, temp_path, digest: self.app.post_to_ui(
+                self.import_ready, job, temp_path, digest),
+            on_finished=lambda imported, errors: self.app.post_to_ui(self.import_finished, imported, errors))
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)
@@ -61,46 +87,133 @@ class SettingsView(ctk.CTkFrame):
 
         self.input_label = ctk.CTkLabel(self.control_panel, text="Entrada de Audio:")
         self.input_label.grid(row=1, column=0, padx=20, pady=(10, 0), sticky="w")
-        self.audio_input_dropdown = ctk.CTkOptionMenu(self.control_panel,
-                                                      values=["Micrófono (Predeterminado)"])
+        self.audio_input_dropdown = ctk.CTkOptionMenu(self.control_panel, values=[DEFAULT_INPUT],
+                                                      command=lambda value: self.select_device("input", value))
         self.audio_input_dropdown.grid(row=2, column=0, padx=20, pady=(0, 10), sticky="ew")
+        self.output_label = ctk.CTkLabel(self.control_panel, text="Salida de Audio (al reiniciar):")
+        self.output_label.grid(row=3, column=0, padx=20, pady=(10, 0), sticky="w")
+        self.audio_output_dropdown = ctk.CTkOptionMenu(self.control_panel, values=[DEFAULT_OUTPUT],
+                                                       command=lambda value: self.select_device("output", value))
+        self.audio_output_dropdown.grid(row=4, column=0, padx=20, pady=(0, 10), sticky="ew")
 
         self.level_meter_label = ctk.CTkLabel(self.control_panel, text="Nivel de Entrada:")
-        self.level_meter_label.grid(row=3, column=0, padx=20, pady=(10, 0), sticky="w")
-        self.level_meter = ctk.CTkProgressBar(self.control_panel, orientation="horizontal")
-        self.level_meter.set(0.0)
-        self.level_meter.grid(row=4, column=0, padx=20, pady=(0, 10), sticky="ew")
+        self.level_meter_label.grid(row=5, column=0, padx=20, pady=(10, 0), sticky="w")
+        self.level_meter = MeterBar(self.control_panel, channels=self.channels, bar_height=12)
+        self.level_meter.grid(row=6, column=0, padx=20, pady=(0, 10), sticky="ew")
+        self.refresh_devices()
 
         self.record_button = ctk.CTkButton(self.control_panel, text="Grabar",
                                            command=self.toggle_recording,
                                            font=ctk.CTkFont(size=16, weight="bold"),
                                            fg_color="red", hover_color="#C20000")
-        self.record_button.grid(row=5, column=0, padx=20, pady=20, sticky="ew")
+        self.record_button.grid(row=7, column=0, padx=20, pady=20, sticky="ew")
 
         self.recording_status = ctk.CTkLabel(self.control_panel, text="Listo para grabar", font=ctk.CTkFont(size=14))
-        self.recording_status.grid(row=6, column=0, padx=20, pady=(0, 10), sticky="w")
+        self.recording_status.grid(row=8, column=0, padx=20, pady=(0, 10), sticky="w")
 
         self.name_label = ctk.CTkLabel(self.control_panel, text="Nombre del Audio:")
-        self.name_label.grid(row=7, column=0, padx=20, pady=(10, 0), sticky="w")
+        self.name_label.grid(row=9, column=0, padx=20, pady=(10, 0), sticky="w")
         self.audio_name_entry = ctk.CTkEntry(self.control_panel, placeholder_text="Ej: Efecto de sonido 'Wow!'")
-        self.audio_name_entry.grid(row=8, column=0, padx=20, pady=(0, 10), sticky="ew")
+        self.audio_name_entry.grid(row=10, column=0, padx=20, pady=(0, 10), sticky="ew")
 
         self.desc_label = ctk.CTkLabel(self.control_panel, text="Descripción:")
-        self.desc_label.grid(row=9, column=0, padx=20, pady=(10, 0), sticky="w")
+        self.desc_label.grid(row=11, column=0, padx=20, pady=(10, 0), sticky="w")
         self.audio_desc_textbox = ctk.CTkTextbox(self.control_panel, height=80, wrap="word")
-        self.audio_desc_textbox.grid(row=10, column=0, padx=20, pady=(0, 10), sticky="ew")
+        self.audio_desc_textbox.grid(row=12, column=0, padx=20, pady=(0, 10), sticky="ew")
         self.audio_desc_textbox.insert("0.0", "Breve descripción del contenido del audio...")
 
+        self.tags_label = ctk.CTkLabel(self.control_panel, text="Etiquetas (separadas por comas):")
+        self.tags_label.grid(row=13, column=0, padx=20, pady=(10, 0), sticky="w")
+        self.audio_tags_entry = ctk.CTkEntry(self.control_panel, placeholder_text="Ej: ambiente, acto 1, lluvia")
+        self.audio_tags_entry.grid(row=14, column=0, padx=20, pady=(0, 10), sticky="ew")
+
         self.save_button = ctk.CTkButton(self.control_panel, text="Guardar Audio",
                                          command=self.save_audio,
                                          font=ctk.CTkFont(size=16, weight="bold"),
                                          state="disabled")
-        self.save_button.grid(row=11, column=0, padx=20, pady=20, sticky="ew")
+        self.save_button.grid(row=15, column=0, padx=20, pady=20, sticky="ew")
 
         self.upload_button = ctk.CTkButton(self.control_panel, text="Subir Audio",
                                           command=self.upload_audio,
                                           font=ctk.CTkFont(size=16, weight="bold"))
-        self.upload_button.grid(row=12, column=0, padx=20, pady=10, sticky="ew")
+        self.upload_button.grid(row=16, column=0, padx=20, pady=10, sticky="ew")
+
+        self.transcode_var = ctk.BooleanVar(value=True)
+        self.transcode_checkbox = ctk.CTkCheckBox(self.control_panel, text="Convertir a WAV 16 bits (frecuencia de salida)",
+                                                  variable=self.transcode_var)
+        self.transcode_checkbox.grid(row=17, column=0, padx=20, pady=(0, 10), sticky="w")
+        self.import_progress = ctk.CTkProgressBar(self.control_panel, orientation="horizontal")
+        self.import_progress.set(0.0)
+        self.import_progress.grid(row=18, column=0, padx=20, pady=(0, 10), sticky="ew")
+        self.import_progress.grid_remove()
+
+        self.normalize_button = ctk.CTkButton(self.control_panel, text="Normalizar Biblioteca",
+                                              command=self.normalize_library,
+                                              font=ctk.CTkFont(size=14))
+        self.normalize_button.grid(row=19, column=0, padx=20, pady=10, sticky="ew")
+        self.update_library_actions()
+
+        self.remote_label = ctk.CTkLabel(self.control_panel, text="Control remoto (abrir en la tablet):")
+        self.remote_label.grid(row=20, column=0, padx=20, pady=(10, 0), sticky="w")
+        self.remote_entry = ctk.CTkEntry(self.control_panel)
+        self.remote_entry.grid(row=21, column=0, padx=20, pady=(0, 20), sticky="ew")
+        self.refresh_remote()
+
+    def refresh_remote(self):
+        """Show the remote's address with its token (read-only, so it can be copied)."""
+        self.remote_entry.configure(state="normal")
+        self.remote_entry.delete(0, "end")
+        self.remote_entry.insert(0, self.app.remote_url or "No disponible")
+        self.remote_entry.configure(state="readonly")
+
+    def backend_problem(self):
+        """Why takes and imports can't reach the library yet, or None once the audio back end is built."""
+        if self.app.audio_warmup_error is not None:
+            return f"No se pudo iniciar el audio: {self.app.audio_warmup_error}. No se pueden guardar audios."
+        if not self.app.audio_backend_ready:
+            return "Cargando el motor de audio..."
+        return None
+
+    def update_library_actions(self):
+        """Enable saving, uploading and normalizing only once the audio back end exists."""
+        problem = self.backend_problem()
+        state = "disabled" if problem else "normal"
+        self.upload_button.configure(state=state)
+        self.normalize_button.configure(state=state)
+        self.save_button.configure(state="normal" if not problem and self.recorded_file else "disabled")
+        if self.is_recording:
+            return
+        self.recording_status.configure(text=problem or "Listo para grabar")
+
+    def refresh_devices(self):
+        """Fill the device menus from the cached list (filled in the background by the device watcher)."""
+        devices = self.devices.cached()
+        if devices is None:
+            return
+        from deviceManager import device_id
+        for kind, dropdown, default, key in (("input", self.audio_input_dropdown, DEFAULT_INPUT, "inputs"),
+                                             ("output", self.audio_output_dropdown, DEFAULT_OUTPUT, "outputs")):
+            dropdown.configure(values=[default] + [device_id(device) for device in devices if device[key] > 0])
+            dropdown.set(self.devices.config[kind] or default)
+        self.apply_input_channels()
+
+    def select_device(self, kind, value):
+        self.devices.select(kind, None if value in (DEFAULT_INPUT, DEFAULT_OUTPUT) else value)
+        if kind == "input" and not self.is_recording:
+            self.recorder = None  # La próxima toma abre el dispositivo nuevo a su frecuencia nativa
+            self.apply_input_channels()
+
+    def apply_input_channels(self):
+        """Record with the input's channel count from the device manager; the meter gets one bar per channel."""
+        channels = self.devices.config["input_channels"]
+        if channels == self.channels or self.is_recording:
+            return
+        from meterBar import MeterBar
+        self.channels = channels
+        self.recorder = None
+        self.level_meter.destroy()
+        self.level_meter = MeterBar(self.control_panel, channels=channels, bar_height=12)
+        self.level_meter.grid(row=6, column=0, padx=20, pady=(0, 10), sticky="ew")
 
     def toggle_recording(self):
         if not self.is_recording:
@@ -109,125 +222,253 @@ class SettingsView(ctk.CTkFrame):
             self.stop_recording()
 
     def start_recording(self):
+        self.discard_recording()
+        data_dir = get_data_path("data")
+        os.makedirs(data_dir, exist_ok=True)
+        take_path = os.path.join(data_dir, f".grabacion-{int(time.time() * 1000)}.wav")
+        try:
+            if self.recorder is None:
+                from streamRecorder import StreamRecorder
+                self.recorder = StreamRecorder(sample_rate=self.devices.native_rate("input"),
+                                               channels=self.channels, blocksize=self.blocksize,
+                                               latency=self.latency, device=self.devices.config["input"])
+                self.recorder.on_error = lambda error: self.app.post_to_ui(self.on_recording_error, error)
+                telemetry.add_probe("grabacion.desbordes", lambda: self.recorder.overflows)
+                telemetry.add_probe("grabacion.muestras_perdidas", lambda: self.recorder.dropped_frames)
+            self.recorder.start(take_path)
+        except Exception as e:
+            print(f"Error durante la grabación: {e}")
+            messagebox.showerror("Error", f"No se pudo grabar el audio: {e}")
+            self.discard_file(take_path)
+            return
+
         self.is_recording = True
         self.record_button.configure(text="Detener Grabación", fg_color="#E67E22", hover_color="#D35400")
         self.recording_status.configure(text="Grabando... 00:00")
         self.save_button.configure(state="disabled")
-        self.recorded_audio_data = []
         self.recording_start_time = time.time()
-
-        self.recording_thread = threading.Thread(target=self.record_audio)
-        self.recording_thread.daemon = True
-        self.recording_thread.start()
         self.update_timer_and_level()
 
     def stop_recording(self):
         self.is_recording = False
         self.record_button.configure(text="Grabar", fg_color="red", hover_color="#C20000")
-        self.recording_status.configure(text="Grabación detenida.")
-        self.save_button.configure(state="normal")
-        if self.recording_thread:
-            self.recording_thread.join()
-        if self.recorded_audio_data:
-            self.recorded_audio_data = np.concatenate(self.recorded_audio_data, axis=0)
+        frames = self.recorder.stop()
+        self.recording_status.configure(text=f"Grabación detenida.{self.capture_counters()}")
+        if frames and self.recorder.error is None:
+            self.recorded_file = self.recorder.file_path
+            if self.backend_problem() is None:
+                self.save_button.configure(state="normal")  # Si no, se habilita cuando el motor esté listo
         else:
-            self.recorded_audio_data = None
+            self.discard_file(self.recorder.file_path)
+            self.recorded_file = None
+        self.apply_input_channels()  # Si la entrada cambió durante la toma
+
+    def capture_counters(self):
+        stats = self.recorder.stats()
+        if not stats["overflows"] and not stats["dropped_frames"]:
+            return ""
+        return f"  ·  desbordes: {stats['overflows']}  ·  muestras perdidas: {stats['dropped_frames']}"
+
+    def discard_file(self, file_path):
+        if file_path and os.path.exists(file_path):
+            try:
+                os.remove(file_path)
+            except OSError as e:
+                print(f"No se pudo borrar la toma temporal: {e}")
 
-    def record_audio(self):
-        try:
-            with sd.InputStream(samplerate=self.sample_rate, channels=self.channels) as stream:
-                while self.is_recording:
-                    data, _ = stream.read(1024)
-                    self.recorded_audio_data.append(data)
-        except Exception as e:
-            print(f"Error durante la grabación: {e}")
-            messagebox.showerror("Error", f"No se pudo grabar el audio: {e}")
-            self.is_recording = False
-            self.after(50, self.stop_recording)
+    def discard_recording(self):
+        """Drop an unsaved take left over from a previous recording"""
+        self.discard_file(self.recorded_file)
+        self.recorded_file = None
+
+    def on_recording_error(self, error):
+        if self.is_recording:
+            messagebox.showerror("Error", f"No se pudo grabar el audio: {error}")
+            self.stop_recording()
 
     def update_timer_and_level(self):
         if self.is_recording:
             elapsed = int(time.time() - self.recording_start_time)
             timer_str = str(timedelta(seconds=elapsed))[2:7]
-            self.recording_status.configure(text=f"Grabando... {timer_str}")
-            if self.recorded_audio_data:
-                level = np.abs(np.array(self.recorded_audio_data[-1])).mean()
-                self.level_meter.set(min(level * 2, 1.0))
-            else:
-                self.level_meter.set(0.0)
-            self.after(100, self.update_timer_and_level)
-        else:
-            self.level_meter.set(0.0)
+            levels = self.recorder.meter.read()
+            self.recording_status.configure(
+                text=f"Grabando... {timer_str}  ·  pico {max(levels['hold']):.1f} dBFS{self.capture_counters()}")
+            self.level_meter.draw(levels)
+            self.after(self.meter_interval_ms, self.update_timer_and_level)
+        elif self.recorder is not None:  # Se descarta si la entrada cambió de canales al parar
+            self.level_meter.draw(self.recorder.meter.read())
 
     def save_audio(self):
         audio_name = self.audio_name_entry.get().strip()
         audio_desc = self.audio_desc_textbox.get("0.0", "end").strip()
 
+        problem = self.backend_problem()
+        if problem:
+            messagebox.showerror("Error", problem)
+            return
         if not audio_name:
             messagebox.showerror("Error", "El nombre del audio no puede estar vacío.")
             return
-        if self.recorded_audio_data is None or len(self.recorded_audio_data) == 0:
+        if not self.recorded_file or not os.path.exists(self.recorded_file):
             messagebox.showerror("Error", "No hay audio grabado para guardar.")
             return
 
-        data_dir = get_data_path("data")
-        os.makedirs(data_dir, exist_ok=True)
-        file_path = os.path.join(data_dir, f"{audio_name}.wav")
-
-        try:
-            sf.write(file_path, self.recorded_audio_data, self.sample_rate, format='WAV')
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo guardar el audio: {e}")
-            return
+        # La toma ya está escrita en disco: guardar es sólo moverla al almacén de blobs
+        self.app.ingest_file(self.recorded_file,
+                             {"name": audio_name, "file_path": self.recorded_file, "description": audio_desc,
+                              "tags": parse_tags(self.audio_tags_entry.get())})
 
-        self.app.audios.append({"name": audio_name, "file_path": file_path, "description": audio_desc})
-        self.app.save_audios()  # Save to JSON
-        self.app.refresh_audio_view()  # Refresh Audio View
+        self.clear_fields()
+        self.save_button.configure(state="disabled")
+        self.recorded_file = None
 
+    def clear_fields(self):
         self.audio_name_entry.delete(0, "end")
         self.audio_desc_textbox.delete("0.0", "end")
-        self.save_button.configure(state="disabled")
-        self.recorded_audio_data = None
+        self.audio_tags_entry.delete(0, "end")
 
-    def upload_audio(self):
-        file_path = filedialog.askopenfilename(filetypes=[("Audio Files", "*.wav *.mp3")])
-        if not file_path:
+    def normalize_library(self):
+        """Re-measure every cue's loudness across all cores (EBU R128, -23 LUFS)"""
+        if not self.app.audios or self.backend_problem():
             return
+        self.normalize_button.configure(text="Normalizando...", state="disabled")
+        self.app.analyze_loudness(self.app.audios, on_done=self.normalize_done)
 
-        audio_name = self.audio_name_entry.get().strip() or os.path.splitext(os.path.basename(file_path))[0]
-        audio_desc = self.audio_desc_textbox.get("0.0", "end").strip()
-
-        if not audio_name:
-            messagebox.showerror("Error", "El nombre del audio no puede estar vacío.")
-            return
+    def normalize_done(self, count, elapsed):
+        self.normalize_button.configure(text="Normalizar Biblioteca", state="normal")
+        self.recording_status.configure(
+            text=f"{count} audios normalizados en {elapsed:.1f} s ({count / max(elapsed, 1e-6):.1f} archivos/s)")
 
-        try:
-            data_dir = get_data_path("data")
-            os.makedirs(data_dir, exist_ok=True)
-            new_file_path = os.path.join(data_dir, f"{audio_name}{os.path.splitext(file_path)[1]}")
-            with open(file_path, "rb") as src, open(new_file_path, "wb") as dst:
-                dst.write(src.read())
-        except Exception as e:
-            messagebox.showerror("Error", f"No se pudo cargar el audio: {e}")
+    def upload_audio(self):
+        file_paths = filedialog.askopenfilenames(filetypes=[("Audio Files", "*.wav *.mp3")])
+        if not file_paths or self.importer.busy or self.backend_problem():
             return
 
-        self.app.audios.append({"name": audio_name, "file_path": new_file_path, "description": audio_desc})
-        self.app.save_audios()  # Save to JSON
-        self.app.refresh_audio_view()  # Refresh Audio View
-
-        self.audio_name_entry.delete(0, "end")
-        self.audio_desc_textbox.delete("0.0", "end")
+        entry_name = self.audio_name_entry.get().strip()
+        audio_desc = self.audio_desc_textbox.get("0.0", "end").strip()
+        tags = parse_tags(self.audio_tags_entry.get())
+        jobs = []
+        for file_path in file_paths:
+            # El nombre escrito sólo se usa al subir un único archivo
+            name = entry_name if entry_name and len(file_paths) == 1 else os.path.splitext(os.path.basename(file_path))[0]
+            if not name:
+                messagebox.showerror("Error", "El nombre del audio no puede estar vacío.")
+                return
+            jobs.append({"source": file_path, "name": name, "description": audio_desc, "tags": tags})
+
+        self.upload_button.configure(text="Importando...", state="disabled")
+        self.import_progress.set(0.0)
+        self.import_progress.grid()
+        # A la frecuencia del mezclador: ni SDL ni el mezclador de streams tienen que volver a remuestrear
+        self.importer.start(jobs, sample_rate=self.app.stream_mixer.sample_rate if self.transcode_var.get() else None)
+
+    def import_progress_changed(self, fraction, name):
+        self.import_progress.set(fraction)
+        if name:
+            self.recording_status.configure(text=f"Importando '{name}'... {int(fraction * 100)}%")
+
+    def import_ready(self, job, temp_path, digest):
+        """A file finished copying/transcoding: store it and add its cue"""
+        self.app.store_audio(temp_path, {"name": job["name"], "file_path": temp_path,
+                                         "description": job["description"], "tags": list(job["tags"])}, digest)
+
+    def import_finished(self, imported, errors):
+        self.upload_button.configure(text="Subir Audio", state="normal")
+        self.import_progress.grid_remove()
+        self.recording_status.configure(text=f"{imported} audio(s) importado(s)")
+        if imported:
+            self.clear_fields()
+        if errors:
+            details = "\n".join(f"{name}: {error}" for name, error in errors)
+            messagebox.showerror("Error", f"No se pudieron cargar algunos audios:\n{details}")
 
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, profiler=None, report_startup=False):
         super().__init__()
+        self.profiler = profiler or StartupProfiler()
+        self.report_startup = report_startup  # --profile-startup: imprime el perfil al terminar de arrancar
+        self.start_telemetry()
+
+        # El audio (imports pesados y apertura del dispositivo) se prepara en segundo plano mientras
+        # la ventana sale en pantalla; finish_startup lo monta cuando ya hay un primer fotograma
+        self.audio_ready = threading.Event()
+        self.audio_warmup_error = None
+        self.audio_backend_ready = False  # Blob store, caché y metadatos ya creados: se puede tocar la biblioteca
+        self.devices = DeviceManager(get_data_path("audio_config.json"))  # Sólo lee el JSON; PortAudio, después
+        threading.Thread(target=self.warm_up_audio, name="arranque-audio", daemon=True).start()
 
         self.title("Consola Audio - JEACH")
         self.geometry("1000x700")
         self.minsize(800, 600)
 
-        self.audios = self.load_audios()  # Load persisted audios
+        self.audio_view = None
+        self.video_view = None  # Las vistas secundarias se construyen al visitarlas por primera vez
+        self.linked_video_cue = None  # Cue al que sigue el video, elegido desde el menú del cue
+        self.settings_view = None
+        self.ui_calls = queue.Queue()  # Background threads hand work to Tk through post_to_ui
+        self.bind("<<UiCall>>", self.run_ui_calls)
+        with self.profiler.phase("biblioteca"):
+            self.library = AudioLibrary(get_data_path("audios.db"), legacy_json_path=get_data_path("audios.json"))
+            self.audios = self.load_audios()  # Load persisted audios
+
+        with self.profiler.phase("ventana"):
+            self.build_window()
+        self.first_frame_shown = False
+        self.bind("<Map>", self.on_first_frame, add="+")
+        self.diagnostics = None
+        self.remote = None  # Control remoto para tablets; arranca junto a OSC y MIDI
+        self.remote_url = None  # Dirección con el token, para abrirla en las tablets
+        self.bind("<Control-Shift-D>", self.toggle_diagnostics)  # Panel oculto de diagnóstico
+        telemetry.watch_tk(self)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def start_telemetry(self):
+        log_dir = get_data_path("logs")
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            telemetry.start(os.path.join(log_dir, "consola.log"))
+        except OSError as e:
+            print(f"No se pudo abrir el registro de diagnóstico: {e}")
 
+    def toggle_diagnostics(self, event=None):
+        from diagnosticsPanel import DiagnosticsPanel
+
+        if self.diagnostics is not None and self.diagnostics.winfo_exists():
+            self.diagnostics.close()
+            self.diagnostics = None
+        else:
+            self.diagnostics = DiagnosticsPanel(self, telemetry, extra_lines=self.diagnostic_lines)
+        return "break"
+
+    def diagnostic_lines(self):
+        """Engine state for the diagnostics panel."""
+        if self.audio_view is None:
+            return ["Motor de audio: arrancando"]
+        cache = self.cue_cache.stats()
+        lines = [
+            f"Voces activas: {len(self.audio_engine.snapshot())}  ·  en cola: {len(self.audio_engine.play_queue)}",
+            f"Caché de cues: {cache['cached']} cues, {cache['used_mb']:.0f}/{cache['budget_mb']:.0f} MB, "
+            f"aciertos {cache['hits']}, fallos {cache['misses']}",
+            f"Mezclador: {self.stream_mixer.callbacks} bloques, {self.stream_mixer.underflows} underruns",
+        ]
+        triggers = self.triggers.latency_stats()
+        if triggers:
+            lines.append(f"Disparadores: p50 {triggers['p50_ms']:.2f} ms, p99 {triggers['p99_ms']:.2f} ms")
+        return lines
+
+    def on_close(self):
+        if self.remote is not None:
+            self.remote.close()
+        triggers = getattr(self, "triggers", None)
+        if triggers is not None:
+            triggers.close()  # Socket OSC y puerto MIDI
+        if self.video_view is not None:
+            self.video_view.close()
+        self.devices.stop()
+        telemetry.stop()  # Vacía la cola del registro antes de salir
+        self.destroy()
+
+    def build_window(self):
         self.main_container = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
         self.main_container.pack(fill="both", expand=True)
         self.main_container.grid_rowconfigure(0, weight=1)
@@ -271,82 +512,435 @@ class App(ctk.CTk):
         self.content_frame.grid_rowconfigure(0, weight=1)
         self.content_frame.grid_columnconfigure(0, weight=1)
 
-        self.audio_view = AudioView(self.content_frame, app=self)
-        self.video_view = VideoView(self.content_frame)
-        self.settings_view = SettingsView(self.content_frame, audio_app=self)
+        self.loading_label = ctk.CTkLabel(self.content_frame, text="Cargando audios...", text_color="gray",
+                                          font=ctk.CTkFont(size=16))
+        self.loading_label.pack(expand=True)
+        self.highlight_button(self.audio_button)
 
+    def warm_up_audio(self):
+        """Background: import the audio stack module by module and open the pygame mixer."""
+        try:
+            for module in AUDIO_STACK:
+                with self.profiler.phase(f"import {module}"):
+                    importlib.import_module(module)
+            from deviceManager import init_mixer
+            with self.profiler.phase("frecuencia de salida"):
+                sample_rate = self.devices.startup_rate()  # La nativa de la salida: sin remuestreo en el driver
+            with self.profiler.phase("pygame.mixer.init"):
+                init_mixer(sample_rate)
+        except Exception as e:
+            print(f"Error al preparar el audio: {e}")
+            self.audio_warmup_error = e
+        self.audio_ready.set()
+
+    def on_first_frame(self, event):
+        if event.widget is not self or self.first_frame_shown:
+            return
+        self.first_frame_shown = True
+        self.profiler.mark("primer fotograma")
+        self.after_idle(self.finish_startup)
+
+    def finish_startup(self):
+        """Build the audio back end and the audio view once the warm-up is done (retries every 20 ms)."""
+        if not self.audio_ready.is_set():
+            self.after(20, self.finish_startup)
+            return
+        if self.audio_warmup_error is not None:
+            self.loading_label.configure(text=f"No se pudo iniciar el audio: {self.audio_warmup_error}")
+            if self.settings_view is not None:
+                self.settings_view.update_library_actions()
+            return
+        with self.profiler.phase("motor de audio"):
+            self.build_audio_backend()
+        with self.profiler.phase("vista de audio"):
+            self.build_audio_view()
+        self.audio_backend_ready = True
+        if self.settings_view is not None:
+            self.settings_view.update_library_actions()
+        self.loading_label.destroy()
         self.show_audio_view()
+        self.profiler.mark("listo")
+        telemetry.log("arranque", **{name: round(ms, 1) for name, ms in self.profiler.marks.items()})
+        telemetry.add_probe("mezclador.underruns", lambda: self.stream_mixer.underflows)
+        self.devices.on_change = lambda added, removed: self.post_to_ui(self.on_devices_changed, added, removed)
+        self.devices.on_probed = lambda blocksize: self.post_to_ui(self.on_blocksize_probed, blocksize)
+        self.devices.start_watching(is_idle=self.portaudio_idle)
+        if self.report_startup:
+            self.after_idle(lambda: print(self.profiler.report()))
+
+    def build_audio_backend(self):
+        import pygame
+        from blobStore import BlobStore
+        from cueCache import CueCache
+        from streamMixer import StreamMixer
+        from audioEngine import AudioEngine
+        from audioMetadata import MetadataCache
+
+        self.blob_store = BlobStore(get_data_path(os.path.join("data", "blobs")))
+        self.migration_report = self.migrate_to_blobs()
+        self.cue_cache = CueCache(budget_mb=CUE_CACHE_BUDGET_MB)
+        for audio in self.audios:
+            self.cue_cache.set_gain(audio["file_path"], audio.get("gain_db", 0.0))
+        frequency, _, channels = pygame.mixer.get_init()
+        self.stream_mixer = StreamMixer(sample_rate=frequency, channels=channels, device=self.devices.config["output"],
+                                        blocksize=self.devices.blocksize(frequency))
+        self.cue_cache.is_streamed = self.stream_mixer.accepts
+        self.cue_cache.preload([audio["file_path"] for audio in self.audios])
+        self.audio_engine = AudioEngine(self.cue_cache, stream_mixer=self.stream_mixer)
+        self.metadata = MetadataCache(get_data_path(os.path.join("data", ".cache", "meta")))
+        self.metadata.on_ready = lambda file_path: self.post_to_ui(self.audio_view.on_metadata_ready, file_path)
+        self.audio_engine.seek_index_for = self.metadata.peek  # Índice de frames de los MP3 para saltar
+        self.cue_list = CueList(self.audio_engine, get_data_path("show.json"), resolve=self.audio_by_id)
+        # OSC, MIDI y atajos disparan en el hilo del motor; la UI sólo se refresca después
+        self.triggers = TriggerInput(self.audio_engine, handlers={
+            "go": self.cue_list.go,
+            "stop": self.panic_stop,
+            "play": self.play_cue_by_id,
+            "stop_cue": self.stop_cue_by_id,
+            "enqueue": self.enqueue_cue_by_id,
+            "pause": self.pause_cue_by_id,
+        })
+        self.triggers.map_cues(self.audios)
+        self.file_janitor = FileJanitor(is_released=self.audio_engine.is_released)
+        self.blob_store.on_corrupt = lambda file_path: self.post_to_ui(self.audio_view.on_blob_corrupt, file_path)
+
+    def build_audio_view(self):
+        from audioView import AudioView
+        from libraryScanner import LibraryScanner
+
+        self.audio_view = AudioView(self.content_frame, app=self)
+
+        self.cue_list.on_changed = lambda: self.post_to_ui(self.audio_view.on_cue_list_changed)
+        self.bind("<space>", self.audio_view.go_key)
+        self.after_idle(self.cue_list.arm)
+        # El motor avisa de cada cambio (play, pausa, fin, error) en vez de que la UI lo sondee
+        self.audio_engine.events.subscribe("*", lambda kind, data: self.post_to_ui(
+            self.audio_view.on_engine_event, kind, data))
+        self.bind("<Key>", self.on_hotkey)
+        self.after_idle(self.start_triggers)
+
+        if self.migration_report:
+            self.after_idle(self.show_migration_report)
+
+        self.library_scanner = LibraryScanner(get_data_path("data"), on_changes=self.post_library_changes)
+        self.after_idle(lambda: self.library_scanner.start(audio["file_path"] for audio in self.audios))
+        # Backfill waveform/metadata sidecars for entries that predate them
+        self.after_idle(lambda: self.metadata.ingest(audio["file_path"] for audio in self.audios))
+        # Entries added before loudness analysis existed play at their raw level until measured
+        self.after_idle(lambda: self.analyze_loudness([audio for audio in self.audios if "lufs" not in audio]))
+
+    def portaudio_idle(self):
+        """No PortAudio stream open, so the device watcher may restart PortAudio to look for new devices."""
+        # El stream del grabador, no is_recording: éste se marca cuando start() ya terminó de abrirlo
+        recorder = self.settings_view.recorder if self.settings_view is not None else None
+        recording = recorder is not None and recorder.is_open()
+        return not recording and not self.stream_mixer.is_open()
+
+    def on_devices_changed(self, added, removed):
+        if self.settings_view is not None:
+            self.settings_view.refresh_devices()
+        if removed and self.devices.config["output"] in removed:
+            messagebox.showwarning("Advertencia", "Se desconectó la salida de audio elegida; se usará la "
+                                                  "predeterminada.")
+
+    def on_blocksize_probed(self, blocksize):
+        if self.stream_mixer.sample_rate == self.devices.config["sample_rate"] \
+                and self.stream_mixer.set_blocksize(blocksize):
+            print(f"Salida de audio con bloques de {blocksize} frames")
+
+    def post_to_ui(self, func, *args):
+        """Thread-safe: queue func(*args) and wake the Tk loop to run it."""
+        self.ui_calls.put((func, args))
+        try:
+            self.event_generate("<<UiCall>>", when="tail")
+        except (RuntimeError, tk.TclError):
+            pass  # La ventana se está cerrando; la llamada queda en cola
+
+    def run_ui_calls(self, event=None):
+        while not self.ui_calls.empty():
+            func, args = self.ui_calls.get_nowait()
+            func(*args)
+
+    def post_library_changes(self, changes):
+        """Called on the scanner thread with a batch of data-folder changes."""
+        self.post_to_ui(self.audio_view.on_library_changed, changes)
+
+    def migrate_to_blobs(self):
+        """One-shot move of data/ files into the blob store; returns the report, or None if already done."""
+        if self.library.get_meta("blobs_migrated"):
+            return None
+        from libraryScanner import normalize_path
+
+        data_dir = normalize_path(get_data_path("data")) + os.sep
+        report = self.blob_store.migrate(
+            [audio for audio in self.audios if normalize_path(audio["file_path"]).startswith(data_dir)])
+        try:
+            self.library.save_all(self.audios)
+            self.library.set_meta("blobs_migrated", "1")
+        except Exception as e:
+            print(f"Error saving migrated audios to library: {e}")
+        return report if report["moved"] else None
+
+    def show_migration_report(self):
+        report = self.migration_report
+        messagebox.showinfo(
+            "Almacenamiento",
+            f"{report['moved']} audios movidos al almacén por contenido.\n"
+            f"{report['deduplicated']} duplicados fusionados, "
+            f"{report['reclaimed_bytes'] / (1024 * 1024):.1f} MB liberados.")
+
+    def ingest_file(self, file_path, audio):
+        """Hash a finished file off the UI thread, then store it and add its cue."""
+        from audioMetadata import file_hash
+
+        def run():
+            try:
+                digest = file_hash(file_path)
+            except OSError as e:
+                print(f"Error al leer '{os.path.basename(file_path)}': {e}")
+                return
+            self.post_to_ui(self.store_audio, file_path, audio, digest)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def store_audio(self, file_path, audio, digest):
+        """Move a file into the blob store and add its cue; identical audio shares one blob."""
+        blob_path = self.blob_store.path_for(digest, os.path.splitext(file_path)[1])
+        self.file_janitor.cancel(blob_path)  # El mismo audio pudo borrarse hace un momento
+        try:
+            blob_path, reclaimed = self.blob_store.put(file_path, digest)
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo guardar el audio: {e}")
+            return
+        audio["file_path"] = blob_path
+        twin = next((a for a in self.audios if a["file_path"] == blob_path and "lufs" in a), None)
+        if twin is not None:
+            for key in ("lufs", "true_peak_db", "gain_db"):
+                audio[key] = twin[key]
+        self.add_audio(audio)
+        if twin is None:
+            self.analyze_loudness([audio])  # Precarga el cue cuando su ganancia ya está calculada
+        self.metadata.ingest([blob_path])
+        if reclaimed:
+            print(f"'{audio['name']}' ya estaba en la biblioteca: se reutiliza el mismo archivo")
+
+    def analyze_loudness(self, audios, on_done=None):
+        """Measure loudness off the UI thread; gains are applied on the UI thread when done."""
+        audios = list(audios)
+        if not audios:
+            return
+
+        from loudness import analyze_library
+
+        def run():
+            started = time.perf_counter()
+            results = analyze_library({audio["file_path"] for audio in audios})
+            self.post_to_ui(self.apply_loudness, audios, results, time.perf_counter() - started, on_done)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def apply_loudness(self, audios, results, elapsed, on_done=None):
+        """Store each cue's loudness and gain, then (re)decode it with the gain baked in."""
+        current = {id(audio) for audio in self.audios}
+        updated = []
+        for audio in audios:
+            result = results.get(audio["file_path"], {})
+            if "error" in result:
+                print(f"Error al medir la sonoridad de '{audio['name']}': {result['error']}")
+                continue
+            if id(audio) not in current:
+                continue  # Borrado mientras se analizaba
+            audio["lufs"] = result["lufs"] if math.isfinite(result["lufs"]) else None
+            audio["true_peak_db"] = result["true_peak_db"] if math.isfinite(result["true_peak_db"]) else None
+            audio["gain_db"] = round(result["gain_db"], 2)
+            self.cue_cache.set_gain(audio["file_path"], audio["gain_db"])
+            updated.append(audio)
+        try:
+            self.library.save_all(updated)
+        except Exception as e:
+            print(f"Error saving loudness to library: {e}")
+        self.cue_cache.preload([audio["file_path"] for audio in updated])
+        if on_done:
+            on_done(len(updated), elapsed)
 
     def load_icon(self, icon_name):
-        if Image is None:
+        """Open an icon once; the same image serves both appearance modes."""
+        try:
+            from PIL import Image
+        except ImportError:
+            print("Pillow no está instalado. Los iconos no se mostrarán.")
             return None
         try:
             icon_path = resource_path(os.path.join("assets", icon_name))
             if not os.path.exists(icon_path):
                 return None
-            image = ctk.CTkImage(light_image=Image.open(icon_path),
-                                 dark_image=Image.open(icon_path),
-                                 size=(20, 20))
-            return image
+            with Image.open(icon_path) as opened:
+                image = opened.copy()  # Decodificada una vez y con el archivo ya cerrado
+            return ctk.CTkImage(light_image=image, dark_image=image, size=(20, 20))
         except Exception as e:
             print(f"Error loading icon '{icon_name}': {e}")
             return None
 
+    def show_view(self, view, button):
+        for other in (self.audio_view, self.video_view, self.settings_view):
+            if other is not None and other is not view:
+                other.pack_forget()
+        if view is not None:
+            view.pack(fill="both", expand=True)
+        self.highlight_button(button)
+
+    def highlight_button(self, button):
+        for other in (self.audio_button, self.video_button, self.settings_button):
+            key = "hover_color" if other is button else "fg_color"
+            other.configure(fg_color=ctk.ThemeManager.theme["CTkButton"][key])
+
     def show_audio_view(self):
-        self.audio_view.pack(fill="both", expand=True)
-        self.video_view.pack_forget()
-        self.settings_view.pack_forget()
-        self.audio_button.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["hover_color"])
-        self.video_button.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"])
-        self.settings_button.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"])
+        self.show_view(self.audio_view, self.audio_button)  # None mientras el audio sigue arrancando
 
     def show_video_view(self):
-        self.video_view.pack(fill="both", expand=True)
-        self.audio_view.pack_forget()
-        self.settings_view.pack_forget()
-        self.video_button.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["hover_color"])
-        self.audio_button.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"])
-        self.settings_button.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"])
+        if self.video_view is None:
+            from videoView import VideoView
+            with self.profiler.phase("vista de video"):
+                self.video_view = VideoView(self.content_frame, audio_app=self,
+                                            cache_dir=get_data_path(os.path.join("data", ".cache", "video")))
+        self.show_view(self.video_view, self.video_button)
 
     def show_settings_view(self):
-        self.settings_view.pack(fill="both", expand=True)
-        self.audio_view.pack_forget()
-        self.video_view.pack_forget()
-        self.settings_button.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["hover_color"])
-        self.audio_button.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"])
-        self.video_button.configure(fg_color=ctk.ThemeManager.theme["CTkButton"]["fg_color"])
+        if self.settings_view is None:
+            with self.profiler.phase("vista de ajustes"):
+                self.settings_view = SettingsView(self.content_frame, audio_app=self)
+        self.show_view(self.settings_view, self.settings_button)
 
     def refresh_audio_view(self):
         self.audio_view.load_existing_audios()  # Refresh the Audio View with updated audios
 
+    @telemetry.timed("app.load_audios")
     def load_audios(self):
-        """Load audios from JSON file if it exists, otherwise return empty list."""
-        json_path = get_data_path("audios.json")
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    audios = json.load(f)
-                # Verify file paths exist
-                return [audio for audio in audios if os.path.exists(audio["file_path"])]
-            except (json.JSONDecodeError, Exception) as e:
-                print(f"Error loading audios from JSON: {e}")
-                return []
-        return []
+        """Load audios from the library; the first run migrates audios.json automatically."""
+        try:
+            return self.library.all()
+        except Exception as e:
+            print(f"Error loading audios from library: {e}")
+            return []
 
+    def audio_by_id(self, audio_id):
+        return next((audio for audio in self.audios if audio.get("id") == audio_id), None)
+
+    def start_triggers(self):
+        try:
+            host, port = self.triggers.start_osc()
+            print(f"OSC escuchando en el puerto UDP {port}")
+        except OSError as e:
+            print(f"No se pudo abrir el puerto OSC: {e}")
+        self.triggers.start_midi()
+        from remoteControl import RemoteServer, lan_address, remote_token
+
+        token = remote_token(get_data_path("remote_config.json"))
+        self.remote = RemoteServer(self.triggers, self.audio_engine, token)
+        self.remote.set_cues(self.audios)
+        try:
+            _, port = self.remote.start()
+            self.remote_url = f"http://{lan_address()}:{port}/?token={token}"
+            print(f"Control remoto en {self.remote_url}")
+        except OSError as e:
+            self.remote = None
+            print(f"No se pudo abrir el puerto del control remoto: {e}")
+        if self.settings_view is not None:
+            self.settings_view.refresh_remote()
+
+    def on_hotkey(self, event):
+        if isinstance(event.widget, (tk.Entry, tk.Text)):
+            return None  # Escribiendo en un campo, no es un atajo
+        return self.triggers.on_key(event)
+
+    def play_cue_by_id(self, audio_id):
+        """Trigger handler (engine worker): restart a cue by its library id."""
+        audio = self.audio_by_id(audio_id)
+        if audio is None:
+            return
+        self.audio_engine.stop_cue(audio["file_path"], fade_out_ms=0)
+        self.audio_engine.play(audio["file_path"], **self.audio_view.cue_options(audio))
+
+    def stop_cue_by_id(self, audio_id):
+        audio = self.audio_by_id(audio_id)
+        if audio is not None:
+            self.audio_engine.stop_cue(audio["file_path"])
+
+    def enqueue_cue_by_id(self, audio_id):
+        """Trigger handler (engine worker): AudioView.enqueue_audio by id, resume if paused, else restart."""
+        audio = self.audio_by_id(audio_id)
+        if audio is None:
+            return
+        voices = self.audio_engine.voices_for(audio["file_path"])
+        if voices and all(voice.state == "paused" for voice in voices):
+            for voice in voices:
+                self.audio_engine.resume(voice.id)
+        else:
+            self.play_cue_by_id(audio_id)
+
+    def pause_cue_by_id(self, audio_id):
+        audio = self.audio_by_id(audio_id)
+        if audio is not None:
+            for voice in self.audio_engine.voices_for(audio["file_path"]):
+                self.audio_engine.pause(voice.id)
+
+    def panic_stop(self):
+        self.cue_list.cancel_pending()
+        self.audio_engine.stop_all()
+
+    def add_audio(self, audio):
+        """Append an audio and persist only that entry."""
+        try:
+            self.library.add(audio)
+        except Exception as e:
+            print(f"Error saving audio to library: {e}")
+        self.audios.append(audio)
+        self.triggers.map_cues(self.audios)
+        if self.remote is not None:
+            self.remote.set_cues(self.audios)
+        if self.audio_view is not None:
+            self.audio_view.add_cue(audio)  # Incremental: no full grid rebuild
+
+    def update_audio(self, audio):
+        try:
+            self.library.update(audio)
+        except Exception as e:
+            print(f"Error updating audio in library: {e}")
+        self.triggers.map_cues(self.audios)
+        if self.remote is not None:
+            self.remote.set_cues(self.audios)
+        if self.audio_view is not None:
+            self.audio_view.update_cue(audio)
+
+    def remove_audio(self, audio):
+        try:
+            self.library.delete(audio["id"])
+        except Exception as e:
+            print(f"Error deleting audio from library: {e}")
+        self.audios = [a for a in self.audios if a is not audio]
+        if self.linked_video_cue is audio:
+            self.linked_video_cue = None
+            if self.video_view is not None:
+                self.video_view.refresh_sync_options()
+        self.triggers.map_cues(self.audios)
+        if self.remote is not None:
+            self.remote.set_cues(self.audios)
+        if self.audio_view is not None:
+            self.audio_view.remove_cue(audio)
+
+    @telemetry.timed("app.save_audios")
     def save_audios(self):
-        """Save audios to JSON file."""
-        json_path = get_data_path("audios.json")
+        """Persist every audio in a single transaction."""
         try:
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(self.audios, f, ensure_ascii=False, indent=4)
+            self.library.save_all(self.audios)
         except Exception as e:
-            print(f"Error saving audios to JSON: {e}")
+            print(f"Error saving audios to library: {e}")
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # El análisis de sonoridad usa procesos también en el .exe
     ctk.set_appearance_mode("Dark")
     ctk.set_default_color_theme("blue")
-    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=4096)
-    app = App()
+    app = App(profiler, report_startup="--profile-startup" in sys.argv)
     app.mainloop()
 
 # pyinstaller --onefile --noconsole --add-data "assets;assets" --add-data "data;data" --hidden-import="customtkinter" 
@@ -0,0 +1,52 @@
+import tkinter as tk
+
+from levelMeter import METER_FLOOR_DB
+
+METER_COLORS = (  # (desde dBFS, color) de la barra de pico
+    (-18.0, "#27AE60"),
+    (-6.0, "#F1C40F"),
+    (-0.1, "#E74C3C"),
+)
+
+
+class MeterBar(tk.Canvas):
+    """Medidor horizontal de varios canales: RMS, pico y pico retenido. Los elementos se crean una vez
+    y draw() sólo mueve sus coordenadas."""
+
+    def __init__(self, master, channels=2, bar_height=6, gap=2, **kwargs):
+        height = channels * bar_height + (channels - 1) * gap
+        super().__init__(master, height=height, bg="#222831", highlightthickness=0, **kwargs)
+        self.bar_height = bar_height
+        self.gap = gap
+        self.bars = []  # (rms, pico, retenido) por canal
+        for channel in range(channels):
+            top = channel * (bar_height + gap)
+            self.bars.append((
+                self.create_rectangle(0, top, 0, top + bar_height, fill="#1E6F3E", width=0),
+                self.create_rectangle(0, top + bar_height // 3, 0, top + bar_height - bar_height // 3,
+                                      fill="#27AE60", width=0),
+                self.create_line(0, top, 0, top + bar_height, fill="white"),
+            ))
+        self.last_levels = None
+
+    def x_for(self, dbfs):
+        return max(0.0, min(1.0, 1 - dbfs / METER_FLOOR_DB)) * self.winfo_width()
+
+    def draw(self, levels):
+        """Show a LevelMeter.levels() reading; channels beyond the bars are ignored."""
+        if levels == self.last_levels:
+            return
+        self.last_levels = levels
+        for channel, (rms_item, peak_item, hold_item) in enumerate(self.bars):
+            if channel >= len(levels["peak"]):
+                break
+            top = channel * (self.bar_height + self.gap)
+            bottom = top + self.bar_height
+            peak = levels["peak"][channel]
+            self.coords(rms_item, 0, top, self.x_for(levels["rms"][channel]), bottom)
+            self.coords(peak_item, 0, top + self.bar_height // 3, self.x_for(peak), bottom - self.bar_height // 3)
+            self.itemconfigure(peak_item, fill=next(
+                (color for threshold, color in reversed(METER_COLORS) if peak >= threshold), METER_COLORS[0][1]))
+            hold_x = self.x_for(levels["hold"][channel])
+            self.coords(hold_item, hold_x, top, hold_x, bottom)
+            self.itemconfigure(hold_item, state="normal" if levels["hold"][channel] > METER_FLOOR_DB else "hidden")
@@ -0,0 +1,500 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import struct
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+REMOTE_PORT = 8765
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+STATE_SECONDS = 0.5  # Mientras algo suena se reenvían las posiciones a este ritmo
+STATE_MIN_SECONDS = 0.02  # Como mucho un envío de estado cada 20 ms, por muchos disparos que lleguen
+MAX_REQUEST_BYTES = 16 * 1024
+MAX_MESSAGE_BYTES = 64 * 1024
+MAX_CLIENT_BACKLOG = 256 * 1024  # Bytes sin enviar a un cliente; si se acumulan más, está colgado y se le cierra
+ACK_TIMEOUT = 2.0
+READ_TIMEOUT = 5.0  # Para terminar de mandar una petición o un mensaje ya empezado
+WS_IDLE_SECONDS = 30.0  # Un WebSocket callado recibe un ping; si tampoco contesta en otro plazo igual, se cierra
+# Acción del control remoto -> acción de TriggerInput (las mismas rutas del motor que usan los botones de la vista)
+REMOTE_ACTIONS = {"play": "enqueue", "pause": "pause", "stop": "stop_cue", "stop_all": "stop", "go": "go"}
+CUE_ACTIONS = ("play", "pause", "stop")
+HTTP_STATUS = {200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+               504: "Gateway Timeout"}
+
+
+def remote_token(config_path):
+    """The remote's access token, created on first use and kept in config_path (JSON)."""
+    try:
+        with open(config_path, encoding="utf-8") as f:
+            token = json.load(f).get("token")
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Error al leer la configuración del control remoto: {e}")
+    token = secrets.token_urlsafe(12)
+    temp_path = config_path + ".tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"token": token}, f, indent=4)
+        os.replace(temp_path, config_path)
+    except OSError as e:
+        print(f"Error al guardar la configuración del control remoto: {e}")
+    return token
+
+
+def lan_address():
+    """This machine's address on the local network, for the URL shown to the user (no packet is sent)."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.connect(("192.0.2.1", 9))  # Sólo elige la interfaz de salida; UDP no manda nada al conectar
+            return sock.getsockname()[0]
+        except OSError:
+            return "127.0.0.1"
+
+
+def trusted_host(host):
+    """True for a Host header naming this machine: an IP literal, localhost or its own name.
+
+    Any other name may be a rebinding DNS entry pointing at us from a web page's origin.
+    """
+    try:
+        name = urlsplit(f"//{host}").hostname or ""
+    except ValueError:
+        return False
+    try:
+        ipaddress.ip_address(name)
+        return True
+    except ValueError:
+        pass
+    hostname = socket.gethostname().lower()
+    return name in ("localhost", hostname, f"{hostname}.local")
+
+
+def websocket_accept(key):
+    """Sec-WebSocket-Accept for a client's Sec-WebSocket-Key (RFC 6455)."""
+    return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+
+
+def encode_frame(payload, opcode=0x1, mask=None):
+    """One final WebSocket frame; clients must pass a 4-byte mask, the server sends unmasked."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, mask_bit | length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, mask_bit | 127, length)
+    if not mask:
+        return header + payload
+    return header + mask + _unmask(payload, mask)
+
+
+def _unmask(payload, mask):
+    # XOR con la máscara repetida, como un único entero en vez de byte a byte
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(len(payload), "big")
+
+
+async def read_frame(reader, header=None):
+    """Read one WebSocket frame: (opcode, payload). Fragmented messages are not used by the remote.
+
+    header is the frame's first two bytes when the caller already read them (to wait on them separately).
+    """
+    first, second = header or await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError("Mensaje demasiado grande")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    return first & 0x0F, _unmask(payload, mask) if mask else payload
+
+
+class RemoteServer:
+    """Control remoto por HTTP + WebSocket para tablets en la red local, en su propio hilo con su loop de asyncio.
+
+    Las acciones van por TriggerInput directas al hilo del motor, igual que OSC, sin pasar por Tk. El estado
+    (voces sonando) se difunde a todos los clientes conectados: los eventos del motor se agrupan en un solo envío
+    y cada cliente recibe bytes ya codificados sin esperar a nadie, así que un cliente lento no retrasa a los demás
+    ni al motor.
+
+    Rutas: GET / (página del mando), GET /cues (JSON), POST /cues/<id>/play|pause|stop, POST /stop, POST /go
+    y /ws (WebSocket: {"action": ..., "cue": id, "ref": n}, responde {"type": "ack", "ref": n}).
+
+    Toda petición lleva ?token=...; además el Host tiene que nombrar a esta máquina y, si el navegador manda
+    Origin, éste tiene que ser la propia página del mando, así que otra web abierta en la red no puede disparar.
+    """
+
+    def __init__(self, triggers, engine, token):
+        self.triggers = triggers
+        self.engine = engine
+        self.token = token
+        self.address = None
+        self.cues = []  # Lista pública de cues; se reemplaza entera desde la UI
+        self.cue_ids = {}  # file_path -> id, para traducir las voces del motor
+        self.known_ids = frozenset()
+        self.clients = set()  # StreamWriter de los WebSocket abiertos (sólo desde el loop)
+        self._loop = None
+        self._thread = None
+        self._state_pending = False
+        self._state_sent_at = 0.0
+        self._cues_message = encode_frame(json.dumps({"type": "cues", "cues": []}))
+
+    def set_cues(self, audios):
+        """Publish the cue list (call from the UI thread after the library changes)."""
+        cues = [{"id": audio["id"], "name": audio.get("name", ""), "description": audio.get("description", ""),
+                 "tags": list(audio.get("tags") or ()), "hotkey": audio.get("hotkey")}
+                for audio in audios if audio.get("id") is not None]
+        self.cue_ids = {audio["file_path"]: audio["id"] for audio in audios if audio.get("id") is not None}
+        self.known_ids = frozenset(cue["id"] for cue in cues)
+        self.cues = cues
+        message = encode_frame(json.dumps({"type": "cues", "cues": cues}, ensure_ascii=False))
+        self._cues_message = message
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._broadcast, message)
+
+    def start(self, host="0.0.0.0", port=REMOTE_PORT):
+        """Start the server thread; returns the bound (host, port) or raises OSError."""
+        started = threading.Event()
+        failure = []
+        self._thread = threading.Thread(target=self._run, args=(host, port, started, failure), daemon=True)
+        self._thread.start()
+        started.wait()
+        if failure:
+            self._thread = None
+            raise failure[0]
+        self.engine.events.subscribe("*", self._on_engine_event)
+        return self.address
+
+    def _run(self, host, port, started, failure):
+        loop = asyncio.new_event_loop()
+        try:
+            server = loop.run_until_complete(asyncio.start_server(self._handle, host, port))
+        except OSError as e:
+            failure.append(e)
+            loop.close()
+            started.set()
+            return
+        self.address = server.sockets[0].getsockname()[:2]
+        self._loop = loop
+        ticker = loop.create_task(self._tick())
+        started.set()
+        try:
+            loop.run_forever()
+        finally:
+            ticker.cancel()
+            server.close()
+            for writer in list(self.clients):
+                writer.close()
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.close()
+
+    def _on_engine_event(self, kind, data):
+        # Hilo del motor: sólo se avisa al loop; el estado se arma y se envía allí
+        loop = self._loop
+        if kind == "meter" or loop is None or not self.clients or self._state_pending:
+            return
+        self._state_pending = True
+        try:
+            loop.call_soon_threadsafe(self._push_state)
+        except RuntimeError:
+            pass  # El loop ya se cerró
+
+    def state(self):
+        voices = [{"cue": self.cue_ids.get(voice["file_path"]), "state": voice["state"],
+                   "position": round(voice["position"], 2), "length": round(voice["length"] or 0, 2)}
+                  for voice in self.engine.snapshot()]
+        return {"type": "state", "voices": voices}
+
+    def _push_state(self):
+        # Una ráfaga de eventos (stop + play de un GO, o decenas de tablets a la vez) sale en un solo envío
+        wait = self._state_sent_at + STATE_MIN_SECONDS - time.perf_counter()
+        if wait > 0:
+            self._loop.call_later(wait, self._push_state)
+            return
+        self._state_pending = False
+        self._state_sent_at = time.perf_counter()
+        if self.clients:
+            self._broadcast(encode_frame(json.dumps(self.state())))
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(STATE_SECONDS)
+            try:
+                # snapshot() toma el lock del motor: las voces cambian a la vez en el hilo del motor y en el de Tk
+                playing = any(voice["state"] == "playing" for voice in self.engine.snapshot())
+                if self.clients and playing and not self._state_pending:
+                    self._state_pending = True
+                    self._push_state()
+            except Exception as e:
+                self._state_pending = False  # Un tick fallido no deja las tablets sin estado para siempre
+                print(f"Error al enviar el estado al control remoto: {e}")
+
+    def _broadcast(self, frame):
+        for writer in list(self.clients):
+            self._send(writer, frame)
+
+    def _send(self, writer, frame):
+        if writer.is_closing():
+            self.clients.discard(writer)
+            return
+        if writer.transport.get_write_buffer_size() > MAX_CLIENT_BACKLOG:
+            self.clients.discard(writer)
+            writer.close()
+            return
+        writer.write(frame)  # Sin drain(): el transporte envía cuando puede y nadie espera
+
+    def _trigger(self, action, args):
+        """Run a remote action on the engine thread; the future is done when the engine has executed it."""
+        future = self._loop.create_future()
+
+        def done():
+            self._loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        self.triggers.trigger(REMOTE_ACTIONS[action], *args, source="remoto", received_at=time.perf_counter(),
+                              done=done)
+        return future
+
+    def _parse_action(self, action, cue):
+        """(action, args) from a remote request, or None if it is not valid."""
+        if action in CUE_ACTIONS:
+            if isinstance(cue, str) and cue.isdigit():
+                cue = int(cue)
+            if not isinstance(cue, int) or cue not in self.known_ids:
+                return None
+            return action, (cue,)
+        if action in ("stop_all", "go") and cue is None:
+            return action, ()
+        return None
+
+    def _allowed(self, url, headers):
+        """Token, Host and Origin checks shared by HTTP and the WebSocket upgrade."""
+        token = parse_qs(url.query).get("token", [""])[0]
+        if not hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8")):
+            return False
+        host = headers.get("host", "")
+        if not trusted_host(host):
+            return False
+        origin = headers.get("origin")
+        return origin is None or origin in (f"http://{host}", f"https://{host}")
+
+    async def _handle(self, reader, writer):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), READ_TIMEOUT)
+            if len(head) > MAX_REQUEST_BYTES:
+                return
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            url = urlsplit(target)
+            if not self._allowed(url, headers):
+                self._respond(writer, 403, {"error": "Acceso denegado"})
+                return
+            if headers.get("upgrade", "").lower() == "websocket" and url.path == "/ws":
+                await self._websocket(reader, writer, headers)
+                return
+            length = int(headers.get("content-length", 0) or 0)
+            if length:
+                await asyncio.wait_for(reader.readexactly(min(length, MAX_REQUEST_BYTES)), READ_TIMEOUT)
+            await self._http(writer, method, url.path)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError,
+                ValueError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def _http(self, writer, method, path):
+        parts = path.strip("/").split("/")
+        if method == "GET" and path == "/":
+            self._respond(writer, 200, REMOTE_PAGE.encode("utf-8"), "text/html; charset=utf-8")
+        elif method == "GET" and path == "/cues":
+            self._respond(writer, 200, {"cues": self.cues, "voices": self.state()["voices"]})
+        elif method != "POST" and parts[0] in ("cues", "stop", "go"):
+            self._respond(writer, 405, {"error": "Use POST"})
+        elif parts in (["stop"], ["go"]) or (len(parts) == 3 and parts[0] == "cues"):
+            if parts[0] == "cues":
+                parsed = self._parse_action(parts[2], parts[1])
+            else:
+                parsed = self._parse_action("stop_all" if parts[0] == "stop" else "go", None)
+            if parsed is None:
+                self._respond(writer, 404, {"error": "Cue o acción desconocida"})
+                return
+            try:
+                await asyncio.wait_for(self._trigger(*parsed), ACK_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._respond(writer, 504, {"error": "El motor no respondió"})
+                return
+            self._respond(writer, 200, {"ok": True})
+        else:
+            self._respond(writer, 404, {"error": "No encontrado"})
+        await writer.drain()
+
+    def _respond(self, writer, status, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nCache-Control: no-store\r\nReferrer-Policy: no-referrer\r\n"
+                     "Connection: close\r\n\r\n"
+                     .encode("latin-1") + body)
+
+    async def _websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            self._respond(writer, 400, {"error": "Falta Sec-WebSocket-Key"})
+            return
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {websocket_accept(key)}\r\n\r\n").encode("latin-1"))
+        writer.write(self._cues_message)
+        writer.write(encode_frame(json.dumps(self.state())))
+        self.clients.add(writer)
+        pinged = False
+        while True:
+            try:
+                header = await asyncio.wait_for(reader.readexactly(2), WS_IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                if pinged:
+                    return  # Conexión medio abierta (tablet apagada o fuera de la red)
+                pinged = True
+                self._send(writer, encode_frame(b"", opcode=0x9))
+                continue
+            pinged = False
+            opcode, payload = await asyncio.wait_for(read_frame(reader, header), READ_TIMEOUT)
+            if opcode == 0x8:  # close
+                self._send(writer, encode_frame(payload[:2], opcode=0x8))
+                return
+            if opcode == 0x9:  # ping
+                self._send(writer, encode_frame(payload, opcode=0xA))
+                continue
+            if opcode != 0x1:
+                continue
+            try:
+                message = json.loads(payload)
+                parsed = self._parse_action(message.get("action"), message.get("cue"))
+            except (ValueError, AttributeError):
+                parsed = message = None
+            ref = message.get("ref") if isinstance(message, dict) else None
+            if parsed is None:
+                self._send(writer, encode_frame(json.dumps({"type": "error", "ref": ref,
+                                                            "message": "Cue o acción desconocida"})))
+                continue
+            future = self._trigger(*parsed)
+            # El ack sale cuando el motor ya ejecutó la acción, sin frenar la lectura de más mensajes
+            future.add_done_callback(lambda _, ref=ref: self._send(
+                writer, encode_frame(json.dumps({"type": "ack", "ref": ref}))))
+
+    def close(self):
+        self.engine.events.unsubscribe("*", self._on_engine_event)
+        loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+REMOTE_PAGE = """<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Teatro Verde - Control remoto</title>
+<style>
+body { margin: 0; font-family: sans-serif; background: #222831; color: #eeeeee; }
+header { display: flex; gap: 8px; padding: 12px; position: sticky; top: 0; background: #222831; }
+header button { flex: 1; }
+button { font-size: 18px; padding: 14px; border: 0; border-radius: 8px; background: #00adb5; color: #fff; }
+button.stop { background: #b53300; }
+#status { padding: 0 12px; color: #999; }
+.cue { margin: 8px 12px; padding: 12px; border-radius: 8px; background: #393e46; }
+.cue.playing { outline: 3px solid #00adb5; }
+.cue.paused { outline: 3px solid #e0a800; }
+.cue h3 { margin: 0 0 4px; }
+.cue p { margin: 0 0 8px; color: #aaa; }
+.cue button { margin-right: 6px; padding: 10px 16px; }
+</style>
+</head>
+<body>
+<header><button id="go">GO</button><button id="stopAll" class="stop">Detener todo</button></header>
+<div id="status">Conectando...</div>
+<div id="cues"></div>
+<script>
+let socket, ref = 0, lastVoices = [];
+const token = new URLSearchParams(location.search).get("token");
+function send(action, cue) {
+  if (socket && socket.readyState === 1) socket.send(JSON.stringify({action: action, cue: cue, ref: ++ref}));
+}
+function render(cues) {
+  const list = document.getElementById("cues");
+  list.innerHTML = "";
+  for (const cue of cues) {
+    const item = document.createElement("div");
+    item.className = "cue";
+    item.id = "cue-" + cue.id;
+    const title = document.createElement("h3");
+    title.textContent = cue.name;
+    const description = document.createElement("p");
+    description.textContent = cue.description || "";
+    item.append(title, description);
+    for (const [action, label] of [["play", "Reproducir"], ["pause", "Pausa"], ["stop", "Detener"]]) {
+      const button = document.createElement("button");
+      button.textContent = label;
+      if (action === "stop") button.className = "stop";
+      button.onclick = () => send(action, cue.id);
+      item.append(button);
+    }
+    list.append(item);
+  }
+}
+function showState(voices) {
+  lastVoices = voices;
+  document.querySelectorAll(".cue").forEach(item => item.classList.remove("playing", "paused"));
+  for (const voice of voices) {
+    const item = document.getElementById("cue-" + voice.cue);
+    if (item) item.classList.add(voice.state === "paused" ? "paused" : "playing");
+  }
+  document.getElementById("status").textContent = voices.length ? voices.length + " en reproducción" : "En silencio";
+}
+function connect() {
+  const query = token ? "?token=" + encodeURIComponent(token) : "";
+  socket = new WebSocket((location.protocol === "https:" ? "wss://" : "ws://") + location.host + "/ws" + query);
+  socket.onmessage = event => {
+    const message = JSON.parse(event.data);
+    if (message.type === "cues") { render(message.cues); showState(lastVoices); }
+    else if (message.type === "state") showState(message.voices);
+  };
+  socket.onclose = () => {
+    document.getElementById("status").textContent = "Sin conexión, reintentando...";
+    setTimeout(connect, 1000);
+  };
+}
+document.getElementById("go").onclick = () => send("go");
+document.getElementById("stopAll").onclick = () => send("stop_all");
+connect();
+</script>
+</body>
+</html>
+"""
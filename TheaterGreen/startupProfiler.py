@@ -0,0 +1,45 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Cronómetro del arranque: cuánto cuesta cada fase (imports, ventana, motor...) y cuándo sale el
+    primer fotograma. Las fases pueden correr en hilos distintos."""
+
+    def __init__(self, started_at=None):
+        self.started_at = started_at or time.perf_counter()
+        self.phases = []  # (nombre, hilo, ms desde el arranque al empezar, duración en ms)
+        self.marks = {}  # nombre -> ms desde el arranque
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started_at) * 1000
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.phases.append((name, threading.current_thread().name,
+                                    (start - self.started_at) * 1000, (end - start) * 1000))
+
+    def mark(self, name):
+        """Record a milestone (first frame, ready...) once; later calls are ignored."""
+        with self._lock:
+            self.marks.setdefault(name, self.elapsed_ms())
+
+    def report(self):
+        """Return the phases in start order and the milestones as printable text."""
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[2])
+            marks = sorted(self.marks.items(), key=lambda mark: mark[1])
+        lines = ["Arranque:"]
+        for name, thread, started_ms, duration_ms in phases:
+            lines.append(f"  {started_ms:8.1f} ms  {duration_ms:8.1f} ms  {name} [{thread}]")
+        for name, at_ms in marks:
+            lines.append(f"  {at_ms:8.1f} ms  -> {name}")
+        return "\n".join(lines)
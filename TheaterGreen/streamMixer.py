@@ -0,0 +1,460 @@
+import io
+import os
+import struct
+import threading
+
+import numpy as np
+
+from audioMetadata import SequentialReader
+from deviceManager import PORTAUDIO_LOCK
+from levelMeter import LevelMeter
+from streamRecorder import RingBuffer
+
+MEMMAP_MIN_SECONDS = 60.0  # Los WAV más largos se leen del disco mapeado en vez de decodificarse en RAM
+
+# (formato, bits) -> dtype numpy que se puede mapear tal cual
+PCM_DTYPES = {
+    (1, 16): np.dtype("<i2"),
+    (1, 32): np.dtype("<i4"),
+    (3, 32): np.dtype("<f4"),
+}
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+MP3_PREROLL_FRAMES = 12  # Frames decodificados y descartados tras un salto (reservorio de bits y solape)
+MP3_BUFFER_FRAMES = 1 << 16
+
+
+def wav_layout(file_path):
+    """Offset, frame count, channels, rate and dtype of a WAV's PCM data chunk, or None if it can't be mapped."""
+    with open(file_path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            return None
+        file_size = os.fstat(f.fileno()).st_size
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+            if chunk_id == b"fmt ":
+                data = f.read(size)
+                audio_format, channels, rate, _, _, bits = struct.unpack("<HHIIHH", data[:16])
+                if audio_format == WAVE_FORMAT_EXTENSIBLE and len(data) >= 26:
+                    audio_format = struct.unpack("<H", data[24:26])[0]  # Primeros bytes del GUID del subformato
+                fmt = (audio_format, channels, rate, bits)
+                if size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                audio_format, channels, rate, bits = fmt
+                dtype = PCM_DTYPES.get((audio_format, bits))
+                if dtype is None or not channels:
+                    return None
+                offset = f.tell()
+                # Tamaño 0 o incompleto (grabación cortada): se usa lo que hay en disco
+                size = min(size, file_size - offset) if size else file_size - offset
+                return {"offset": offset, "frames": size // (dtype.itemsize * channels),
+                        "channels": channels, "samplerate": rate, "dtype": dtype}
+            else:
+                f.seek(size + size % 2, os.SEEK_CUR)
+
+
+class OffsetFile(io.RawIOBase):
+    """Vista de sólo lectura de un archivo a partir de un byte: libsndfile decodifica desde ahí."""
+
+    def __init__(self, file_path, offset):
+        super().__init__()
+        self._file = open(file_path, "rb")
+        self.offset = offset
+        self.size = os.fstat(self._file.fileno()).st_size - offset
+        self._file.seek(offset)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, position, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._file.seek(self.offset + position)
+        elif whence == io.SEEK_END:
+            self._file.seek(self.offset + self.size + position)
+        else:
+            self._file.seek(position, io.SEEK_CUR)
+        return self.tell()
+
+    def tell(self):
+        return self._file.tell() - self.offset
+
+    def readinto(self, buffer):
+        data = self._file.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+class ArraySource:
+    """Muestras ya decodificadas (p. ej. un Sound de la caché vía pygame.sndarray.samples), sin copiarlas."""
+
+    def __init__(self, frames, samplerate, owner=None):
+        self.frames = frames if frames.ndim == 2 else frames[:, None]
+        self.samplerate = samplerate
+        self.channels = self.frames.shape[1]
+        self.owner = owner  # Mantiene vivo el buffer del que frames es una vista
+        dtype = self.frames.dtype
+        self.scale = np.float32(1.0 / -np.iinfo(dtype).min if dtype.kind == "i" else 1.0)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get_length(self):
+        return len(self.frames) / self.samplerate
+
+    def read(self, position, count):
+        return self.frames[position:position + count]
+
+    def consume(self, count):
+        pass
+
+    def finished(self, position):
+        return position >= len(self.frames)
+
+    def close(self):
+        pass
+
+
+class MemmapSource(ArraySource):
+    """Datos PCM de un WAV mapeados en memoria: sólo se leen del disco las páginas que se tocan."""
+
+    def __init__(self, file_path, layout=None, gain_db=0.0):
+        layout = layout or wav_layout(file_path)
+        if layout is None:
+            raise ValueError(f"{os.path.basename(file_path)} no es un WAV PCM que se pueda mapear")
+        self.file_path = file_path
+        super().__init__(np.memmap(file_path, dtype=layout["dtype"], mode="r", offset=layout["offset"],
+                                   shape=(layout["frames"], layout["channels"])), layout["samplerate"])
+        # Escala a float y ganancia de normalización en un solo factor
+        self.scale = np.float32(self.scale * 10 ** (gain_db / 20))
+
+    def prefetch(self, frames):
+        """Touch the first pages now so the audio callback does not wait for the disk."""
+        return float(np.abs(self.frames[:frames]).max(initial=0))
+
+
+class Mp3Source:
+    """MP3 decodificado por delante en un hilo, empezando en cualquier punto gracias al índice de frames."""
+
+    def __init__(self, file_path, meta, start=0, gain_db=0.0, buffer_frames=MP3_BUFFER_FRAMES, prefill=4096):
+        self.file_path = file_path
+        self.samplerate = meta["samplerate"]
+        self.channels = meta["channels"]
+        self.length = meta["frames"]
+        self.scale = np.float32(10 ** (gain_db / 20))
+        self.start = start
+        offsets = meta["seek_index"]
+        samples_per_frame = meta["mp3_samples_per_frame"]
+        # Posición en el flujo crudo de frames (la decodificación completa salta el retardo del codificador)
+        raw = start + meta["mp3_skip"]
+        first = min(raw // samples_per_frame, len(offsets) - 1) - MP3_PREROLL_FRAMES
+        if first <= 0:
+            # Cerca del principio no hay pre-roll suficiente: se decodifica desde el inicio del archivo
+            self._reader = SequentialReader(file_path)
+            self._reader.read(start, dtype="float32")
+        else:
+            self._reader = SequentialReader(OffsetFile(file_path, int(offsets[first])))
+            self._reader.read(raw - first * samples_per_frame, dtype="float32")  # Pre-roll descartado
+        self.ring = RingBuffer(buffer_frames, self.channels)
+        self._running = True
+        self._done = False
+        self._space = threading.Event()
+        self._decode(prefill)  # El primer bloque ya está listo cuando el canal empieza a sonar
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return self.length
+
+    def get_length(self):
+        return self.length / self.samplerate
+
+    def _decode(self, frames):
+        block = self._reader.read(min(frames, self.ring.free()), dtype="float32", always_2d=True)
+        if not len(block):
+            self._done = True
+        self.ring.write(block)
+
+    def _run(self):
+        try:
+            while self._running and not self._done:
+                if self.ring.free() >= 4096:
+                    self._decode(16384)
+                else:
+                    self._space.wait(0.05)
+                    self._space.clear()
+        except Exception as e:
+            print(f"Error al decodificar '{os.path.basename(self.file_path)}': {e}")
+            self._done = True
+        finally:
+            self._reader.close()
+
+    def read(self, position, count):
+        return self.ring.read(count)
+
+    def consume(self, count):
+        self.ring.consume(count)
+        self._space.set()
+
+    def finished(self, position):
+        return position >= self.length or (self._done and not self.ring.available())
+
+    def close(self):
+        self._running = False
+        self._space.set()
+
+
+class MixerChannel:
+    """Voz del mezclador con la misma interfaz que pygame.mixer.Channel que usa AudioEngine."""
+
+    def __init__(self, mixer):
+        self.mixer = mixer
+        self.source = None
+        self.position = 0  # Próximo frame a mezclar
+        self.volume = 1.0
+        self.paused = False
+        self.busy = False
+        self.ramp = None  # (ganancia inicial, ganancia final, frames totales, frames hechos, parar al final)
+        self.pending_seek = None  # (serie, fuente o None, frame): el callback lo aplica al empezar un bloque
+        self._applied_seek = 0
+        self._seeks = 0
+
+    def play(self, source, fade_ms=0, start=0):
+        self.source = source
+        self.position = start
+        self.paused = False
+        fade_frames = int(self.mixer.sample_rate * fade_ms / 1000)
+        self.ramp = (0.0, 1.0, fade_frames, 0, False) if fade_frames else None
+        self.busy = True
+
+    def stop(self):
+        self.busy = False
+        source, self.source = self.source, None  # Suelta el mapeo para que el archivo se pueda borrar
+        if source is not None:
+            source.close()
+
+    def seek(self, frame, source=None):
+        """Jump to frame (optionally switching to a source already positioned there); O(1)."""
+        self._seeks += 1
+        self.pending_seek = (self._seeks, source, frame)
+
+    def pause(self):
+        self.paused = True
+
+    def unpause(self):
+        self.paused = False
+
+    def fadeout(self, ms):
+        fade_frames = int(self.mixer.sample_rate * ms / 1000)
+        if not fade_frames or self.paused:
+            self.stop()
+            return
+        self.ramp = (self._ramp_gain(), 0.0, fade_frames, 0, True)
+
+    def set_volume(self, volume):
+        self.volume = volume
+
+    def get_volume(self):
+        return self.volume
+
+    def get_busy(self):
+        return self.busy
+
+    def get_queue(self):
+        return None  # Sin cola: AudioEngine avanza play_queue al terminar la voz
+
+    def get_sound(self):
+        return self.source
+
+    def get_pos(self):
+        """Seconds mixed so far; exact to the frame, paused time excluded."""
+        pending = self.pending_seek
+        if pending is not None and pending[0] != self._applied_seek:
+            return pending[2] / self.mixer.sample_rate
+        return self.position / self.mixer.sample_rate
+
+    def _ramp_gain(self):
+        ramp = self.ramp
+        if ramp is None:
+            return 1.0
+        start, end, total, done, _ = ramp
+        return start + (end - start) * min(done / total, 1.0)
+
+    def render(self, out, frames):
+        """Mix up to frames frames into out; runs on the audio callback."""
+        pending = self.pending_seek
+        if pending is not None and pending[0] != self._applied_seek:
+            serial, new_source, frame = pending
+            self._applied_seek = serial
+            if new_source is not None:
+                old_source, self.source = self.source, new_source
+                if old_source is not None:
+                    old_source.close()
+            self.position = frame
+        source = self.source
+        if not self.busy or self.paused or source is None:
+            return
+        filled = 0
+        while filled < frames and self.busy:
+            position = self.position
+            # Una fuente con buffer circular puede entregar el bloque en dos trozos
+            block = source.read(position, max(0, min(frames - filled, len(source) - position)))
+            count = len(block)
+            if not count:
+                if source.finished(position):
+                    self._finish()
+                return  # Sin datos decodificados todavía: silencio sin avanzar
+            scratch = self.mixer.scratch(count, source.channels)
+            np.multiply(block, source.scale * np.float32(self.volume), out=scratch, dtype=np.float32)
+            self._apply_ramp(scratch, count)
+            target = out[filled:filled + count]
+            if source.channels == 1 or source.channels == out.shape[1]:
+                target += scratch
+            else:
+                used = min(source.channels, out.shape[1])
+                target[:, :used] += scratch[:, :used]
+            source.consume(count)
+            self.position = position + count
+            filled += count
+            if source.finished(self.position):
+                self._finish()
+
+    def _apply_ramp(self, scratch, count):
+        ramp = self.ramp
+        if ramp is None:
+            return
+        start, end, total, done, stop_after = ramp
+        steps = np.minimum(np.arange(done, done + count, dtype=np.float32) / total, 1.0)
+        scratch *= (start + (end - start) * steps)[:, None]
+        done += count
+        if done >= total:
+            self.ramp = None
+            if stop_after:
+                self._finish()
+        else:
+            self.ramp = (start, end, total, done, stop_after)
+
+    def _finish(self):
+        self.stop()
+        if self.mixer.on_voice_end:
+            self.mixer.on_voice_end()  # Despierta al motor en vez de esperar a su próxima comprobación
+
+
+class StreamMixer:
+    """Mezclador numpy sobre un sd.OutputStream para cues largos mapeados desde disco."""
+
+    def __init__(self, sample_rate=44100, channels=2, blocksize=1024, latency="low",
+                 min_seconds=MEMMAP_MIN_SECONDS, stream_factory=None, device=None):
+        self.sample_rate = sample_rate
+        self.device = device  # Salida de PortAudio ("Nombre, API"); None es la predeterminada
+        self.channels = channels
+        self.blocksize = blocksize
+        self.latency = latency
+        self.min_seconds = min_seconds
+        # Permite sustituir sd.OutputStream por un stream falso en las pruebas; None es sounddevice, que
+        # se importa al abrir el primer stream para no cargar PortAudio en el arranque
+        self.stream_factory = stream_factory
+        self.underflows = 0
+        self.callbacks = 0
+        self.on_voice_end = None  # Callback (hilo de audio, no debe bloquear) cuando un canal termina solo
+        self._channels = []  # Se reemplaza la lista entera: el callback nunca ve una a medio cambiar
+        self._scratch = np.zeros((max(blocksize, 1) * 4, 8), dtype=np.float32)
+        self.meter = LevelMeter(channels, sample_rate, max_frames=max(blocksize, 1) * 4)
+        self._layouts = {}  # file_path -> ((mtime_ns, tamaño), layout o None)
+        self._lock = threading.Lock()
+        self._stream = None
+
+    def layout(self, file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._layouts.get(file_path)
+        if cached is None or cached[0] != signature:
+            try:
+                layout = wav_layout(file_path) if file_path.lower().endswith(".wav") else None
+            except (OSError, struct.error):
+                layout = None
+            cached = self._layouts[file_path] = (signature, layout)
+        return cached[1]
+
+    def accepts(self, file_path):
+        """True for long uncompressed WAVs at the mixer's rate; those play mapped instead of cached."""
+        layout = self.layout(file_path)
+        return layout is not None and layout["samplerate"] == self.sample_rate \
+            and layout["frames"] >= self.min_seconds * self.sample_rate
+
+    def open(self, file_path, gain_db=0.0):
+        return MemmapSource(file_path, self.layout(file_path), gain_db)
+
+    def channel(self):
+        """A new voice on the mixer; the output stream starts on first use."""
+        self.ensure_stream()
+        channel = MixerChannel(self)
+        with self._lock:
+            self._channels = [c for c in self._channels if c.busy] + [channel]
+        return channel
+
+    def ensure_stream(self):
+        with self._lock:
+            if self._stream is not None:
+                return
+            stream_factory = self.stream_factory
+            if stream_factory is None:
+                import sounddevice as sd
+                stream_factory = sd.OutputStream
+            with PORTAUDIO_LOCK:  # El vigilante de dispositivos no reinicia PortAudio mientras se abre
+                self._stream = stream_factory(device=self.device, samplerate=self.sample_rate,
+                                              channels=self.channels, blocksize=self.blocksize,
+                                              latency=self.latency, dtype="float32", callback=self._callback)
+                self._stream.start()
+
+    def is_open(self):
+        return self._stream is not None
+
+    def set_blocksize(self, blocksize):
+        """Use a new block size; only possible before the stream is first opened. Returns whether it applied."""
+        with self._lock:
+            if self._stream is not None:
+                return False
+            self.blocksize = blocksize
+            self.meter = LevelMeter(self.channels, self.sample_rate, max_frames=max(blocksize, 1) * 4)
+            return True
+
+    def scratch(self, frames, channels):
+        if frames > len(self._scratch) or channels > self._scratch.shape[1]:
+            self._scratch = np.zeros((max(frames, len(self._scratch)), max(channels, self._scratch.shape[1])),
+                                     dtype=np.float32)
+        return self._scratch[:frames, :channels]
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status and status.output_underflow:
+            self.underflows += 1
+        self.callbacks += 1
+        outdata.fill(0)
+        for channel in self._channels:
+            channel.render(outdata, frames)
+        np.clip(outdata, -1.0, 1.0, out=outdata)
+        self.meter.process(outdata)
+
+    def close(self):
+        with self._lock:
+            stream, self._stream = self._stream, None
+            self._channels = []
+        if stream is not None:
+            stream.stop()
+            stream.close()
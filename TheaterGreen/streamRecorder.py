@@ -0,0 +1,168 @@
+import threading
+
+import numpy as np
+import soundfile as sf
+
+from deviceManager import PORTAUDIO_LOCK
+from levelMeter import LevelMeter
+from telemetry import telemetry
+
+
+class RingBuffer:
+    """Buffer circular preasignado para un productor y un consumidor."""
+
+    def __init__(self, frames, channels, dtype="float32"):
+        self.capacity = frames
+        self.data = np.zeros((frames, channels), dtype=dtype)
+        # Cada índice sólo lo avanza un lado, así que no hace falta lock
+        self.write_index = 0
+        self.read_index = 0
+
+    def available(self):
+        return self.write_index - self.read_index
+
+    def free(self):
+        return self.capacity - self.available()
+
+    def write(self, block):
+        """Copy as much of block as fits; return the number of frames written."""
+        frames = min(len(block), self.free())
+        start = self.write_index % self.capacity
+        first = min(frames, self.capacity - start)
+        self.data[start:start + first] = block[:first]
+        self.data[:frames - first] = block[first:frames]
+        self.write_index += frames
+        return frames
+
+    def read(self, max_frames):
+        """Return up to max_frames contiguous frames as a view, without consuming them."""
+        start = self.read_index % self.capacity
+        frames = min(self.available(), max_frames, self.capacity - start)
+        return self.data[start:start + frames]
+
+    def consume(self, frames):
+        self.read_index += frames
+
+
+class StreamRecorder:
+    """Graba desde un sd.InputStream con callback directamente a disco."""
+
+    def __init__(self, sample_rate=44100, channels=1, blocksize=1024, latency="high",
+                 buffer_seconds=10, subtype="PCM_16", stream_factory=None, device=None):
+        self.sample_rate = sample_rate
+        self.device = device  # Entrada de PortAudio ("Nombre, API"); None es la predeterminada
+        self.channels = channels
+        self.blocksize = blocksize
+        self.latency = latency
+        self.subtype = subtype
+        # Permite sustituir sd.InputStream por un stream falso en las pruebas
+        if stream_factory is None:
+            import sounddevice as sd  # PortAudio sólo se carga cuando alguien va a grabar
+            stream_factory = sd.InputStream
+        self.stream_factory = stream_factory
+        self.ring = RingBuffer(int(sample_rate * buffer_seconds), channels)
+        self.file_path = None
+        self.frames_written = 0
+        self.frames_captured = 0
+        self.overflows = 0  # Bloques en los que el driver avisó de input_overflow
+        self.dropped_frames = 0  # Frames que no cupieron en el ring buffer
+        self.max_fill = 0
+        self.meter = LevelMeter(channels, sample_rate, max_frames=max(blocksize, 1) * 4)
+        self.error = None
+        self.on_error = None  # Callback (hilo de escritura) si falla la escritura a disco
+        self._stream = None
+        self._file = None
+        self._writer = None
+        self._running = False
+        self._data_ready = threading.Event()
+
+    @telemetry.timed("grabacion.start")
+    def start(self, file_path):
+        """Open the output file and the input stream and start capturing."""
+        self.file_path = file_path
+        self.frames_written = 0
+        self.frames_captured = 0
+        self.overflows = 0
+        self.dropped_frames = 0
+        self.max_fill = 0
+        self.meter.reset()
+        self.error = None
+        self.ring.write_index = self.ring.read_index = 0
+        self._file = sf.SoundFile(file_path, mode="w", samplerate=self.sample_rate,
+                                  channels=self.channels, subtype=self.subtype, format="WAV")
+        self._running = True
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        try:
+            with PORTAUDIO_LOCK:  # El vigilante de dispositivos no reinicia PortAudio mientras se abre
+                self._stream = self.stream_factory(device=self.device, samplerate=self.sample_rate,
+                                                   channels=self.channels, blocksize=self.blocksize,
+                                                   latency=self.latency, dtype="float32", callback=self._callback)
+                self._stream.start()
+        except Exception:
+            self.stop()
+            raise
+
+    def _callback(self, indata, frames, time_info, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        written = self.ring.write(indata)
+        self.frames_captured += frames
+        self.dropped_frames += frames - written
+        self.max_fill = max(self.max_fill, self.ring.available())
+        self.meter.process(indata)
+        self._data_ready.set()
+
+    def _write_loop(self):
+        try:
+            while self._running or self.ring.available():
+                block = self.ring.read(self.ring.capacity)
+                if len(block):
+                    with telemetry.span("grabacion.escritura"):
+                        self._file.write(block)
+                    self.frames_written += len(block)
+                    self.ring.consume(len(block))
+                else:
+                    self._data_ready.wait(0.05)
+                    self._data_ready.clear()
+        except Exception as e:
+            print(f"Error al escribir la grabación: {e}")
+            telemetry.event("error", origen="grabacion", message=str(e))
+            self.error = e
+            if self.on_error:
+                self.on_error(e)
+
+    @telemetry.timed("grabacion.stop")
+    def stop(self):
+        """Stop capturing, flush what is left in the ring and close the file."""
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            finally:
+                self._stream = None
+        self._running = False
+        self._data_ready.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return self.frames_written
+
+    def is_open(self):
+        return self._stream is not None
+
+    def duration(self):
+        return self.frames_written / self.sample_rate
+
+    def stats(self):
+        """Capture counters for the current or last take."""
+        return {
+            "frames_captured": self.frames_captured,
+            "frames_written": self.frames_written,
+            "overflows": self.overflows,
+            "dropped_frames": self.dropped_frames,
+            "max_ring_fill": self.max_fill / self.ring.capacity,
+        }
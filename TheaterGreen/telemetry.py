@@ -0,0 +1,183 @@
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+LOG_MAX_BYTES = 2 * 1024 * 1024  # Tamaño de cada archivo del registro antes de rotar
+LOG_BACKUPS = 5
+SLOW_SPAN_MS = 50.0  # Las mediciones más lentas se registran una a una; el resto sólo en el resumen
+STALL_MS = 150.0  # Retraso del latido de Tk a partir del cual se considera que la UI se congeló
+HEARTBEAT_MS = 100
+SUMMARY_SECONDS = 60  # Cada cuánto se escribe el resumen de tiempos y contadores
+RECENT_SPANS = 512  # Duraciones recientes por nombre para los percentiles
+
+
+class SpanStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=RECENT_SPANS)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recent.append(ms)
+
+    def summary(self):
+        recent = sorted(self.recent)
+        return {"count": self.count, "mean_ms": self.total_ms / self.count if self.count else 0.0,
+                "p50_ms": recent[len(recent) // 2] if recent else 0.0,
+                "p99_ms": recent[min(len(recent) - 1, int(len(recent) * 0.99))] if recent else 0.0,
+                "max_ms": self.max_ms}
+
+
+class Telemetry:
+    """Tiempos, contadores y congelamientos de la consola, en memoria y en un registro JSON rotativo.
+
+    Pensado para dejarlo activo en función: medir es sumar en memoria, y al disco sólo van los eventos
+    (mediciones lentas, errores, congelamientos, underruns) y un resumen periódico, escritos por un hilo
+    propio a través de una cola.
+    """
+
+    def __init__(self):
+        self.spans = {}  # nombre -> SpanStats
+        self.counters = {}  # nombre -> total
+        self.events = deque(maxlen=200)  # (hora, tipo, datos) más recientes, para el panel
+        self.log_path = None
+        self._probes = {}  # nombre -> (función que devuelve un total acumulado, último valor visto)
+        self._lock = threading.Lock()
+        self._logger = None
+        self._listener = None
+        self._last_summary = time.perf_counter()
+
+    def start(self, log_path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        """Start writing the structured log (one JSON object per line) to log_path."""
+        handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups,
+                                                       encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        records = queue.Queue()
+        logger = logging.getLogger(f"telemetry.{id(self)}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(logging.handlers.QueueHandler(records))
+        self._listener = logging.handlers.QueueListener(records, handler)
+        self._listener.start()
+        self._logger = logger
+        self.log_path = log_path
+        self.log("inicio")
+
+    def stop(self):
+        if self._listener is not None:
+            self.log("resumen", **self.summary())
+            self._listener.stop()
+            self._listener = None
+            self._logger = None
+
+    def log(self, kind, **fields):
+        if self._logger is not None:
+            self._logger.info(json.dumps({"time": time.time(), "kind": kind, **fields}, default=str))
+
+    def event(self, kind, **fields):
+        """Something worth seeing on its own (error, stall, underrun): kept for the panel and logged."""
+        with self._lock:
+            self.events.append((time.time(), kind, fields))
+        self.log(kind, **fields)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _add_span(self, name, ms):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.add(ms)
+
+    def record_span(self, name, ms, **fields):
+        self._add_span(name, ms)
+        if ms >= SLOW_SPAN_MS:
+            self.event("lento", span=name, ms=round(ms, 2), **fields)
+
+    @contextmanager
+    def span(self, name, **fields):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(name, (time.perf_counter() - start) * 1000, **fields)
+
+    def timed(self, name):
+        """Decorator: time every call of a function under name."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record_span(name, (time.perf_counter() - start) * 1000)
+            return wrapper
+        return decorate
+
+    def add_probe(self, name, read_total):
+        """Watch a cumulative counter (underflows, dropped frames...); increases are logged as events."""
+        with self._lock:
+            self._probes[name] = (read_total, read_total())
+
+    def sample_probes(self):
+        with self._lock:
+            probes = list(self._probes.items())
+        for name, (read_total, last) in probes:
+            try:
+                total = read_total()
+            except Exception:
+                continue  # La fuente del contador ya no existe (p. ej. grabadora cerrada)
+            if total > last:
+                self.count(name, total - last)
+                self.event("contador", name=name, increase=total - last, total=total)
+            with self._lock:
+                if name in self._probes:
+                    self._probes[name] = (read_total, total)
+
+    def watch_tk(self, widget, interval_ms=HEARTBEAT_MS):
+        """Heartbeat on the Tk loop: a late beat is a UI stall. Also samples probes and the summary."""
+        period = interval_ms / 1000
+        last = time.perf_counter()
+
+        def beat():
+            nonlocal last
+            now = time.perf_counter()
+            late_ms = (now - last - period) * 1000
+            last = now
+            if late_ms >= STALL_MS:
+                stall_ms = late_ms + interval_ms  # Tiempo total sin que Tk atendiera eventos
+                self.count("ui.congelamientos")
+                self._add_span("ui.congelamiento", stall_ms)
+                self.event("congelamiento", ms=round(stall_ms, 1))
+            self.sample_probes()
+            if now - self._last_summary >= SUMMARY_SECONDS:
+                self._last_summary = now
+                self.log("resumen", **self.summary())
+            widget.after(interval_ms, beat)
+
+        widget.after(interval_ms, beat)
+
+    def summary(self):
+        with self._lock:
+            return {"spans": {name: stats.summary() for name, stats in self.spans.items()},
+                    "counters": dict(self.counters)}
+
+    def recent_events(self):
+        with self._lock:
+            return list(self.events)
+
+
+telemetry = Telemetry()  # Instancia única de la aplicación; main.py le da el archivo de registro
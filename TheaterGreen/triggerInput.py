@@ -0,0 +1,193 @@
+import socket
+import struct
+import threading
+import time
+from collections import deque
+
+OSC_PORT = 9000
+OSC_MAX_PACKET = 65536
+
+
+def _osc_string(data, position):
+    end = data.index(b"\0", position)
+    return data[position:end].decode("utf-8", "replace"), (end + 4) & ~3  # Relleno a múltiplos de 4
+
+
+def parse_osc(data):
+    """Decode an OSC packet into [(address, args)]; bundles are flattened, unknown arg types end the list."""
+    if data.startswith(b"#bundle\0"):
+        messages = []
+        position = 16  # "#bundle\0" + marca de tiempo
+        while position + 4 <= len(data):
+            size = int.from_bytes(data[position:position + 4], "big")
+            messages += parse_osc(data[position + 4:position + 4 + size])
+            position += 4 + size
+        return messages
+    address, position = _osc_string(data, 0)
+    args = []
+    if position < len(data) and data[position:position + 1] == b",":
+        tags, position = _osc_string(data, position)
+        for tag in tags[1:]:
+            if tag in "if":
+                args.append(struct.unpack_from(">" + tag, data, position)[0])
+                position += 4
+            elif tag == "s":
+                value, position = _osc_string(data, position)
+                args.append(value)
+            elif tag in "TF":
+                args.append(tag == "T")
+            else:
+                break
+    return [(address, args)]
+
+
+def osc_message(address, *args):
+    """Encode an OSC message with int, float and string arguments."""
+    def pad(raw):
+        return raw + b"\0" * (4 - len(raw) % 4)
+
+    tags = ","
+    payload = b""
+    for arg in args:
+        if isinstance(arg, int):
+            tags += "i"
+            payload += struct.pack(">i", arg)
+        elif isinstance(arg, float):
+            tags += "f"
+            payload += struct.pack(">f", arg)
+        else:
+            tags += "s"
+            payload += pad(str(arg).encode("utf-8"))
+    return pad(address.encode("utf-8")) + pad(tags.encode("ascii")) + payload
+
+
+class TriggerInput:
+    """Disparadores que no esperan a Tk: OSC por UDP, notas MIDI y atajos de teclado, directos al motor.
+
+    Acciones: "go", "stop", "play" (audio_id) y "stop_cue" (audio_id); el control remoto añade "enqueue" y
+    "pause" (audio_id). Los handlers corren en el hilo del motor.
+    """
+
+    def __init__(self, engine, handlers):
+        self.engine = engine
+        self.handlers = handlers  # acción -> función(*args)
+        self.on_triggered = None  # Callback (hilo del motor) tras ejecutar una acción, para refrescar la UI
+        self.latencies = deque(maxlen=1000)  # (fuente, ms desde que llegó la entrada hasta que el motor la ejecutó)
+        self.key_map = {}  # keysym -> audio_id
+        self.note_map = {}  # nota MIDI -> audio_id
+        self.go_note = None  # Nota MIDI que hace de GO
+        self.osc_address = None
+        self._socket = None
+        self._midi_port = None
+
+    def map_cues(self, audios):
+        """Rebuild the key and note maps from each audio's "hotkey" and "midi_note"."""
+        self.key_map = {audio["hotkey"]: audio["id"] for audio in audios if audio.get("hotkey")}
+        self.note_map = {int(audio["midi_note"]): audio["id"] for audio in audios
+                         if audio.get("midi_note") is not None}
+
+    def trigger(self, action, *args, source="ui", received_at=None, done=None):
+        """Queue action on the engine thread; done() is called there once it ran (or failed)."""
+        if action not in self.handlers:
+            if done is not None:
+                done()
+            return
+        self.engine.submit(self._dispatch, source, received_at or time.perf_counter(), action, args, done)
+
+    def _dispatch(self, source, received_at, action, args, done=None):
+        try:
+            self.handlers[action](*args)
+        finally:
+            if done is not None:
+                done()
+        self.latencies.append((source, (time.perf_counter() - received_at) * 1000))
+        if self.on_triggered:
+            self.on_triggered()
+
+    def latency_stats(self):
+        """p50/p99 input-to-playback latency (ms) of the recorded triggers, or None."""
+        if not self.latencies:
+            return None
+        values = sorted(latency_ms for _, latency_ms in self.latencies)
+        return {"count": len(values), "p50_ms": values[len(values) // 2],
+                "p99_ms": values[min(len(values) - 1, int(len(values) * 0.99))]}
+
+    def on_key(self, event):
+        """Tk key handler: a cue's hotkey goes straight to the engine; the redraw comes later."""
+        audio_id = self.key_map.get(event.keysym)
+        if audio_id is None:
+            return None
+        self.trigger("play", audio_id, source="teclado")
+        return "break"
+
+    def start_osc(self, host="0.0.0.0", port=OSC_PORT):
+        """Listen for OSC on UDP: /go, /stop, /cue/<id>[/play|/stop]. Returns the bound (host, port)."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((host, port))
+        sock.settimeout(0.5)  # Para poder salir al cerrar
+        self._socket = sock
+        self.osc_address = sock.getsockname()
+        threading.Thread(target=self._osc_loop, args=(sock,), daemon=True).start()
+        return self.osc_address
+
+    def _osc_loop(self, sock):
+        while self._socket is sock:
+            try:
+                data, _ = sock.recvfrom(OSC_MAX_PACKET)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            received_at = time.perf_counter()
+            try:
+                messages = parse_osc(data)
+            except (ValueError, struct.error):
+                continue  # Paquete que no es OSC
+            for address, args in messages:
+                self.on_osc(address, args, received_at)
+
+    def on_osc(self, address, args, received_at=None):
+        if args and args[0] in (0, 0.0, False):
+            return  # Las superficies de control mandan también el botón soltado con valor 0
+        parts = address.strip("/").split("/")
+        if parts in (["go"], ["stop"]):
+            self.trigger(parts[0], source="osc", received_at=received_at)
+        elif len(parts) in (2, 3) and parts[0] == "cue" and parts[1].isdigit():
+            action = {"play": "play", "go": "play", "stop": "stop_cue"}.get(parts[2] if len(parts) == 3 else "play")
+            if action:
+                self.trigger(action, int(parts[1]), source="osc", received_at=received_at)
+
+    def start_midi(self, port_name=None):
+        """Open a MIDI input (the first one by default) if mido is installed; returns the port name or None."""
+        try:
+            import mido
+        except ImportError:
+            print("mido no está instalado. La entrada MIDI no estará disponible.")
+            return None
+        try:
+            names = mido.get_input_names()
+            if not names:
+                return None
+            # mido llama al callback desde el hilo del backend, sin pasar por Tk
+            self._midi_port = mido.open_input(port_name or names[0], callback=self._on_midi)
+        except Exception as e:
+            print(f"No se pudo abrir la entrada MIDI: {e}")
+            return None
+        return self._midi_port.name
+
+    def _on_midi(self, message):
+        if message.type != "note_on" or message.velocity == 0:
+            return
+        received_at = time.perf_counter()
+        if message.note == self.go_note:
+            self.trigger("go", source="midi", received_at=received_at)
+        elif message.note in self.note_map:
+            self.trigger("play", self.note_map[message.note], source="midi", received_at=received_at)
+
+    def close(self):
+        sock, self._socket = self._socket, None
+        if sock is not None:
+            sock.close()
+        port, self._midi_port = self._midi_port, None
+        if port is not None:
+            port.close()
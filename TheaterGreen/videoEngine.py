@@ -0,0 +1,292 @@
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from telemetry import telemetry
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".mkv", ".avi", ".webm", ".m4v")
+VIDEO_QUEUE_FRAMES = 6  # Fotogramas decodificados por delante de la pantalla (~200 ms a 30 fps)
+TRACK_CACHE_BUDGET_MB = 2048  # Pistas de audio extraídas de videos; se borran las usadas hace más tiempo
+
+
+class WallClock:
+    """Media time on the wall clock, for videos that have no audio voice to follow."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.paused_at = None
+
+    def __call__(self):
+        now = self.paused_at if self.paused_at is not None else time.perf_counter()
+        return now - self.started_at
+
+    def pause(self):
+        if self.paused_at is None:
+            self.paused_at = time.perf_counter()
+
+    def resume(self):
+        if self.paused_at is not None:
+            self.started_at += time.perf_counter() - self.paused_at
+            self.paused_at = None
+
+
+class VoiceClock:
+    """Media time taken from an engine voice, so the picture follows the audio (pauses included).
+
+    Time counts from where the voice was when it was attached, so a cue already playing for minutes starts the
+    video at 0. Until a voice is attached (it starts on the engine thread) the clock stays at 0; when the voice
+    stops or ends the clock carries on from where it was on the wall clock.
+    """
+
+    def __init__(self, voice=None, origin=None):
+        self.voice = None
+        self.origin = 0.0
+        self._last = 0.0
+        self._left_at = None
+        if voice is not None:
+            self.attach(voice, origin)
+
+    def attach(self, voice, origin=None):
+        """Follow voice from origin seconds (its current position by default)."""
+        self.origin = voice.position() if origin is None else origin
+        self.voice = voice
+
+    def __call__(self):
+        if self.voice is None:
+            return 0.0
+        if self._left_at is None:
+            if self.voice.is_active():
+                self._last = max(0.0, self.voice.position() - self.origin)
+                return self._last
+            self._left_at = time.perf_counter()
+        return self._last + time.perf_counter() - self._left_at
+
+
+def extract_audio(path, out_path, sample_rate):
+    """Decode a video's audio track into a 16-bit stereo WAV at sample_rate; False if it has no audio."""
+    import av
+    import soundfile as sf
+
+    temp_path = out_path + ".tmp"
+    with av.open(path) as container:
+        if not container.streams.audio:
+            return False
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format="s16", layout="stereo", rate=sample_rate)
+        with sf.SoundFile(temp_path, "w", sample_rate, 2, "PCM_16", format="WAV") as out:
+            for frame in container.decode(stream):
+                for chunk in resampler.resample(frame):
+                    out.write(chunk.to_ndarray().reshape(-1, 2))
+            for chunk in resampler.resample(None):  # Lo que quedó dentro del resampler
+                out.write(chunk.to_ndarray().reshape(-1, 2))
+    os.replace(temp_path, out_path)
+    return True
+
+
+def prune_tracks(cache_dir, budget_mb=TRACK_CACHE_BUDGET_MB, keep=()):
+    """Delete the least recently used extracted tracks until the cache fits budget_mb; returns how many.
+
+    A track's mtime is its last use (the view touches it on every cache hit); paths in keep are never removed.
+    """
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".wav")]
+    except FileNotFoundError:
+        return 0
+    keep = {os.path.abspath(path) for path in keep if path}
+    tracks = sorted((entry.stat().st_mtime_ns, entry.stat().st_size, entry.path) for entry in entries)
+    used = sum(size for _, size, _ in tracks)
+    removed = 0
+    for _, size, path in tracks:
+        if used <= budget_mb * 1024 * 1024:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue  # Abierta por una voz (Windows): se intenta en la próxima extracción
+        used -= size
+        removed += 1
+    return removed
+
+
+class VideoPlayer:
+    """Decodifica un video en un hilo propio hacia una cola acotada de fotogramas RGBA ya escalados.
+
+    Los fotogramas viven en un juego fijo de buffers (slots) que se reciclan: el hilo de decodificación
+    escribe en uno libre y la UI, en next_frame(), se queda con el más reciente que ya toca según el reloj
+    y devuelve los demás. Un fotograma que llega tarde se descarta antes de convertirlo, que es lo caro,
+    así que un video pesado pierde fotogramas en vez de atrasarse.
+    """
+
+    def __init__(self, queue_frames=VIDEO_QUEUE_FRAMES):
+        self.queue_frames = queue_frames
+        self.path = None
+        self.size = None  # (ancho, alto) en pantalla
+        self.fps = 30.0
+        self.duration = 0.0
+        self.has_audio = False
+        self.slots = []  # Arrays (alto, ancho, 4) uint8: PIL usa RGBA sin copiar; se reasignan si cambia el tamaño
+        self.clock = WallClock()
+        self.current = None  # Slot en pantalla; no se recicla hasta que lo reemplaza otro
+        self.current_pts = None  # Segundo del video que está en pantalla
+        self.error = None
+        self.decoded = 0
+        self.converted = 0
+        self.late = 0  # Descartados en el decodificador por llegar tarde
+        self.skipped = 0  # Descartados en la pantalla porque había uno más reciente
+        self.shown = 0
+        self._container = None
+        self._stream = None
+        self._free = queue.Queue()
+        self._ready = queue.Queue(maxsize=queue_frames)
+        self._next = None  # (pts, slot) sacado de la cola que todavía no toca mostrar
+        self._thread = None
+        self._running = False
+        self._finished = False
+
+    def open(self, path, max_width, max_height):
+        """Open a video file and size the frame buffers to fit max_width x max_height."""
+        import av  # PyAV (FFmpeg) sólo se carga cuando se abre un video
+
+        self.close()
+        container = av.open(path)
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"  # FFmpeg decodifica con varios hilos, fuera del GIL
+        scale = min(max_width / stream.width, max_height / stream.height, 1.0)
+        size = (max(2, int(stream.width * scale) // 2 * 2), max(2, int(stream.height * scale) // 2 * 2))
+        if size != self.size or len(self.slots) != self.queue_frames + 2:
+            # Uno por fotograma en cola, el que está en pantalla y el que se está escribiendo
+            self.slots = [np.zeros((size[1], size[0], 4), dtype=np.uint8) for _ in range(self.queue_frames + 2)]
+        self.size = size
+        self.fps = float(stream.average_rate or 30)
+        self.duration = float(container.duration / 1_000_000) if container.duration else 0.0
+        self.has_audio = bool(container.streams.audio)
+        self.path = path
+        self._container = container
+        self._stream = stream
+
+    def play(self, clock=None):
+        """Start decoding from the beginning, timed by clock (a callable returning media seconds)."""
+        self._stop_decoder()
+        self.clock = clock or WallClock()
+        self.decoded = self.converted = self.late = self.skipped = self.shown = 0
+        self.error = None
+        self._container.seek(0)
+        self._running = True
+        self._finished = False
+        self._thread = threading.Thread(target=self._decode_loop, daemon=True)
+        self._thread.start()
+
+    def _decode_loop(self):
+        period = 1 / self.fps
+        width, height = self.size
+        try:
+            for frame in self._container.decode(self._stream):
+                if not self._running:
+                    return
+                self.decoded += 1
+                pts = float(frame.time) if frame.time is not None else (self.decoded - 1) * period
+                if pts + period < self.clock():
+                    self.late += 1  # Ya pasó su momento: ni se escala ni se convierte
+                    continue
+                slot = self._take(self._free)
+                if slot is None:
+                    return
+                rgb = frame.reformat(width, height, format="rgba")
+                plane = rgb.planes[0]
+                rows = np.frombuffer(plane, dtype=np.uint8).reshape(height, plane.line_size)
+                np.copyto(self.slots[slot], rows[:, :width * 4].reshape(height, width, 4))
+                self.converted += 1
+                if not self._offer((pts, slot)):
+                    return
+        except Exception as e:
+            print(f"Error al decodificar el video: {e}")
+            telemetry.event("error", origen="video", message=str(e))
+            self.error = e
+        finally:
+            self._finished = True
+
+    def _take(self, source):
+        # Espera con tiempo límite para poder cortar si se detiene el video
+        while self._running:
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def _offer(self, item):
+        while self._running:
+            try:
+                self._ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def next_frame(self):
+        """UI side: the slot to draw now, or None to keep the current picture. Cheap enough for every tick."""
+        now = self.clock()
+        chosen = chosen_pts = None
+        while True:
+            if self._next is None:
+                try:
+                    self._next = self._ready.get_nowait()
+                except queue.Empty:
+                    break
+            pts, slot = self._next
+            if pts > now:
+                break
+            if chosen is not None:
+                self._free.put(chosen)  # Había otro más reciente que ya tocaba
+                self.skipped += 1
+            chosen, chosen_pts = slot, pts
+            self._next = None
+        if chosen is None:
+            return None
+        if self.current is not None:
+            self._free.put(self.current)
+        self.current, self.current_pts = chosen, chosen_pts
+        self.shown += 1
+        return chosen
+
+    def seconds_to_next(self):
+        """How long the UI can wait before the next frame is due."""
+        if self._next is not None:
+            return max(0.0, self._next[0] - self.clock())
+        return 0.5 / self.fps  # Todavía no hay fotograma en espera: mirar a medio período
+
+    def is_finished(self):
+        return self._finished and self._next is None and self._ready.empty()
+
+    def stats(self):
+        return {"decoded": self.decoded, "converted": self.converted, "dropped": self.late + self.skipped,
+                "shown": self.shown}
+
+    def _stop_decoder(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        # Todos los slots vuelven a estar libres
+        self._ready = queue.Queue(maxsize=self.queue_frames)
+        self._free = queue.Queue()
+        for slot in range(len(self.slots)):
+            self._free.put(slot)
+        self._next = None
+        self.current = self.current_pts = None
+
+    def stop(self):
+        self._stop_decoder()
+        self._finished = True
+
+    def close(self):
+        self._stop_decoder()
+        if self._container is not None:
+            self._container.close()
+            self._container = None
+            self._stream = None
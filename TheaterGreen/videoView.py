@@ -1,17 +1,246 @@
+import hashlib
+import os
+import threading
+import tkinter as tk
+from tkinter import filedialog, messagebox
+
 import customtkinter as ctk
 
+from telemetry import telemetry
+from videoEngine import VIDEO_EXTENSIONS, VideoPlayer, VoiceClock, WallClock, extract_audio, prune_tracks
+
+SYNC_WALL = "Reloj propio"
+SYNC_TRACK = "Audio del video"
+SYNC_CUE = "Cue: {}"
+
+
 class VideoView(ctk.CTkFrame):
-    def __init__(self, master, **kwargs):
+    """Reproduce un cue de video. La decodificación corre en su hilo (videoEngine); aquí sólo se copia el
+    fotograma que toca a una única PhotoImage, así que el loop de Tk queda libre para la vista de audio.
+
+    El reloj del video es el suyo propio, la pista de audio del video (extraída a un WAV y reproducida como una
+    voz del motor) o el cue que se enlazó desde la vista de audio, contado desde que arrancó el video.
+    """
+
+    def __init__(self, master, audio_app=None, cache_dir=None, **kwargs):
         super().__init__(master, **kwargs)
         self.configure(fg_color="transparent") # Hace que el fondo del frame sea transparente
+        self.app = audio_app
+        self.cache_dir = cache_dir  # Donde se guardan las pistas de audio extraídas de los videos
+        self.track_path = None  # WAV con el audio del video abierto, cuando ya está extraído
+        self.track_voice = None  # Voz del motor que reproduce ese audio
+        self.player = VideoPlayer()
+        self.photo = None  # PhotoImage reutilizada para todos los fotogramas del video abierto
+        self.frames = []  # Imagen PIL por slot del reproductor, sobre la misma memoria
+        self.after_id = None
 
         # Configuración de la cuadrícula
-        self.grid_rowconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
-        self.label = ctk.CTkLabel(self, text="¡Bienvenido a la Vista de Video!",
-                                  font=ctk.CTkFont(size=24, weight="bold"))
-        self.label.grid(row=0, column=0, padx=20, pady=20)
+        self.controls = ctk.CTkFrame(self, fg_color="transparent")
+        self.controls.grid(row=0, column=0, sticky="ew", padx=20, pady=(20, 10))
+        self.open_button = ctk.CTkButton(self.controls, text="Abrir Video", width=110, command=self.choose_video)
+        self.open_button.pack(side="left", padx=(0, 10))
+        self.play_button = ctk.CTkButton(self.controls, text="Reproducir", width=100, command=self.play_video,
+                                         state="disabled")
+        self.play_button.pack(side="left", padx=(0, 10))
+        self.pause_button = ctk.CTkButton(self.controls, text="Pausa", width=80, command=self.toggle_pause,
+                                          state="disabled")
+        self.pause_button.pack(side="left", padx=(0, 10))
+        self.stop_button = ctk.CTkButton(self.controls, text="Detener", width=80, command=self.stop_video,
+                                         state="disabled")
+        self.stop_button.pack(side="left", padx=(0, 10))
+        self.sync_label = ctk.CTkLabel(self.controls, text="Sincronizar con:")
+        self.sync_label.pack(side="left", padx=(10, 5))
+        self.sync_mode = tk.StringVar(value=SYNC_WALL)
+        self.sync_menu = ctk.CTkOptionMenu(self.controls, values=[SYNC_WALL], variable=self.sync_mode, width=170)
+        self.sync_menu.pack(side="left")
+
+        self.screen = tk.Label(self, bg="black", text="Sin video", fg="gray")
+        self.screen.grid(row=1, column=0, sticky="nsew", padx=20)
+
+        self.info_label = ctk.CTkLabel(self, text="Abra un video para reproducirlo.", text_color="gray")
+        self.info_label.grid(row=2, column=0, sticky="w", padx=20, pady=10)
+
+    def choose_video(self):
+        patterns = " ".join(f"*{extension}" for extension in VIDEO_EXTENSIONS)
+        file_path = filedialog.askopenfilename(title="Seleccionar video", filetypes=[("Videos", patterns)])
+        if file_path:
+            self.open_video(file_path)
+
+    def open_video(self, file_path):
+        self.stop_video()
+        self.update_idletasks()
+        width, height = max(self.screen.winfo_width(), 320), max(self.screen.winfo_height(), 180)
+        try:
+            self.player.open(file_path, width, height)
+        except ImportError:
+            messagebox.showerror("Error", "PyAV no está instalado. Instálelo con 'pip install av' para "
+                                          "reproducir video.")
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo abrir el video: {e}")
+            return
+        from PIL import Image, ImageTk
+        width, height = self.player.size
+        # Cada imagen comparte memoria con su slot: mostrar un fotograma no asigna nada nuevo
+        self.frames = [Image.frombuffer("RGBA", (width, height), slot, "raw", "RGBA", 0, 1)
+                       for slot in self.player.slots]
+        self.photo = ImageTk.PhotoImage("RGBA", (width, height))
+        self.screen.configure(image=self.photo, text="")
+        for button in (self.play_button, self.pause_button, self.stop_button):
+            button.configure(state="normal")
+        self.info_label.configure(text=f"{os.path.basename(file_path)}  {width}x{height}  "
+                                       f"{self.player.fps:.3g} fps  {self.player.duration:.1f} s")
+        self.track_path = None
+        if self.can_play_track():
+            self.sync_mode.set(SYNC_TRACK)
+            self.prepare_track(file_path)
+        else:
+            self.sync_mode.set(SYNC_WALL)
+        self.refresh_sync_options()
+
+    def engine(self):
+        return getattr(self.app, "audio_engine", None)
+
+    def can_play_track(self):
+        return self.player.has_audio and self.engine() is not None and self.cache_dir is not None
+
+    def linked_cue(self):
+        return getattr(self.app, "linked_video_cue", None)
+
+    def refresh_sync_options(self):
+        """Offer the wall clock, the video's own audio and the cue linked from the audio view."""
+        values = [SYNC_WALL]
+        if self.can_play_track():
+            values.append(SYNC_TRACK)
+        cue = self.linked_cue()
+        if cue is not None and self.engine() is not None:
+            values.append(SYNC_CUE.format(cue["name"]))
+        self.sync_menu.configure(values=values)
+        if self.sync_mode.get() not in values:
+            self.sync_mode.set(SYNC_WALL)
+
+    def prepare_track(self, file_path):
+        """Extract the video's audio to a cached WAV at the engine's rate, on a background thread."""
+        sample_rate = self.app.stream_mixer.sample_rate
+        stat = os.stat(file_path)
+        key = hashlib.sha1(f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}|{sample_rate}"
+                           .encode("utf-8")).hexdigest()[:16]
+        track_path = os.path.join(self.cache_dir, f"{key}.wav")
+        if os.path.exists(track_path):
+            os.utime(track_path)  # Usada ahora: es la última que se borra al podar la caché
+            self.track_path = track_path
+            return
+
+        def extract():
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                if extract_audio(file_path, track_path, sample_rate):
+                    self.app.post_to_ui(self.on_track_ready, file_path, track_path)
+                # Un video cambiado o que ya no se usa deja su pista atrás: la caché tiene un tope
+                prune_tracks(self.cache_dir, keep=(track_path, self.track_path))
+            except Exception as e:
+                print(f"No se pudo extraer el audio del video: {e}")
+
+        threading.Thread(target=extract, daemon=True).start()
+
+    def on_track_ready(self, file_path, track_path):
+        if file_path == self.player.path:
+            self.track_path = track_path
+
+    def start_clock(self):
+        """The clock for the chosen sync mode; voices are started or looked up on the engine thread."""
+        engine = self.engine()
+        mode = self.sync_mode.get()
+        if engine is None or mode == SYNC_WALL:
+            return WallClock()
+        clock = VoiceClock()
+        if mode == SYNC_TRACK:
+            engine.submit(self.start_track, clock, self.track_path)
+        else:
+            engine.submit(self.follow_cue, clock, self.linked_cue())
+        return clock
+
+    def start_track(self, clock, track_path):
+        """Runs on the audio worker: play the video's own audio and follow it from its start."""
+        self.track_voice = self.engine().play(track_path)
+        clock.attach(self.track_voice, 0.0)
+
+    def follow_cue(self, clock, audio):
+        """Runs on the audio worker: follow the linked cue from where it is now, starting it if it is silent."""
+        engine = self.engine()
+        voices = [voice for voice in engine.voices_for(audio["file_path"]) if voice.state == "playing"]
+        if voices:
+            clock.attach(max(voices, key=lambda voice: voice.started_at))
+        else:
+            clock.attach(engine.play(audio["file_path"], **self.app.audio_view.cue_options(audio)), 0.0)
+
+    def play_video(self):
+        if self.player.path is None:
+            return
+        if self.sync_mode.get() == SYNC_TRACK and self.track_path is None:
+            self.info_label.configure(text="Preparando el audio del video, inténtelo en unos segundos.")
+            return
+        self.stop_video()
+        self.player.play(self.start_clock())
+        self.pause_button.configure(text="Pausa")
+        self.tick()
+
+    def toggle_pause(self):
+        clock = self.player.clock
+        if isinstance(clock, WallClock):
+            if clock.paused_at is None:
+                clock.pause()
+                self.pause_button.configure(text="Reanudar")
+            else:
+                clock.resume()
+                self.pause_button.configure(text="Pausa")
+            return
+        voice = self.track_voice
+        if voice is None or clock.voice is not voice:
+            return  # Siguiendo a un cue enlazado: la pausa es la de ese cue
+        engine = self.engine()
+        if voice.state == "playing":
+            engine.submit(engine.pause, voice.id)
+            self.pause_button.configure(text="Reanudar")
+        elif voice.state == "paused":
+            engine.submit(engine.resume, voice.id)
+            self.pause_button.configure(text="Pausa")
+
+    def stop_video(self):
+        self.cancel_tick()
+        self.player.stop()
+        engine = self.engine()
+        if engine is not None:
+            engine.submit(self.stop_track)  # Detrás de start_track en la cola del motor, aunque no haya corrido
+
+    def stop_track(self):
+        voice, self.track_voice = self.track_voice, None
+        if voice is not None:
+            self.engine().stop(voice.id, fade_out_ms=0)
+
+    def cancel_tick(self):
+        if self.after_id:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+
+    def tick(self):
+        self.after_id = None
+        with telemetry.span("video.fotograma"):
+            slot = self.player.next_frame()
+            if slot is not None:
+                self.photo.paste(self.frames[slot])
+        if self.player.error is not None:
+            messagebox.showerror("Error", f"Error al reproducir el video: {self.player.error}")
+            return
+        if self.player.is_finished():
+            stats = self.player.stats()
+            self.info_label.configure(text=f"Fin: {stats['shown']} fotogramas, {stats['dropped']} descartados")
+            return
+        self.after_id = self.after(max(1, int(self.player.seconds_to_next() * 1000)), self.tick)
 
-        self.info_label = ctk.CTkLabel(self, text="Vista en desarrollo...")
-        self.info_label.grid(row=1, column=0, padx=20, pady=10)
\ No newline at end of file
+    def close(self):
+        self.stop_video()
+        self.player.close()